@@ -14,6 +14,29 @@ To benchmark the production interpreter, you would need to:
 1. Create benchmark .gom files
 2. Time execution via gulfofmexico.__init__.run_file()
 3. Compare with/without proposed optimizations to interpreter.py
+
+benchmark_engines() does this for the production engines: it runs small
+GOM programs (ENGINE_BENCHMARKS) with every engine in
+gulfofmexico.interpreter.ENGINES and compares their times. Medians of
+benchmark_engines(3) on a development machine, which move by a few ms
+between runs:
+
+    recursion        interpreter 49-54ms, closures 32ms, vm 26-27ms
+    string building  interpreter 38-42ms, closures 28-35ms, vm 27-29ms
+
+The VM saves the walking of the tree, not the work of the helpers it shares
+with the other engines (perform_two_value_operation, assign_variable,
+determine_statement_type). Those are most of the string building time, so
+there it is only about a third faster than the tree walker and level with
+the closures, where on recursion it takes about half the time.
+
+benchmark_string_accumulation() pushes up to a million characters onto a
+GulfOfMexicoString one at a time; with its rope the time per character
+stays flat as the string grows, where a flat str made it grow linearly.
+
+benchmark_engine_string_building() runs a GOM loop that adds one
+character at a time to a string, at a few lengths, with every engine, and
+reports the time per character as the string grows.
 """
 
 import time
@@ -144,6 +167,122 @@ def benchmark_handler_dispatch():
         print(f"  {key}: {value:.4f}ms")
 
 
+def string_building_program(length: int) -> str:
+    """A GOM program that builds a string of length characters in a loop,
+    adding one character each time around."""
+    return (
+        'var var text = ""!\n'
+        "function build(n) => {\n"
+        "   if n > 0 {\n"
+        '      text = text + "x"!\n'
+        "      return build(n-1)!\n"
+        "   }\n"
+        "}\n"
+        f"build({length})!\n"
+    )
+
+
+ENGINE_BENCHMARKS = {
+    "recursion": (
+        "function count(n) => {\n"
+        "   if n > 0 {\n"
+        "      return count(n-1)!\n"
+        "   }\n"
+        "   return n+0!\n"
+        "}\n"
+        "count(1000)!\n"
+    ),
+    "string building": string_building_program(500),
+}
+
+
+def run_gom(code: str, engine: str) -> None:
+    """Run a GOM program with an engine, without printing anything."""
+    import contextlib
+    import io
+
+    import gulfofmexico.interpreter as interpreter
+    from gulfofmexico.builtin import KEYWORDS
+    from gulfofmexico.processor.lexer import tokenize
+    from gulfofmexico.processor.syntax_tree import generate_syntax_tree
+
+    interpreter.set_engine(engine)
+    interpreter.start_program()  # nothing cached by the runs before
+    interpreter.filename = "__benchmark__"
+    interpreter.code = code
+    statements = generate_syntax_tree(
+        "__benchmark__", tokenize("__benchmark__", code), code
+    )
+    namespaces = [KEYWORDS.copy()]
+    interpreter.load_global_gulfofmexico_variables(namespaces)
+    with contextlib.redirect_stdout(io.StringIO()):
+        interpreter.interpret_code_statements_main_wrapper(
+            statements, namespaces, [], [{}], {}, []
+        )
+
+
+def benchmark_engines(iterations: int = 5):
+    """Benchmark the production engines on ENGINE_BENCHMARKS."""
+    import sys
+
+    from gulfofmexico.interpreter import ENGINES, set_engine
+
+    sys.setrecursionlimit(100000)
+    print("\nProduction Engines (median of runs, ms):")
+    for name, code in ENGINE_BENCHMARKS.items():
+        medians = {
+            engine: benchmark(lambda: run_gom(code, engine), iterations)["median"]
+            for engine in ENGINES
+        }
+        base = medians["interpreter"]
+        print(f"  {name}:")
+        for engine, median in medians.items():
+            print(f"    {engine:<12} {median:9.2f}ms  {base / median:.2f}x")
+    set_engine("interpreter")
+
+
+def benchmark_string_accumulation(sizes=(250_000, 500_000, 1_000_000)):
+    """Push characters onto a string one at a time and time it per size."""
+    from gulfofmexico.builtin import GulfOfMexicoString, db_str_push
+
+    print("\nString Accumulation (push one character at a time):")
+    char = GulfOfMexicoString("x")
+    for size in sizes:
+        value = GulfOfMexicoString("x")
+        start = time.perf_counter()
+        for _ in range(size - 1):
+            db_str_push(value, char)
+        text = value.value  # flattened once, at the end
+        elapsed = time.perf_counter() - start
+        assert len(text) == size
+        print(
+            f"  {size:>9,} chars: {elapsed * 1000:9.2f}ms"
+            f"  {elapsed / size * 1e9:7.1f}ns/char"
+        )
+
+
+def benchmark_engine_string_building(sizes=(1_000, 2_000, 4_000)):
+    """Build strings of each size one character at a time, on every engine."""
+    import sys
+
+    from gulfofmexico.interpreter import ENGINES, set_engine
+
+    sys.setrecursionlimit(100000)
+    print("\nEngine String Building (one character per loop iteration):")
+    for engine in ENGINES:
+        print(f"  {engine}:")
+        for size in sizes:
+            code = string_building_program(size)
+            start = time.perf_counter()
+            run_gom(code, engine)
+            elapsed = time.perf_counter() - start
+            print(
+                f"    {size:>7,} chars: {elapsed * 1000:9.2f}ms"
+                f"  {elapsed / size * 1e6:7.2f}us/char"
+            )
+    set_engine("interpreter")
+
+
 def run_all_benchmarks():
     """Run all performance benchmarks."""
     print("=" * 60)
@@ -153,6 +292,9 @@ def run_all_benchmarks():
     benchmark_namespace_lookup()
     benchmark_expression_evaluation()
     benchmark_handler_dispatch()
+    benchmark_engines()
+    benchmark_string_accumulation()
+    benchmark_engine_string_building()
 
     print("\n" + "=" * 60)
     print("Benchmarks Complete")
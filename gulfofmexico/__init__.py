@@ -13,6 +13,12 @@ Execution Flow:
     6. Handle exports between file sections
     7. Wait for async/when statements to complete
 
+Engines:
+    run_file(path, engine="closures") runs the code with the closure
+    compiler in gulfofmexico/closures.py, and engine="vm" with the bytecode
+    VM in gulfofmexico/vm/, instead of the tree-walking interpreter. All
+    engines share the same runtime and behave the same.
+
 Multi-File Support:
     Files can be split into sections using ===== markers:
         ===== section_name =====
@@ -37,6 +43,8 @@ from gulfofmexico.interpreter import (
     load_global_gulfofmexico_variables,
     load_globals,
     load_public_global_variables,
+    set_engine,
+    start_program,
 )
 
 __all__ = ["run_file"]
@@ -45,7 +53,11 @@ __REPL_FILENAME = "__repl__"
 sys.setrecursionlimit(100000)
 
 
-def run_file(main_filename: str) -> None:
+def run_file(
+    main_filename: str,
+    engine: str = "interpreter",
+    wait_for_listeners: bool = True,
+) -> None:
     """Execute a Gulf of Mexico source file.
 
     Reads the file, splits by ===== markers, tokenizes, parses, and executes
@@ -54,7 +66,12 @@ def run_file(main_filename: str) -> None:
 
     Args:
         main_filename: Path to .gom source file
+        engine: Execution engine, one of interpreter.ENGINES
+        wait_for_listeners: Whether to keep waiting for when-statements and
+            after-statements once the code has finished executing
     """
+    set_engine(engine)
+    start_program()
 
     with open(main_filename, "r", encoding="utf-8") as f:
         code_lines = f.readlines()
@@ -108,6 +125,9 @@ def run_file(main_filename: str) -> None:
                 importable_names[target_filename] = {}
             importable_names[target_filename][name] = value
 
+    if not wait_for_listeners:
+        return
+
     print(
         "\033[33mCode has finished executing. Press ^C once or twice to stop waiting for when-statements and after-statements.\033[039m",
         flush=True,
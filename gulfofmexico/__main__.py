@@ -16,13 +16,36 @@ Usage Modes:
     4. Debug mode (show Python traceback):
        $ python -m gulfofmexico -s script.gom
 
-All modes use the production interpreter in gulfofmexico/interpreter.py.
+    5. Closure compiler or bytecode VM engine (any of the modes above):
+       $ python -m gulfofmexico --engine=closures script.gom
+       $ python -m gulfofmexico --engine=vm script.gom
+
+    6. Differential test of the engines (default: programs/engines/*.gom),
+       which fails if a program errors or the engines print differently:
+       $ python -m gulfofmexico --compare-engines [script.gom]
+
+    7. Print the VM bytecode of a file instead of running it:
+       $ python -m gulfofmexico --disassemble script.gom
+
+    8. Keep more previous values of each variable (default: 1, 0 keeps all):
+       $ python -m gulfofmexico --history-depth=16 script.gom
+
+    9. Run async functions more statements per turn, and print how the
+       scheduler did once the file or inline code has run:
+       $ python -m gulfofmexico --slice-size=8 --scheduler-stats script.gom
+
+All modes use the production interpreter in gulfofmexico/interpreter.py,
+either walking the syntax tree or, with --engine=closures, running it as
+closures compiled by gulfofmexico/closures.py, or with --engine=vm, running
+it as bytecode on the VM in gulfofmexico/vm/.
 The experimental gulfofmexico/engine/ is never used.
 
 Execution Path:
     - File mode: run_file() from gulfofmexico/__init__.py
     - Inline mode: _run_inline() direct interpreter invocation
     - REPL mode: repl_main() from gulfofmexico/repl.py
+    - Compare mode: main() from gulfofmexico/differential.py
+    - Disassemble mode: _disassemble() with gulfofmexico/vm/disassembler.py
 """
 
 from __future__ import annotations
@@ -31,16 +54,19 @@ import argparse
 import sys
 from typing import Optional
 
-from gulfofmexico import run_file
+from gulfofmexico import run_file, scheduler
+from gulfofmexico.history import ValueHistory
+from gulfofmexico.interpreter import ENGINES
 from gulfofmexico.repl import main as repl_main
 
 
-def _run_inline(code: str, show_tb: bool) -> int:
+def _run_inline(code: str, show_tb: bool, engine: str = "interpreter") -> int:
     """Execute inline Gulf of Mexico code via production interpreter.
 
     Args:
         code: Source code string to execute
         show_tb: Whether to show Python traceback on errors
+        engine: Execution engine, one of interpreter.ENGINES
 
     Returns:
         Exit code (0 for success, 1 for error)
@@ -53,6 +79,8 @@ def _run_inline(code: str, show_tb: bool) -> int:
 
     try:
         filename = "__inline__"
+        interpreter.set_engine(engine)
+        interpreter.start_program()
         interpreter.filename = filename
         interpreter.code = code
 
@@ -90,6 +118,28 @@ def _run_inline(code: str, show_tb: bool) -> int:
         return 1
 
 
+def _disassemble(path: str) -> int:
+    """Print the bytecode of every block in a file."""
+    from gulfofmexico.processor.lexer import tokenize
+    from gulfofmexico.processor.syntax_tree import generate_syntax_tree
+    from gulfofmexico.vm.disassembler import disassemble_all
+
+    with open(path, "r", encoding="utf-8") as f:
+        code = f.read()
+    statements = generate_syntax_tree(path, tokenize(path, code), code)
+    print(disassemble_all(statements, path))
+    return 0
+
+
+def _print_scheduler_stats() -> None:
+    """Print the scheduler statistics of the program that ran, to stderr."""
+    for key, value in scheduler.stats.get_stats().items():
+        if isinstance(value, float):
+            print(f"{key}: {value * 1000:.3f}ms", file=sys.stderr)
+        else:
+            print(f"{key}: {value}", file=sys.stderr)
+
+
 def _main(argv: Optional[list[str]] = None) -> int:
     args = argv if argv is not None else sys.argv[1:]
 
@@ -102,30 +152,93 @@ def _main(argv: Optional[list[str]] = None) -> int:
         help="show full Python traceback on errors",
     )
     parser.add_argument("-c", dest="inline_code", help="run inline code and exit")
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="interpreter",
+        help="execution engine (default: interpreter)",
+    )
+    parser.add_argument(
+        "--compare-engines",
+        action="store_true",
+        help="run the file (default: programs/engines/*.gom) with every engine; "
+        "fails if it errors under one or the outputs differ",
+    )
+    parser.add_argument(
+        "--disassemble",
+        action="store_true",
+        help="print the VM bytecode of the file instead of running it",
+    )
+    parser.add_argument(
+        "--history-depth",
+        type=int,
+        metavar="N",
+        help="how many previous values each variable keeps "
+        f"(default: {ValueHistory.default_depth}, 0 keeps all)",
+    )
+    parser.add_argument(
+        "--slice-size",
+        type=int,
+        metavar="N",
+        help="how many statements an async function runs per turn "
+        f"(default: {scheduler.SLICE_SIZE})",
+    )
+    parser.add_argument(
+        "--scheduler-stats",
+        action="store_true",
+        help="print the async scheduler statistics to stderr after running",
+    )
     ns = parser.parse_args(args)
 
+    if ns.history_depth is not None:
+        if ns.history_depth < 0:
+            parser.error("--history-depth cannot be negative")
+        ValueHistory.default_depth = ns.history_depth
+    if ns.slice_size is not None:
+        if ns.slice_size < 1:
+            parser.error("--slice-size must be at least 1")
+        scheduler.SLICE_SIZE = ns.slice_size
+
+    # Disassemble mode
+    if ns.disassemble:
+        if not ns.file:
+            parser.error("--disassemble needs a file")
+        return _disassemble(ns.file)
+
+    # Differential test mode
+    if ns.compare_engines:
+        from gulfofmexico.differential import main as compare_main
+
+        return compare_main([ns.file] if ns.file else None)
+
     # Inline code mode
     if ns.inline_code is not None:
         try:
-            return _run_inline(ns.inline_code, ns.show_traceback)
+            return _run_inline(ns.inline_code, ns.show_traceback, ns.engine)
         except Exception:
             if ns.show_traceback:
                 raise
             return 1
+        finally:
+            if ns.scheduler_stats:
+                _print_scheduler_stats()
 
     # File mode
     if ns.file:
         try:
-            run_file(ns.file)
+            run_file(ns.file, engine=ns.engine)
             return 0
         except Exception:
             if ns.show_traceback:
                 raise
             return 1
+        finally:
+            if ns.scheduler_stats:
+                _print_scheduler_stats()
 
     # Default: REPL
     try:
-        return repl_main([])
+        return repl_main(["--engine", ns.engine])
     except Exception:
         if ns.show_traceback:
             raise
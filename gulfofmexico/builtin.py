@@ -19,14 +19,37 @@ Variable System:
     - Variable: Probabilistic values with confidence levels
     - VariableLifetime: Temporal and line-based expiration
     - Name: Immutable named values
+    - Variable.changed: wakes the threads waiting for a variable's next value
 
 Key Features:
-    - Fractional indexing: insert between elements (list[0.5] = x)
+    - Fractional indexing: insert between elements (list[0.5] = x) in
+      O(log n), with the IndexMap of gulfofmexico/indexing.py
+    - Strings keep their text in a Rope (gulfofmexico/rope.py), so pushing,
+      popping and inserting characters do not copy the whole string
     - -1 indexing: arrays start at -1 instead of 0
     - Three-valued boolean logic for uncertainty
     - Confidence-based variable lifetimes
     - Mutable vs immutable modifiers (const/var)
 
+Shared Values:
+    Every value class has __slots__, and results are shared instead of
+    allocated where they can be: db_boolean() returns TRUE, FALSE or MAYBE,
+    UNDEFINED is the one undefined and db_number() returns a cached
+    instance for small ints. Whatever stores a value (names, variables,
+    list and map items) stores unshared(value), its own copy of a shared
+    instance, so digit assignment (x[0] = 1) never changes a cached number
+    and ==== is only true for one stored value, as before.
+
+Copy-On-Write:
+    Promise reads and the namespaces captured by when statements used to be
+    deep copies, so their cost grew with everything reachable from them.
+    copy_value() now copies a list, string or map in O(1) with share(): the
+    copy uses the original's storage until one of them changes it or hands
+    out one of its items (see own_storage()). The values in the storage are
+    copied then, one level at a time, each again with copy_value(). When the
+    original is the one that changes, it keeps its items and the copies get
+    copies of them, so names bound to those items still see the changes.
+
 Built-in Functions:
     - Type conversions: Number(), String(), Boolean()
     - I/O: print(), read(), write()
@@ -45,8 +68,13 @@ from time import sleep
 import math
 from abc import ABCMeta, abstractmethod
 from dataclasses import dataclass, field
-from typing import Callable, Optional, Union
+from threading import Condition
+from typing import Callable, ClassVar, Iterable, Optional, Union
 from gulfofmexico.base import NonFormattedError
+from gulfofmexico.constants import INFINITE_LIFETIME
+from gulfofmexico.history import ValueHistory
+from gulfofmexico.indexing import IndexMap, StringIndexMap
+from gulfofmexico.rope import Rope, RopeText
 
 from gulfofmexico.processor.syntax_tree import CodeStatement
 
@@ -67,6 +95,11 @@ __all__ = [
 
 FLOAT_TO_INT_PREC = 0.00000001
 
+# whose storage a list, string or map uses, see Copy-On-Write
+OWN_STORAGE = 0  # its own, nobody else's
+LENT_STORAGE = 1  # its own, and copies use it too
+BORROWED_STORAGE = 2  # the storage of the value it was copied from
+
 
 def is_int(x: Union[float, int]) -> bool:
     return min(x % 1, 1 - x % 1) < FLOAT_TO_INT_PREC
@@ -74,60 +107,60 @@ def is_int(x: Union[float, int]) -> bool:
 
 def db_not(x: GulfOfMexicoBoolean) -> GulfOfMexicoBoolean:
     if x.value is None:
-        return GulfOfMexicoBoolean(None)
-    return GulfOfMexicoBoolean(not x.value)
+        return MAYBE
+    return db_boolean(not x.value)
 
 
 def db_list_push(self: GulfOfMexicoList, val: GulfOfMexicoValue) -> None:
-    self.indexer[max(self.indexer.keys()) + 1] = len(self.values) - 1
-    self.values.append(val)
-    self.create_namespace()  # update the length
+    self.own_storage()
+    self.indexer[self.indexer.max_key() + 1] = len(self.values) - 1
+    self.values.append(unshared(val))
 
 
 def db_list_pop(
     self: GulfOfMexicoList,
     index: Union[GulfOfMexicoNumber, GulfOfMexicoSpecialBlankValue],
 ) -> GulfOfMexicoValue:
+    self.own_storage()
     if isinstance(index, GulfOfMexicoSpecialBlankValue):
-        retval = self.values.pop()
-        self.create_namespace()
-        return retval
+        return self.values.pop()
     elif not isinstance(index, GulfOfMexicoNumber) or not is_int(index.value):
         raise NonFormattedError("Expected integer for list popping.")
     elif not -1 <= index.value <= len(self.values) - 1:
         raise NonFormattedError("Indexing out of list bounds.")
-    retval = self.values.pop(round(index.value) + 1)
-    self.create_namespace()
-    return retval
+    return self.values.pop(round(index.value) + 1)
 
 
 def db_str_push(self: GulfOfMexicoString, val: GulfOfMexicoValue) -> None:
-    val_str = db_to_string(val).value
-    max_user_index = max(self.indexer.keys())
+    self.own_storage()
+    if isinstance(val, GulfOfMexicoString):
+        val_str = val.value
+    else:
+        val_str = db_to_string(val).value
+    max_user_index = self.indexer.max_key()
     if len(val_str) > 1:
-        self.indexer[max_user_index + 1] = (len(self.value) - 1, val_str[1:])
+        self.indexer[max_user_index + 1] = (len(self.rope) - 1, val_str[1:])
     else:
-        self.indexer[max_user_index + 1] = (len(self.value) - 1, "")
-    self.value += val_str
-    # print(max(self.indexer.keys())+1)
-    self.create_namespace()  # update the length
+        self.indexer[max_user_index + 1] = (len(self.rope) - 1, "")
+    self.rope.append(val_str)
 
 
 def db_str_pop(
     self: GulfOfMexicoString,
     index: Union[GulfOfMexicoNumber, GulfOfMexicoSpecialBlankValue],
 ) -> GulfOfMexicoValue:
+    self.own_storage()
     if isinstance(index, GulfOfMexicoSpecialBlankValue):
-        retval = self.value[-1]
-        self.value = self.value[:-1]
+        retval = self.rope[-1]
+        self.rope.replace(-1, len(self.rope), "")
         return GulfOfMexicoString(retval)
     elif not isinstance(index, GulfOfMexicoNumber) or not is_int(index.value):
         raise NonFormattedError("Expected integer for string popping.")
-    elif not -1 <= index.value <= len(self.value) - 1:
+    elif not -1 <= index.value <= len(self.rope) - 1:
         raise NonFormattedError("Indexing out of string bounds.")
     index_val = round(index.value) + 1
-    retval = self.value[index_val]
-    self.value = self.value[:index_val] + self.value[index_val + 1 :]
+    retval = self.rope[index_val]
+    self.rope.replace(index_val, index_val + 1, "")
     return GulfOfMexicoString(retval)
 
 
@@ -141,14 +174,25 @@ def db_str_pop(
 
 
 class GulfOfMexicoValue:  # base class for shit
-    pass
+    __slots__ = ()
 
 
-class GulfOfMexicoMutable(GulfOfMexicoValue):  # mutable values
-    pass
+class WeaklyReferenceable:
+    """The weak reference slot for slotted classes, which dataclass(slots=True)
+    only adds by itself from Python 3.11. Variables and mutable values are
+    referenced weakly by the when statements watching them (reactive.py),
+    promises by the next watching a variable for them, and variables and
+    their lifetimes by the heaps that end those (lifetimes.py)."""
+
+    __slots__ = ("__weakref__",)
+
+
+class GulfOfMexicoMutable(WeaklyReferenceable, GulfOfMexicoValue):  # mutable values
+    __slots__ = ()
 
 
 class GulfOfMexicoIndexable(GulfOfMexicoValue, metaclass=ABCMeta):
+    __slots__ = ()
 
     @abstractmethod
     def access_index(self, index: GulfOfMexicoValue) -> GulfOfMexicoValue:
@@ -160,24 +204,25 @@ class GulfOfMexicoIndexable(GulfOfMexicoValue, metaclass=ABCMeta):
 
 
 class GulfOfMexicoNamespaceable(GulfOfMexicoValue, metaclass=ABCMeta):
+    __slots__ = ()
     namespace: dict[str, Union[Name, Variable]]
 
 
-@dataclass
+@dataclass(slots=True)
 class GulfOfMexicoFunction(GulfOfMexicoValue):
     args: list[str]
     code: list[tuple[CodeStatement, ...]]
     is_async: bool
 
 
-@dataclass
+@dataclass(slots=True)
 class BuiltinFunction(GulfOfMexicoValue):
     arg_count: int
     function: Callable
     modifies_caller: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class GulfOfMexicoList(
     GulfOfMexicoIndexable,
     GulfOfMexicoNamespaceable,
@@ -185,36 +230,55 @@ class GulfOfMexicoList(
     GulfOfMexicoValue,
 ):
     values: list[GulfOfMexicoValue]
-    indexer: dict[float, int] = field(
+    indexer: IndexMap = field(
         init=False
     )  # used for converting the user decimal indecies to the real indecies
-    namespace: dict[str, Union[Name, Variable]] = field(default_factory=dict)
+    sharing: int = field(init=False, repr=False, compare=False)
 
     def __post_init__(self):
-        self.create_namespace(False)
-        self.indexer = dict()
-        for index in range(-1, len(self.values) - 1):
-            self.indexer[index] = index
-
-    def create_namespace(self, is_update: bool = True) -> None:
-
-        if not is_update:
-            self.namespace = {
-                "push": Name("push", BuiltinFunction(2, db_list_push, True)),
-                "pop": Name("pop", BuiltinFunction(2, db_list_pop, True)),
-                "length": Name("length", GulfOfMexicoNumber(len(self.values))),
-            }
-        elif is_update:
-            self.namespace |= {
-                "length": Name("length", GulfOfMexicoNumber(len(self.values))),
-            }
+        self.indexer = IndexMap.identity(-1, len(self.values) - 1)
+        self.sharing = OWN_STORAGE
+        values = self.values
+        for i, value in enumerate(values):
+            if id(value) in SHARED_VALUE_IDS:
+                values[i] = unshared(value)
+
+    def share(self) -> GulfOfMexicoList:
+        """A copy in O(1), using this list's storage; see Copy-On-Write."""
+        copied = GulfOfMexicoList.__new__(GulfOfMexicoList)
+        copied.values, copied.indexer = self.values, self.indexer
+        copied.sharing = BORROWED_STORAGE
+        if self.sharing == OWN_STORAGE:
+            self.sharing = LENT_STORAGE
+        return copied
+
+    def own_storage(self) -> None:
+        """Stop sharing the storage, before changing it or handing out items."""
+        if self.sharing == OWN_STORAGE:
+            return
+        values = self.values
+        if self.sharing == BORROWED_STORAGE:
+            self.values = [copy_value(value) for value in values]
+        else:  # the copies still using values get copies of the items
+            self.values = values[:]
+            values[:] = [copy_value(value) for value in values]
+        self.indexer = self.indexer.copy()
+        self.sharing = OWN_STORAGE
+
+    @property
+    def namespace(self) -> dict[str, Union[Name, Variable]]:
+        # the methods are shared by every list, only the length is its own
+        return LIST_METHODS | {
+            "length": Name("length", GulfOfMexicoNumber(len(self.values)))
+        }
 
     def access_index(self, index: GulfOfMexicoValue) -> GulfOfMexicoValue:
         if not isinstance(index, GulfOfMexicoNumber):
             raise NonFormattedError("Cannot index a list with a non-number value.")
         if not -1 <= index.value <= len(self.values) - 1:
             raise NonFormattedError("Indexing out of list bounds.")
-        elif index.value not in self.indexer:
+        self.own_storage()
+        if index.value not in self.indexer:
             raise NonFormattedError(
                 "No value assigned to that index"
             )  # if inbounds index doesnt have assigned val
@@ -227,28 +291,25 @@ class GulfOfMexicoList(
     def assign_index(self, index: GulfOfMexicoValue, val: GulfOfMexicoValue) -> None:
         if not isinstance(index, GulfOfMexicoNumber):
             raise NonFormattedError("Cannot index a list with a non-number value.")
+        self.own_storage()
         if index.value in self.indexer:
             if not -1 <= index.value <= len(self.values) - 1:
                 raise NonFormattedError("Indexing out of list bounds.")
-            self.values[round(index.value)] = val
+            self.values[round(index.value)] = unshared(val)
             self.indexer[round(index.value)] = round(index.value)
         else:  # assign in the middle of the array
             if not -1 <= index.value <= len(self.values) - 1:
                 raise NonFormattedError("Indexing out of list bounds.")
             nearest_int_down = round(max((index.value + 2) // 1, 0))
-            self.values[nearest_int_down:nearest_int_down] = [val]
+            self.values[nearest_int_down:nearest_int_down] = [unshared(val)]
             self.indexer[index.value] = (
                 nearest_int_down - 1
             )  # if adding to end, user index is real index
-            self.create_namespace()
             # all real indexes after the inserted item need 1 to be added to them
-            user_indicies = self.indexer.keys()
-            for user_index in user_indicies:
-                if user_index > index.value:
-                    self.indexer[user_index] += 1
+            self.indexer.shift_after(index.value, 1)
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(unsafe_hash=True, slots=True)
 class GulfOfMexicoNumber(GulfOfMexicoIndexable, GulfOfMexicoMutable, GulfOfMexicoValue):
     value: Union[int, float]
 
@@ -298,46 +359,62 @@ class GulfOfMexicoNumber(GulfOfMexicoIndexable, GulfOfMexicoMutable, GulfOfMexic
             )
 
 
+class GulfOfMexicoStringSlots(GulfOfMexicoValue):
+    """The slots of GulfOfMexicoString, apart so that value can stay a RopeText."""
+
+    __slots__ = ("rope", "indexer", "sharing")
+
+
 @dataclass(unsafe_hash=True)
 class GulfOfMexicoString(
     GulfOfMexicoIndexable,
     GulfOfMexicoNamespaceable,
     GulfOfMexicoMutable,
+    GulfOfMexicoStringSlots,
     GulfOfMexicoValue,
 ):
-    value: str = field(hash=True)
-    indexer: dict[float, tuple] = field(
+    __slots__ = ()
+    value: str = RopeText()  # read and written as a str, kept in self.rope
+    rope: Rope = field(init=False, repr=False, compare=False)
+    indexer: StringIndexMap = field(
         init=False, hash=False
     )  # used for converting the user decimal indecies to the real indecies
     # tuple stores the real index in the first slot and any extra characters in the second
-    namespace: dict[str, Union[Name, Variable]] = field(
-        default_factory=dict, hash=False
-    )
+    sharing: int = field(init=False, repr=False, compare=False)
 
     def __post_init__(self):
-        self.create_namespace(False)
-        self.indexer = dict()
-        for index in range(len(self.value)):
-            self.indexer[index - 1] = (index - 1, "")
-
-    def create_namespace(self, is_update: bool = True):
-        if not is_update:
-            self.namespace |= {
-                "push": Name("push", BuiltinFunction(2, db_str_push, True)),
-                "pop": Name("pop", BuiltinFunction(2, db_str_pop, True)),
-                "length": Name("length", GulfOfMexicoNumber(len(self.value))),
-            }
-        else:
-            self.namespace["length"] = Name(
-                "length", GulfOfMexicoNumber(len(self.value))
-            )
+        self.indexer = StringIndexMap.identity(-1, len(self.value) - 1)
+        self.sharing = OWN_STORAGE
+
+    def share(self) -> GulfOfMexicoString:
+        """A copy in O(1), using this string's storage; see Copy-On-Write."""
+        copied = GulfOfMexicoString.__new__(GulfOfMexicoString)
+        copied.rope, copied.indexer = self.rope, self.indexer
+        copied.sharing = BORROWED_STORAGE
+        if self.sharing == OWN_STORAGE:
+            self.sharing = LENT_STORAGE
+        return copied
+
+    def own_storage(self) -> None:
+        """Stop sharing the storage before changing it."""
+        if self.sharing != OWN_STORAGE:
+            self.rope = self.rope.copy()
+            self.indexer = self.indexer.copy()
+            self.sharing = OWN_STORAGE
+
+    @property
+    def namespace(self) -> dict[str, Union[Name, Variable]]:
+        # the methods are shared by every string, only the length is its own
+        return STRING_METHODS | {
+            "length": Name("length", GulfOfMexicoNumber(len(self.rope)))
+        }
 
     def access_index(self, index: GulfOfMexicoValue) -> GulfOfMexicoValue:
         if not isinstance(index, GulfOfMexicoNumber):
             raise NonFormattedError("Cannot index a string with a non-number value.")
         # if not is_int(index.value):
         #    raise NonFormattedError("Expected integer for string indexing.")
-        if not -1 <= index.value <= len(self.value) - 1:
+        if not -1 <= index.value <= len(self.rope) - 1:
             raise NonFormattedError("Indexing out of string bounds.")
         elif index.value not in self.indexer:
             raise NonFormattedError(
@@ -347,109 +424,124 @@ class GulfOfMexicoString(
         index_data = self.indexer[user_index]
         real_index = index_data[0]
         extra_characters = index_data[1]
-        return self.value[real_index + 1] + extra_characters
+        return self.rope[real_index + 1] + extra_characters
 
     def assign_index(self, index: GulfOfMexicoValue, val: GulfOfMexicoValue) -> None:
         if not isinstance(index, GulfOfMexicoNumber):
             raise NonFormattedError("Cannot index a string with a non-number value.")
         val_str = db_to_string(val).value
+        self.own_storage()
         if index.value in self.indexer:
             ## add, when modifying, reduce user indexes by the length of the replaced index's extra characters
             indexer_data = self.indexer[index.value]
             index_num = indexer_data[0] + 1
             excess_length = len(indexer_data[1])
-            self.value = (
-                self.value[:index_num]
-                + val_str
-                + self.value[index_num + excess_length + 1 :]
-            )
+            self.rope.replace(index_num, index_num + excess_length + 1, val_str)
             if len(val_str) > 1:
                 indexer_data = (indexer_data[0], val_str[:-1])
             else:
                 indexer_data = (indexer_data[0], "")
             self.indexer[index.value] = indexer_data
-            user_indicies = self.indexer.keys()
-            for user_index in user_indicies:
-                if user_index > index.value:
-                    indexer_data = self.indexer[user_index]
-                    indexer_data = (indexer_data[0] - excess_length, indexer_data[1])
-                    self.indexer[user_index] = indexer_data
-            self.create_namespace()
+            self.indexer.shift_after(index.value, -excess_length)
 
         else:  # assign in the middle of the array
-            if not -1 <= index.value <= len(self.value) - 1:
+            if not -1 <= index.value <= len(self.rope) - 1:
                 raise NonFormattedError("Indexing out of string bounds.")
             index_num = round(max((index.value + 2) // 1, 0))
-            self.value = self.value[:index_num] + val_str + self.value[index_num:]
+            self.rope.replace(index_num, index_num, val_str)
             if len(val_str) > 1:
                 indexer_data = (index_num - 1, val_str[1:])
             else:
                 indexer_data = (index_num - 1, "")
             self.indexer[index.value] = indexer_data
-            user_indicies = self.indexer.keys()
-            for user_index in user_indicies:
-                if user_index > index.value:
-                    # print(f"updating user index {user_index},{self.indexer[user_index]}")
-                    indexer_data = self.indexer[user_index]
-                    indexer_data = (indexer_data[0] + len(val_str), indexer_data[1])
-                    self.indexer[user_index] = indexer_data
-            self.create_namespace()
+            self.indexer.shift_after(index.value, len(val_str))
 
 
-@dataclass
+@dataclass(slots=True)
 class GulfOfMexicoBoolean(GulfOfMexicoValue):
     value: Optional[bool]  # none represents maybe?
 
 
-@dataclass
+@dataclass(slots=True)
 class GulfOfMexicoUndefined(GulfOfMexicoValue):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class GulfOfMexicoSpecialBlankValue(GulfOfMexicoValue):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class GulfOfMexicoObject(GulfOfMexicoNamespaceable, GulfOfMexicoValue):
     class_name: str
     namespace: dict[str, Union[Name, Variable]] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(slots=True)
 class GulfOfMexicoMap(GulfOfMexicoIndexable, GulfOfMexicoValue):
     self_dict: dict[Union[int, float, str], GulfOfMexicoValue]
+    sharing: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.sharing = OWN_STORAGE
+
+    def share(self) -> GulfOfMexicoMap:
+        """A copy in O(1), using this map's storage; see Copy-On-Write."""
+        copied = GulfOfMexicoMap.__new__(GulfOfMexicoMap)
+        copied.self_dict = self.self_dict
+        copied.sharing = BORROWED_STORAGE
+        if self.sharing == OWN_STORAGE:
+            self.sharing = LENT_STORAGE
+        return copied
+
+    def own_storage(self) -> None:
+        """Stop sharing the storage, before changing it or handing out items."""
+        if self.sharing == OWN_STORAGE:
+            return
+        items = self.self_dict
+        if self.sharing == BORROWED_STORAGE:
+            self.self_dict = {key: copy_value(val) for key, val in items.items()}
+        else:  # the copies still using items get copies of the values
+            self.self_dict = dict(items)
+            for key, val in self.self_dict.items():
+                items[key] = copy_value(val)
+        self.sharing = OWN_STORAGE
 
     def access_index(self, index: GulfOfMexicoValue) -> GulfOfMexicoValue:
         if not isinstance(index, (GulfOfMexicoString, GulfOfMexicoNumber)):
             raise NonFormattedError("Keys of a map must be an index or a number.")
+        self.own_storage()
         return self.self_dict[index.value]
 
     def assign_index(self, index: GulfOfMexicoValue, val: GulfOfMexicoValue) -> None:
         if not isinstance(index, (GulfOfMexicoString, GulfOfMexicoNumber)):
             raise NonFormattedError("Keys of a map must be an index or a number.")
-        self.self_dict[index.value] = val
+        self.own_storage()
+        self.self_dict[index.value] = unshared(val)
 
 
-@dataclass
+@dataclass(slots=True)
 class GulfOfMexicoKeyword(GulfOfMexicoValue):
     value: str
 
 
-@dataclass
-class GulfOfMexicoPromise(GulfOfMexicoValue):
+@dataclass(slots=True)
+class GulfOfMexicoPromise(WeaklyReferenceable, GulfOfMexicoValue):
     value: Optional[GulfOfMexicoValue]
 
 
-@dataclass
+@dataclass(slots=True)
 class Name:
     name: str
     value: GulfOfMexicoValue
 
+    def __post_init__(self):
+        self.value = unshared(self.value)
+
 
-@dataclass
-class VariableLifetime:
+@dataclass(slots=True)
+class VariableLifetime(WeaklyReferenceable):
     value: GulfOfMexicoValue
     lines_left: int
     confidence: int
@@ -459,31 +551,51 @@ class VariableLifetime:
     is_temporal: bool = False
     temporal_duration: float = 0.0
 
+    def __post_init__(self):
+        self.value = unshared(self.value)
+
 
-@dataclass
-class Variable:
+@dataclass(slots=True)
+class Variable(WeaklyReferenceable):
     name: str
     lifetimes: list[VariableLifetime]
-    prev_values: list[GulfOfMexicoValue]
+    prev_values: ValueHistory  # only the last few, see gulfofmexico.history
+    # the earliest time one of the temporal lifetimes ends at, or None, so a
+    # read only looks at the clock when one of them might have ended
+    expires_at: Optional[float] = field(default=None, init=False)
+
+    # notified when a variable gets a new value or is declared, for the
+    # threads waiting on the next value of one; only taken while one waits
+    changed: ClassVar[Condition] = Condition()
+    waiting: ClassVar[int] = 0
 
     def __init__(
         self,
         name: str,
         lifetimes: list[VariableLifetime],
-        prev_values: list[GulfOfMexicoValue],
+        prev_values: Iterable[GulfOfMexicoValue],
     ):
         self.name = name
         self.lifetimes = lifetimes
-        self.prev_values = prev_values
+        self.prev_values = (
+            prev_values
+            if isinstance(prev_values, ValueHistory)
+            else ValueHistory(prev_values)
+        )
+        self.reset_expiry()
 
     @property
     def can_be_reset(self) -> bool:
+        if self.expires_at is not None:
+            self.expire_due()
         if self.lifetimes:
             return self.lifetimes[0].can_be_reset
         raise NonFormattedError("Variable is undefined.")
 
     @property
     def can_edit_value(self) -> bool:
+        if self.expires_at is not None:
+            self.expire_due()
         if self.lifetimes:
             return self.lifetimes[0].can_edit_value
         raise NonFormattedError("Variable is undefined.")
@@ -497,42 +609,211 @@ class Variable:
         can_edit_value: bool,
         is_temporal: bool = False,
         temporal_duration: float = 0.0,
-    ) -> None:
+    ) -> VariableLifetime:
+        lifetime = VariableLifetime(
+            value,
+            duration,
+            confidence,
+            can_be_reset,
+            can_edit_value,
+            is_temporal=is_temporal,
+            temporal_duration=temporal_duration,
+        )
         for i in range(len(self.lifetimes) + 1):
             if i == len(self.lifetimes) or self.lifetimes[i].confidence >= confidence:
                 if i == 0 and self.lifetimes:
-                    self.prev_values.append(self.value)
-                self.lifetimes[i:i] = [
-                    VariableLifetime(
-                        value,
-                        duration,
-                        confidence,
-                        can_be_reset,
-                        can_edit_value,
-                        is_temporal=is_temporal,
-                        temporal_duration=temporal_duration,
-                    )
-                ]
+                    self.prev_values.append(self.lifetimes[0].value)
+                self.lifetimes.insert(i, lifetime)
+                if duration == INFINITE_LIFETIME and not is_temporal:
+                    # nothing ends this one, so the lifetimes behind it
+                    # could never come back; drop them rather than let a
+                    # reassigned variable pile them up
+                    del self.lifetimes[i + 1 :]
                 break
+        if is_temporal:
+            self.expire_at(lifetime.creation_time + temporal_duration)
+        self.notify_waiting()
+        return lifetime
+
+    def end_lifetime(self, lifetime: VariableLifetime) -> None:
+        """Remove one of the lifetimes, which has expired; the variable falls
+        back to the next one, or is undefined if there is none."""
+        for i, current in enumerate(self.lifetimes):
+            if current is lifetime:
+                del self.lifetimes[i]
+                if lifetime.is_temporal:
+                    self.reset_expiry()
+                if i == 0:
+                    self.notify_waiting()
+                return
+
+    @classmethod
+    def notify_waiting(cls) -> None:
+        """Wake the threads waiting for a variable to change, if any.
+
+        A waiter counts itself before checking the variables, so a change
+        made while the count is read as 0 is seen by that check."""
+        if cls.waiting:
+            with cls.changed:
+                cls.changed.notify_all()
+
+    def expire_at(self, deadline: float) -> None:
+        """Note that a temporal lifetime ends at deadline (a time.time())."""
+        if self.expires_at is None or deadline < self.expires_at:
+            self.expires_at = deadline
+
+    def reset_expiry(self) -> None:
+        self.expires_at = None
+        for lifetime in self.lifetimes:
+            if lifetime.is_temporal:
+                self.expire_at(lifetime.creation_time + lifetime.temporal_duration)
+
+    def expire_due(self) -> None:
+        if time.time() >= self.expires_at:  # type: ignore[operator]
+            self.clear_outdated_lifetimes()
 
     def clear_outdated_lifetimes(self) -> None:
-        remove_indeces = []
+        """Remove the temporal lifetimes that have ended; line lifetimes are
+        ended by gulfofmexico.lifetimes, which counts the statements."""
         current_time = time.time()
-        for i, l in enumerate(self.lifetimes):
-            if l.lines_left == 0 or (
-                l.is_temporal and current_time - l.creation_time >= l.temporal_duration
-            ):
-                remove_indeces.append(i)
-        for i in reversed(remove_indeces):
-            del self.lifetimes[i]
+        first = self.lifetimes[0] if self.lifetimes else None
+        self.lifetimes[:] = [
+            l
+            for l in self.lifetimes
+            if not l.is_temporal
+            or current_time - l.creation_time < l.temporal_duration
+        ]
+        self.reset_expiry()
+        if first is not (self.lifetimes[0] if self.lifetimes else None):
+            self.notify_waiting()
 
     @property
     def value(self) -> GulfOfMexicoValue:
+        if self.expires_at is not None:
+            self.expire_due()
         if self.lifetimes:
             return self.lifetimes[0].value
         raise NonFormattedError("Variable is undefined.")
 
 
+# shared instances, see Shared Values in the module docstring
+TRUE = GulfOfMexicoBoolean(True)
+FALSE = GulfOfMexicoBoolean(False)
+MAYBE = GulfOfMexicoBoolean(None)
+UNDEFINED = GulfOfMexicoUndefined()
+SMALL_NUMBERS = tuple(GulfOfMexicoNumber(i) for i in range(-5, 1025))
+SHARED_VALUE_IDS = frozenset(
+    id(value) for value in (TRUE, FALSE, MAYBE, UNDEFINED, *SMALL_NUMBERS)
+)
+
+
+def db_boolean(value: Optional[bool]) -> GulfOfMexicoBoolean:
+    """The shared boolean for True, False or None (maybe)."""
+    if value is True:
+        return TRUE
+    if value is False:
+        return FALSE
+    if value is None:
+        return MAYBE
+    return GulfOfMexicoBoolean(value)
+
+
+def db_number(value: Union[int, float]) -> GulfOfMexicoNumber:
+    """A number, shared if it is an int from -5 to 1024."""
+    if type(value) is int and -5 <= value <= 1024:
+        return SMALL_NUMBERS[value + 5]
+    return GulfOfMexicoNumber(value)
+
+
+def is_shared(value: object) -> bool:
+    return id(value) in SHARED_VALUE_IDS
+
+
+def unshared(value: GulfOfMexicoValue) -> GulfOfMexicoValue:
+    """The value to store: a copy of a shared instance, or the value itself."""
+    if id(value) in SHARED_VALUE_IDS:
+        if isinstance(value, GulfOfMexicoUndefined):
+            return GulfOfMexicoUndefined()
+        return type(value)(value.value)  # type: ignore[attr-defined]
+    return value
+
+
+def copy_value(
+    value: Optional[GulfOfMexicoValue],
+    memo: Optional[dict[int, object]] = None,
+) -> Optional[GulfOfMexicoValue]:
+    """An independent copy of value, like a deepcopy; see Copy-On-Write.
+
+    Values reached twice while copying with the same memo are copied once,
+    so names bound to one list still share it in the copy.
+    """
+    if memo is not None and (copied := memo.get(id(value))) is not None:
+        return copied  # type: ignore[return-value]
+    match value:
+        case GulfOfMexicoList() | GulfOfMexicoString() | GulfOfMexicoMap():
+            copied = value.share()
+        case GulfOfMexicoNumber() | GulfOfMexicoBoolean() | GulfOfMexicoKeyword():
+            copied = type(value)(value.value)
+        case GulfOfMexicoUndefined() | GulfOfMexicoSpecialBlankValue():
+            copied = type(value)()
+        case GulfOfMexicoObject():
+            copied = GulfOfMexicoObject(value.class_name, {})
+            if memo is None:
+                memo = {}
+            memo[id(value)] = copied
+            for key, binding in value.namespace.items():
+                copied.namespace[key] = copy_binding(binding, memo)
+        case GulfOfMexicoPromise():
+            copied = GulfOfMexicoPromise(copy_value(value.value, memo))
+        case GulfOfMexicoFunction():  # the code is never changed, only run
+            copied = GulfOfMexicoFunction(value.args, value.code, value.is_async)
+        case BuiltinFunction():
+            copied = BuiltinFunction(
+                value.arg_count, value.function, value.modifies_caller
+            )
+        case _:
+            return value
+    if memo is not None:
+        memo[id(value)] = copied
+    return copied
+
+
+def copy_binding(
+    binding: Union[Name, Variable], memo: Optional[dict[int, object]] = None
+) -> Union[Name, Variable]:
+    """An independent copy of a name or variable and its values."""
+    if memo is None:
+        memo = {}
+    if (copied := memo.get(id(binding))) is not None:
+        return copied  # type: ignore[return-value]
+    if isinstance(binding, Name):
+        copied = Name(binding.name, copy_value(binding.value, memo))  # type: ignore
+    elif isinstance(binding, Variable):
+        copied = Variable(
+            binding.name,
+            [
+                VariableLifetime(
+                    copy_value(lifetime.value, memo),  # type: ignore[arg-type]
+                    lifetime.lines_left,
+                    lifetime.confidence,
+                    lifetime.can_be_reset,
+                    lifetime.can_edit_value,
+                    lifetime.creation_time,
+                    lifetime.is_temporal,
+                    lifetime.temporal_duration,
+                )
+                for lifetime in binding.lifetimes
+            ],
+            binding.prev_values.copy(
+                lambda value: copy_value(value, memo)  # type: ignore[return-value]
+            ),
+        )
+    else:
+        return binding
+    memo[id(binding)] = copied
+    return copied
+
+
 def all_function_keywords() -> list[str]:
 
     # this code boutta be crazy
@@ -562,6 +843,17 @@ def all_function_keywords() -> list[str]:
 
 
 FUNCTION_KEYWORDS = all_function_keywords()
+# the methods of every list and string; GulfOfMexicoList.namespace and
+# GulfOfMexicoString.namespace add the length of each
+LIST_METHODS: dict[str, Union[Name, Variable]] = {
+    "push": Name("push", BuiltinFunction(2, db_list_push, True)),
+    "pop": Name("pop", BuiltinFunction(2, db_list_pop, True)),
+}
+STRING_METHODS: dict[str, Union[Name, Variable]] = {
+    "push": Name("push", BuiltinFunction(2, db_str_push, True)),
+    "pop": Name("pop", BuiltinFunction(2, db_str_pop, True)),
+}
+
 KEYWORDS = {
     kw: Name(kw, GulfOfMexicoKeyword(kw))
     for kw in [
@@ -581,51 +873,11 @@ KEYWORDS = {
         "reverse",
         "export",
         "import",
+        "batch",
     ]
     + FUNCTION_KEYWORDS
 }
 
-NUMBER_NAME_KEYWORDS = {
-    name: Name(name, GulfOfMexicoNumber(num))
-    for num, name in enumerate(
-        [
-            "zero",
-            "one",
-            "two",
-            "three",
-            "four",
-            "five",
-            "six",
-            "seven",
-            "eight",
-            "nine",
-            "ten",
-            "eleven",
-            "twelve",
-            "thirteen",
-            "fourteen",
-            "fifteen",
-            "sixteen",
-            "seventeen",
-            "eighteen",
-            "ninteen",
-        ]
-    )
-} | {
-    name: Name(name, __number_function_maker(num))
-    for num, name in zip(
-        range(20, 100, 10),
-        ["twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety"],
-    )
-}
-
-KEYWORDS |= (
-    BUILTIN_FUNCTION_KEYWORDS
-    | BUILTIN_VALUE_KEYWORDS
-    | MATH_FUNCTION_KEYWORDS
-    | NUMBER_NAME_KEYWORDS
-)
-
 
 def db_identity(val: GulfOfMexicoValue) -> GulfOfMexicoValue:
     return val
@@ -656,11 +908,10 @@ def db_to_boolean(val: GulfOfMexicoValue) -> GulfOfMexicoBoolean:
             return_bool = False
         case GulfOfMexicoFunction() | GulfOfMexicoObject() | GulfOfMexicoKeyword():
             return_bool = None  # maybe for these cause im mischevious
-    return GulfOfMexicoBoolean(return_bool)
+    return db_boolean(return_bool)
 
 
 def db_to_string(val: GulfOfMexicoValue) -> GulfOfMexicoString:
-    return_string = str(val)
     match val:
         case GulfOfMexicoString():
             return_string = val.value
@@ -684,6 +935,8 @@ def db_to_string(val: GulfOfMexicoValue) -> GulfOfMexicoString:
             return_string = val.value
         case GulfOfMexicoMap():
             return_string = f'{{{", ".join([f"{k}: {db_to_string(v).value}" for k, v in val.self_dict.items()])}}}'
+        case _:
+            return_string = str(val)
     return GulfOfMexicoString(return_string)
 
 
@@ -722,7 +975,7 @@ def db_to_number(val: GulfOfMexicoValue) -> GulfOfMexicoNumber:
             raise NonFormattedError(
                 f"Cannot turn type {type(val).__name__} into a number."
             )
-    return GulfOfMexicoNumber(return_number)
+    return db_number(return_number)
 
 
 def db_signal(starting_value: GulfOfMexicoValue) -> GulfOfMexicoValue:
@@ -732,7 +985,7 @@ def db_signal(starting_value: GulfOfMexicoValue) -> GulfOfMexicoValue:
         nonlocal obj
         if isinstance(setter_val, GulfOfMexicoSpecialBlankValue):
             return obj.value
-        obj.value = setter_val
+        obj.value = unshared(setter_val)
 
     return BuiltinFunction(1, signal_func)
 
@@ -824,7 +1077,7 @@ def __math_function_decorator(func: Callable):
                 raise NonFormattedError(
                     "Cannot pass in a non-number value into a math function."
                 )
-        return GulfOfMexicoNumber(func(*[arg.value for arg in args]))
+        return db_number(func(*[arg.value for arg in args]))
 
     return inner
 
@@ -837,7 +1090,7 @@ def __number_function_maker(num: int) -> BuiltinFunction:
                 f"Expected a number in the ones digit. Instead received a "
                 f"{type(n).__name__}"
             )
-        return GulfOfMexicoNumber(num + n.value)
+        return db_number(num + n.value)
 
     return BuiltinFunction(1, the_func)
 
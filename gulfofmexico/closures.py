@@ -0,0 +1,743 @@
+"""
+Closure Compiler for Gulf of Mexico
+
+An alternative engine for the production interpreter, selected with
+--engine=closures (or interpreter.set_engine("closures")).
+
+The tree-walking engine in interpreter.py re-dispatches on the type of every
+statement and expression node each time it runs, through large match
+statements, and probes each statement with hasattr to find its line. This
+engine compiles every statement candidate and expression node once into a
+tree of small Python closures that already know what kind of node they are,
+which children to evaluate and which line to report errors at. Running the
+code then only calls closures.
+
+Semantics:
+    The closures call the same helpers as interpreter.py (declare_new_variable,
+    assign_variable, execute_conditional, call_function, ...), so both engines
+    behave identically. Everything that decides things at runtime still does
+    so at runtime: the statement candidate is picked with
+    determine_statement_type on each run, a call to a keyword (await, next,
+    previous) is handed to the tree-walking evaluator, and every evaluated
+    value is checked against deleted values. Expressions whose tree failed to
+    build at parse time are also handed over, so their errors are raised at
+    the same moment.
+
+Caching:
+    Compiled statements are cached by the identity of their candidate tuple,
+    which the syntax tree, function bodies and async statements all share,
+    so each statement is compiled once, the first time it runs. The cache
+    only holds the trees of the running program (see tree_caches in
+    interpreter.py).
+
+Usage:
+    - compile_expression(expr): closure(namespaces, async, watchers) -> value
+    - compile_statement(statement_tuple): the compiled candidates of a statement
+    - interpret_code_statements_compiled(...): drop-in for
+      interpret_code_statements, installed by interpreter.set_engine
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Optional, Union
+
+import gulfofmexico.interpreter as interpreter
+from gulfofmexico.base import (
+    OperatorType,
+    Token,
+    raise_error_at_line,
+    raise_error_at_token,
+)
+from gulfofmexico.builtin import (
+    BuiltinFunction,
+    GulfOfMexicoFunction,
+    GulfOfMexicoIndexable,
+    GulfOfMexicoKeyword,
+    GulfOfMexicoList,
+    GulfOfMexicoNumber,
+    GulfOfMexicoSpecialBlankValue,
+    GulfOfMexicoString,
+    GulfOfMexicoValue,
+    db_number,
+    db_to_boolean,
+)
+from gulfofmexico.interpreter import (
+    AsyncStatements,
+    Namespaces,
+    TailCall,
+    WhenStatementWatchers,
+    assign_variable,
+    call_function,
+    declare_class,
+    declare_function,
+    declare_new_variable,
+    determine_statement_type,
+    evaluate_expression_for_real,
+    execute_after_statement,
+    execute_batch_statement,
+    execute_conditional,
+    execute_delete_statement,
+    execute_export_statement,
+    execute_import_statement,
+    execute_reverse_statement,
+    get_statement_line,
+    get_value_from_namespaces,
+    perform_single_value_operation,
+    perform_two_value_operation,
+    print_expression_debug,
+    register_when_statement,
+    render_string_template,
+    run_async_statements,
+)
+from gulfofmexico.lifetimes import lifetime_expiry
+from gulfofmexico.processor.expression_tree import (
+    ExpressionNode,
+    ExpressionTreeNode,
+    FunctionNode,
+    IndexNode,
+    ListNode,
+    SingleOperatorNode,
+    ValueNode,
+)
+from gulfofmexico.processor.syntax_tree import (
+    AfterStatement,
+    BatchStatement,
+    ClassDeclaration,
+    CodeStatement,
+    Conditional,
+    DeleteStatement,
+    ExportStatement,
+    ExpressionStatement,
+    FunctionDefinition,
+    ImportStatement,
+    ReturnStatement,
+    ReverseStatement,
+    VariableAssignment,
+    VariableDeclaration,
+    WhenStatement,
+)
+
+__all__ = [
+    "compile_expression",
+    "compile_statement",
+    "interpret_code_statements_compiled",
+]
+
+ImportableNames = dict[str, dict[str, GulfOfMexicoValue]]
+ExportedNames = list[tuple[str, str, GulfOfMexicoValue]]
+CompiledExpression = Callable[
+    [Namespaces, AsyncStatements, WhenStatementWatchers], GulfOfMexicoValue
+]
+CompiledTailCall = Callable[
+    [Namespaces, AsyncStatements, WhenStatementWatchers], Optional[TailCall]
+]
+CompiledStatement = Callable[
+    [
+        Namespaces,
+        AsyncStatements,
+        WhenStatementWatchers,
+        ImportableNames,
+        ExportedNames,
+    ],
+    Optional[GulfOfMexicoValue],
+]
+
+# what a block does with the value returned by a compiled statement
+KEEP_RESULT, SET_RESULT, RETURN_RESULT = range(3)
+
+# (compiled statement, line or None, one of the *_RESULT values above, the
+# statement compiled to run in tail position or None if that changes nothing)
+CompiledCandidate = tuple[
+    CompiledStatement, Optional[int], int, Optional[CompiledStatement]
+]
+
+# id of a statement tuple -> (the tuple, compiled candidates by id), one of
+# interpreter.tree_caches, so it is emptied before each program
+compiled_statements: dict[
+    int, tuple[tuple[CodeStatement, ...], dict[int, CompiledCandidate]]
+] = {}
+interpreter.tree_caches.append(compiled_statements)
+
+
+def compile_expression(
+    expr: Union[list[Token], ExpressionTreeNode],
+) -> CompiledExpression:
+    """Compile an expression into a closure that behaves like evaluate_expression."""
+    evaluate = compile_node(expr)
+
+    def evaluate_checked(namespaces, async_statements, when_statement_watchers):
+        retval = evaluate(namespaces, async_statements, when_statement_watchers)
+        deleted_values = interpreter.deleted_values
+        if deleted_values.bits and retval in deleted_values:
+            raise_error_at_line(
+                interpreter.filename,
+                interpreter.code,
+                interpreter.current_line,
+                f"The value {retval.value} has been deleted.",
+            )
+        return retval
+
+    return evaluate_checked
+
+
+def compile_node(
+    expr: Union[list[Token], ExpressionTreeNode],
+) -> CompiledExpression:
+    """Compile one node, without the deleted value check of compile_expression."""
+    match expr:
+        case FunctionNode():
+            return compile_function_node(expr)
+        case ListNode():
+            return compile_list_node(expr)
+        case ValueNode():
+            return compile_value_node(expr)
+        case IndexNode():
+            return compile_index_node(expr)
+        case ExpressionNode():
+            return compile_expression_node(expr)
+        case SingleOperatorNode():
+            return compile_single_operator_node(expr)
+
+    # token lists whose tree failed to build at parse time raise when evaluated
+    def evaluate(namespaces, async_statements, when_statement_watchers):
+        return evaluate_expression_for_real(
+            expr, namespaces, async_statements, when_statement_watchers, False
+        )
+
+    return evaluate
+
+
+def compile_function_node(expr: FunctionNode) -> CompiledExpression:
+    name_token = expr.name
+    name = name_token.value
+
+    caller = expr.caller
+    call_expr = expr.method_call or expr
+    args = tuple(compile_expression(arg) for arg in call_expr.args)
+
+    def evaluate(namespaces, async_statements, when_statement_watchers):
+        func = namespaces.lookup(name)
+        if func is None:
+            raise_error_at_token(
+                interpreter.filename,
+                interpreter.code,
+                "Cannot find token in namespace.",
+                name_token,
+            )
+        value = func.value
+        if isinstance(value, GulfOfMexicoKeyword):
+            # await, previous and next look at their arguments unevaluated
+            return evaluate_expression_for_real(
+                expr, namespaces, async_statements, when_statement_watchers, False
+            )
+        if not isinstance(value, (BuiltinFunction, GulfOfMexicoFunction)):
+            raise_error_at_token(
+                interpreter.filename,
+                interpreter.code,
+                "Attempted function call on non-function value.",
+                name_token,
+            )
+        return call_function(
+            call_expr,
+            value,
+            caller,
+            [
+                arg(namespaces, async_statements, when_statement_watchers)
+                for arg in args
+            ],
+            False,
+            namespaces,
+            async_statements,
+            when_statement_watchers,
+        )
+
+    return evaluate
+
+
+def compile_tail_call(
+    expr: Union[list[Token], ExpressionTreeNode],
+) -> Optional[CompiledTailCall]:
+    """Compile a call for tail position, like make_tail_call. The closure returns
+    None when the name is not a synchronous GOM function when it runs."""
+    if not isinstance(expr, FunctionNode) or not expr.args:
+        return None
+    name = expr.name.value
+    if "." in name:
+        return None
+    args = tuple(compile_expression(arg) for arg in expr.args)
+
+    def tail_call(namespaces, async_statements, when_statement_watchers):
+        func = namespaces.lookup(name)
+        if func is None or type(func.value) is not GulfOfMexicoFunction:
+            return None
+        if func.value.is_async:
+            return None
+        values = [
+            arg(namespaces, async_statements, when_statement_watchers)
+            for arg in args
+        ]
+        if isinstance(values[0], GulfOfMexicoSpecialBlankValue):
+            values = values[1:]
+        return TailCall(expr, func.value, values, namespaces, when_statement_watchers)
+
+    return tail_call
+
+
+def compile_list_node(expr: ListNode) -> CompiledExpression:
+    values = tuple(compile_expression(value) for value in expr.values)
+
+    def evaluate(namespaces, async_statements, when_statement_watchers):
+        return GulfOfMexicoList(
+            [
+                value(namespaces, async_statements, when_statement_watchers)
+                for value in values
+            ]
+        )
+
+    return evaluate
+
+
+def compile_value_node(expr: ValueNode) -> CompiledExpression:
+    token = expr.name_or_value
+
+    if (template := expr.template) is not None:
+        if not template.expressions and not template.unclosed:
+            text = template.escaped[0]
+
+            def evaluate_constant(
+                namespaces, async_statements, when_statement_watchers
+            ):
+                return GulfOfMexicoString(text)  # strings are mutable, so a new one
+
+            return evaluate_constant
+
+        def evaluate(namespaces, async_statements, when_statement_watchers):
+            return render_string_template(
+                template, token, namespaces, async_statements, when_statement_watchers
+            )
+
+        return evaluate
+
+    if (number := expr.number) is not None:
+        name = token.value
+
+        def evaluate_number(namespaces, async_statements, when_statement_watchers):
+            if namespaces.is_bound(name):
+                return get_value_from_namespaces(token, namespaces)
+            return db_number(number)
+
+        return evaluate_number
+
+    def evaluate_name(namespaces, async_statements, when_statement_watchers):
+        return get_value_from_namespaces(token, namespaces)
+
+    return evaluate_name
+
+
+def compile_index_node(expr: IndexNode) -> CompiledExpression:
+    value_expr = compile_expression(expr.value)
+    index_expr = compile_expression(expr.index)
+
+    def evaluate(namespaces, async_statements, when_statement_watchers):
+        value = value_expr(namespaces, async_statements, when_statement_watchers)
+        index = index_expr(namespaces, async_statements, when_statement_watchers)
+        if not isinstance(value, GulfOfMexicoIndexable):
+            raise_error_at_line(
+                interpreter.filename,
+                interpreter.code,
+                interpreter.current_line,
+                "Attempting to index a value that is not indexable.",
+            )
+        return value.access_index(index)
+
+    return evaluate
+
+
+def compile_expression_node(expr: ExpressionNode) -> CompiledExpression:
+    left_expr = compile_expression(expr.left)
+    right_expr = compile_expression(expr.right)
+    operator = expr.operator
+    operator_token = expr.operator_token
+
+    # short circuit for True or __ and False and __
+    short_circuit_on: Optional[bool] = None
+    if operator == OperatorType.OR:
+        short_circuit_on = True
+    elif operator == OperatorType.AND:
+        short_circuit_on = False
+
+    if short_circuit_on is None:
+
+        def evaluate(namespaces, async_statements, when_statement_watchers):
+            left = left_expr(namespaces, async_statements, when_statement_watchers)
+            right = right_expr(namespaces, async_statements, when_statement_watchers)
+            return perform_two_value_operation(left, right, operator, operator_token)
+
+        return evaluate
+
+    def evaluate_short_circuit(namespaces, async_statements, when_statement_watchers):
+        left = left_expr(namespaces, async_statements, when_statement_watchers)
+        if db_to_boolean(left).value == short_circuit_on:
+            return left
+        right = right_expr(namespaces, async_statements, when_statement_watchers)
+        return perform_two_value_operation(left, right, operator, operator_token)
+
+    return evaluate_short_circuit
+
+
+def compile_single_operator_node(expr: SingleOperatorNode) -> CompiledExpression:
+    value_expr = compile_expression(expr.expression)
+    operator = expr.operator
+
+    def evaluate(namespaces, async_statements, when_statement_watchers):
+        val = value_expr(namespaces, async_statements, when_statement_watchers)
+        return perform_single_value_operation(val, operator)
+
+    return evaluate
+
+
+def compile_candidate(statement: CodeStatement) -> CompiledCandidate:
+    """Compile one statement candidate into a closure with the semantics of
+    running it in interpret_code_statements."""
+    line = get_statement_line(statement)
+
+    match statement:
+        case ExpressionStatement() | ReturnStatement():
+            expression = compile_expression(statement.expression)
+            debug = statement.debug
+            tree = statement.expression
+
+            def execute_expression(
+                namespaces,
+                async_statements,
+                when_statement_watchers,
+                importable_names,
+                exported_names,
+            ):
+                result = expression(
+                    namespaces, async_statements, when_statement_watchers
+                )
+                print_expression_debug(debug, tree, result, namespaces)
+                return result
+
+            execute_tail_call = None
+            if not debug and (tail_call := compile_tail_call(tree)) is not None:
+
+                def execute_tail_call(
+                    namespaces,
+                    async_statements,
+                    when_statement_watchers,
+                    importable_names,
+                    exported_names,
+                ):
+                    return tail_call(
+                        namespaces, async_statements, when_statement_watchers
+                    ) or execute_expression(
+                        namespaces,
+                        async_statements,
+                        when_statement_watchers,
+                        importable_names,
+                        exported_names,
+                    )
+
+            if isinstance(statement, ReturnStatement):
+                return execute_expression, line, RETURN_RESULT, execute_tail_call
+            return execute_expression, line, SET_RESULT, execute_tail_call
+
+        case VariableDeclaration():
+            expression = compile_expression(statement.expression)
+
+            def execute_declaration(
+                namespaces,
+                async_statements,
+                when_statement_watchers,
+                importable_names,
+                exported_names,
+            ):
+                value = expression(
+                    namespaces, async_statements, when_statement_watchers
+                )
+                declare_new_variable(
+                    statement,
+                    value,
+                    namespaces,
+                    async_statements,
+                    when_statement_watchers,
+                )
+
+            return execute_declaration, line, KEEP_RESULT, None
+
+        case VariableAssignment():
+            indexes = tuple(compile_expression(expr) for expr in statement.indexes)
+            expression = compile_expression(statement.expression)
+
+            def execute_assignment(
+                namespaces,
+                async_statements,
+                when_statement_watchers,
+                importable_names,
+                exported_names,
+            ):
+                index_values = [
+                    index(namespaces, async_statements, when_statement_watchers)
+                    for index in indexes
+                ]
+                new_value = expression(
+                    namespaces, async_statements, when_statement_watchers
+                )
+                assign_variable(
+                    statement,
+                    index_values,
+                    new_value,
+                    namespaces,
+                    async_statements,
+                    when_statement_watchers,
+                )
+
+            return execute_assignment, line, KEEP_RESULT, None
+
+        case Conditional():
+            expression = compile_expression(statement.expression)
+
+            def execute_if(
+                namespaces,
+                async_statements,
+                when_statement_watchers,
+                importable_names,
+                exported_names,
+            ):
+                condition = expression(
+                    namespaces, async_statements, when_statement_watchers
+                )
+                return execute_conditional(
+                    condition,
+                    statement.code,
+                    namespaces,
+                    when_statement_watchers,
+                    importable_names,
+                    exported_names,
+                )
+
+            def execute_if_in_tail_position(
+                namespaces,
+                async_statements,
+                when_statement_watchers,
+                importable_names,
+                exported_names,
+            ):
+                condition = expression(
+                    namespaces, async_statements, when_statement_watchers
+                )
+                return execute_conditional(
+                    condition,
+                    statement.code,
+                    namespaces,
+                    when_statement_watchers,
+                    importable_names,
+                    exported_names,
+                    in_tail_position=True,
+                )
+
+            return execute_if, line, SET_RESULT, execute_if_in_tail_position
+
+        case BatchStatement():
+
+            def execute_batch(
+                namespaces,
+                async_statements,
+                when_statement_watchers,
+                importable_names,
+                exported_names,
+            ):
+                return execute_batch_statement(
+                    statement.code,
+                    namespaces,
+                    async_statements,
+                    when_statement_watchers,
+                    importable_names,
+                    exported_names,
+                )
+
+            return execute_batch, line, SET_RESULT, None
+
+        case WhenStatement():
+
+            def execute_when(
+                namespaces,
+                async_statements,
+                when_statement_watchers,
+                importable_names,
+                exported_names,
+            ):
+                register_when_statement(
+                    statement.expression,
+                    statement.code,
+                    namespaces,
+                    async_statements,
+                    when_statement_watchers,
+                    importable_names,
+                    exported_names,
+                )
+
+            return execute_when, line, KEEP_RESULT, None
+
+        case AfterStatement():
+            expression = compile_expression(statement.expression)
+
+            def execute_after(
+                namespaces,
+                async_statements,
+                when_statement_watchers,
+                importable_names,
+                exported_names,
+            ):
+                event = expression(
+                    namespaces, async_statements, when_statement_watchers
+                )
+                execute_after_statement(
+                    event,
+                    statement.code,
+                    namespaces,
+                    when_statement_watchers,
+                    importable_names,
+                    exported_names,
+                )
+
+            return execute_after, line, KEEP_RESULT, None
+
+        case FunctionDefinition():
+
+            def execute_function_definition(namespaces, *_):
+                declare_function(statement, namespaces)
+
+            return execute_function_definition, line, KEEP_RESULT, None
+
+        case ClassDeclaration():
+
+            def execute_class_declaration(
+                namespaces,
+                async_statements,
+                when_statement_watchers,
+                importable_names,
+                exported_names,
+            ):
+                declare_class(
+                    statement,
+                    namespaces,
+                    async_statements,
+                    when_statement_watchers,
+                    importable_names,
+                    exported_names,
+                )
+
+            return execute_class_declaration, line, KEEP_RESULT, None
+
+        case DeleteStatement():
+
+            def execute_delete(namespaces, *_):
+                execute_delete_statement(statement, namespaces)
+
+            return execute_delete, line, KEEP_RESULT, None
+
+        case ReverseStatement():
+
+            def execute_reverse(namespaces, *_):
+                execute_reverse_statement(statement, namespaces)
+
+            return execute_reverse, line, KEEP_RESULT, None
+
+        case ImportStatement():
+
+            def execute_import(
+                namespaces,
+                async_statements,
+                when_statement_watchers,
+                importable_names,
+                exported_names,
+            ):
+                execute_import_statement(statement, namespaces, importable_names)
+
+            return execute_import, line, KEEP_RESULT, None
+
+        case ExportStatement():
+
+            def execute_export(
+                namespaces,
+                async_statements,
+                when_statement_watchers,
+                importable_names,
+                exported_names,
+            ):
+                execute_export_statement(statement, namespaces, exported_names)
+
+            return execute_export, line, KEEP_RESULT, None
+
+    def execute_nothing(*_):
+        return None
+
+    return execute_nothing, line, KEEP_RESULT, None
+
+
+def compile_statement(
+    statement_tuple: tuple[CodeStatement, ...],
+) -> dict[int, CompiledCandidate]:
+    """The compiled candidates of a statement, keyed by the id of the candidate."""
+    cached = compiled_statements.get(id(statement_tuple))
+    if cached is not None and cached[0] is statement_tuple:
+        return cached[1]
+    candidates = {id(st): compile_candidate(st) for st in statement_tuple}
+    compiled_statements[id(statement_tuple)] = (statement_tuple, candidates)
+    return candidates
+
+
+def interpret_code_statements_compiled(
+    statements: list[tuple[CodeStatement, ...]],
+    namespaces: Namespaces,
+    async_statements: AsyncStatements,
+    when_statement_watchers: WhenStatementWatchers,
+    importable_names: ImportableNames,
+    exported_names: ExportedNames,
+    *,
+    in_tail_position: bool = False,
+) -> Optional[GulfOfMexicoValue]:
+    """Interpret a list of code statements with compiled closures."""
+    result = None
+    last_statement = statements[-1] if in_tail_position and statements else None
+
+    for statement_tuple in statements:
+        statement = determine_statement_type(statement_tuple, namespaces)
+        if statement is None:
+            continue
+        lifetime_expiry.tick()
+
+        execute, line, result_kind, execute_in_tail_position = compile_statement(
+            statement_tuple
+        )[id(statement)]
+        if line is not None:
+            interpreter.current_line = line
+        # see interpret_code_statements for when a statement is in tail position
+        if execute_in_tail_position is not None and (
+            (in_tail_position and result_kind == RETURN_RESULT)
+            or (statement_tuple is last_statement and not async_statements)
+        ):
+            execute = execute_in_tail_position
+
+        value = execute(
+            namespaces,
+            async_statements,
+            when_statement_watchers,
+            importable_names,
+            exported_names,
+        )
+        if result_kind == RETURN_RESULT:
+            return value
+        if result_kind == SET_RESULT:
+            result = value
+
+    return run_async_statements(
+        async_statements,
+        when_statement_watchers,
+        importable_names,
+        exported_names,
+        result,
+    )
@@ -11,11 +11,13 @@ module-level global variables instead.
 from dataclasses import dataclass, field
 from typing import Optional
 from gulfofmexico.builtin import GulfOfMexicoValue
+from gulfofmexico.deletion import DeletedValues
+from gulfofmexico.scheduler import AsyncTask
 
 
 # Type aliases for complex types
 Namespace = dict[str, "Variable | Name"]  # noqa: F821
-AsyncStatements = list[tuple[list, list[Namespace], int, int]]
+AsyncStatements = list[AsyncTask]
 WhenStatementWatchers = list[dict]
 
 
@@ -37,7 +39,7 @@ class ExecutionContext:
         importable_names: Names exported from other files
         exported_names: Names exported from current file
         current_line: Current line number for error reporting
-        deleted_values: Set of deleted value objects
+        deleted_values: Tombstones of the deleted values
     """
 
     filename: str
@@ -50,7 +52,7 @@ class ExecutionContext:
 
     # Execution state
     current_line: int = 0
-    deleted_values: set[GulfOfMexicoValue] = field(default_factory=set)
+    deleted_values: DeletedValues = field(default_factory=DeletedValues)
 
     # Performance caching (future enhancement)
     expression_cache: dict[int, GulfOfMexicoValue] = field(default_factory=dict)
@@ -0,0 +1,78 @@
+"""
+Deleted Values of Gulf of Mexico Programs
+
+`delete 3!` deletes the value 3: from then on, every expression that
+evaluates to 3 is an error. Every engine checks each number and string it
+evaluates against the values deleted so far, so the check has to cost next
+to nothing, and nothing at all in the usual program that never deletes.
+
+The values used to be kept in a set of the value objects themselves, which
+hashed every result with the dataclass __hash__, kept each deleted object
+alive, and failed on unhashable values such as lists.
+
+DeletedValues keeps tombstones instead: the raw Python value (the int,
+float or str) of each deleted number or string, in an exact set. In front
+of the set is a 64-bit Bloom filter (bits), two bits per tombstone. A check
+first tests bits, which is 0 while nothing is deleted, and only looks in
+the set if both bits of the value are set:
+
+    if deleted_values.bits and value in deleted_values: ...
+
+Values of other types can be deleted, but no expression is checked against
+them, so they are not kept.
+
+Usage:
+    - interpreter.deleted_values: the values deleted by the running program,
+      cleared by interpreter.start_program, with its Bloom filter bits
+    - ExecutionContext.deleted_values: the same for an engine/ context
+"""
+
+from __future__ import annotations
+
+from typing import Union
+
+from gulfofmexico.builtin import (
+    GulfOfMexicoNumber,
+    GulfOfMexicoString,
+    GulfOfMexicoValue,
+)
+
+__all__ = ["DeletedValues"]
+
+CHECKED_TYPES = (GulfOfMexicoNumber, GulfOfMexicoString)
+
+
+def bloom_mask(raw: Union[int, float, str]) -> int:
+    """The two filter bits of a tombstone, from its hash."""
+    h = hash(raw)
+    return 1 << (h & 63) | 1 << ((h >> 6) & 63)
+
+
+class DeletedValues:
+    """The numbers and strings deleted so far, see the module docstring."""
+
+    __slots__ = ("bits", "tombstones")
+
+    def __init__(self) -> None:
+        self.bits = 0
+        self.tombstones: set[Union[int, float, str]] = set()
+
+    def add(self, value: GulfOfMexicoValue) -> None:
+        if isinstance(value, CHECKED_TYPES):
+            raw = value.value
+            self.tombstones.add(raw)
+            self.bits |= bloom_mask(raw)
+
+    def clear(self) -> None:
+        self.bits = 0
+        self.tombstones.clear()
+
+    def __contains__(self, value: object) -> bool:
+        if not isinstance(value, CHECKED_TYPES):
+            return False
+        raw = value.value
+        mask = bloom_mask(raw)
+        return self.bits & mask == mask and raw in self.tombstones
+
+    def __len__(self) -> int:
+        return len(self.tombstones)
@@ -0,0 +1,157 @@
+"""
+Differential Testing of the Gulf of Mexico Engines
+
+Runs the same programs with every execution engine (the tree-walking
+interpreter, the closure compiler and the VM) and compares what they print.
+Each run happens in a fresh Python process, since the interpreter keeps its
+state in module globals, with the same random seed and hash seed, so maybe and
+probabilistic programs and set iteration print the same under every engine.
+
+A program passes only if it runs to completion under every engine and prints
+the same under all of them. A program that fails, even the same way under
+every engine, is reported as an error, since it shows nothing about how the
+engines compare. The default programs (programs/engines/*.gom) all run to
+completion.
+
+Usage:
+    $ python -m gulfofmexico --compare-engines            # programs/engines/*.gom
+    $ python -m gulfofmexico --compare-engines script.gom
+
+    from gulfofmexico.differential import compare_engines
+    problems = compare_engines(paths)
+"""
+
+from __future__ import annotations
+
+import difflib
+import os
+import random
+import subprocess
+import sys
+from pathlib import Path
+from typing import Iterable, NamedTuple, Optional
+
+from gulfofmexico.base import InterpretationError
+from gulfofmexico.interpreter import ENGINES
+
+__all__ = ["DEFAULT_PROGRAMS", "Run", "compare_engines", "main", "run_program"]
+
+DEFAULT_PROGRAMS = Path(__file__).resolve().parent.parent / "programs" / "engines"
+RUN_TIMEOUT = 60  # seconds
+
+
+class Run(NamedTuple):
+    """What a program did under one engine."""
+
+    output: str
+    failed: bool  # raised an error or timed out
+
+
+def run_program(path: str, engine: str, seed: int = 0) -> Run:
+    """Run a program with an engine in a new process.
+
+    The message of an error is part of the output, and the run has failed.
+    """
+    try:
+        completed = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "gulfofmexico.differential",
+                engine,
+                path,
+                str(seed),
+            ],
+            env={**os.environ, "PYTHONHASHSEED": str(seed)},
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            timeout=RUN_TIMEOUT,
+            text=True,
+        )
+    except subprocess.TimeoutExpired as e:
+        output = e.stdout or ""
+        if isinstance(output, bytes):
+            output = output.decode(errors="replace")
+        return Run(output + f"\n[timed out after {RUN_TIMEOUT} seconds]\n", True)
+    return Run(completed.stdout, completed.returncode != 0)
+
+
+def compare_engines(
+    paths: Iterable[str], engines: Iterable[str] = ENGINES, seed: int = 0
+) -> dict[str, dict[str, Run]]:
+    """Run every program with every engine.
+
+    Returns the runs of the programs that failed under an engine or whose
+    output differs between engines, by path and then by engine.
+    """
+    engines = tuple(engines)
+    problems: dict[str, dict[str, Run]] = {}
+    for path in paths:
+        runs = {engine: run_program(path, engine, seed) for engine in engines}
+        if any(run.failed for run in runs.values()) or (
+            len({run.output for run in runs.values()}) > 1
+        ):
+            problems[path] = runs
+    return problems
+
+
+def default_programs() -> list[str]:
+    return sorted(str(path) for path in DEFAULT_PROGRAMS.glob("*.gom"))
+
+
+def main(paths: Optional[list[str]] = None) -> int:
+    """Compare the engines on paths (default: programs/engines/*.gom) and
+    report. Returns 1 if a program failed or the engines differ on one."""
+    paths = paths or default_programs()
+    problems = compare_engines(paths)
+    errors = 0
+    for path in paths:
+        if path not in problems:
+            print(f"same      {path}")
+            continue
+        runs = problems[path]
+        if failed := [engine for engine, run in runs.items() if run.failed]:
+            errors += 1
+            print(f"ERROR     {path} (under {', '.join(failed)})")
+            for engine in failed:
+                print(f"--- {engine}")
+                sys.stdout.write(runs[engine].output)
+        if len({run.output for run in runs.values()}) > 1:
+            print(f"DIFFERENT {path}")
+            (first, first_run), *others = runs.items()
+            for engine, run in others:
+                sys.stdout.writelines(
+                    difflib.unified_diff(
+                        first_run.output.splitlines(keepends=True),
+                        run.output.splitlines(keepends=True),
+                        fromfile=first,
+                        tofile=engine,
+                    )
+                )
+    print(
+        f"{len(paths) - len(problems)}/{len(paths)} programs behave the same, "
+        f"{errors} failed."
+    )
+    return 1 if problems else 0
+
+
+def _run_worker(engine: str, path: str, seed: int) -> None:
+    """Body of the process started by run_program."""
+    from gulfofmexico import run_file
+
+    random.seed(seed)
+    status = 1
+    try:
+        run_file(path, engine=engine, wait_for_listeners=False)
+        status = 0
+    except InterpretationError as e:
+        print(e)
+    except Exception as e:  # tracebacks differ between engines, messages must not
+        print(f"{type(e).__name__}: {e}")
+    sys.stdout.flush()
+    os._exit(status)  # don't wait for after-statement listener threads
+
+
+if __name__ == "__main__":  # pragma: no cover
+    _run_worker(sys.argv[1], sys.argv[2], int(sys.argv[3]))
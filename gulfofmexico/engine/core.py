@@ -70,6 +70,7 @@ class InterpretEngine:
             ConditionalHandler,
             WhenStatementHandler,
             AfterStatementHandler,
+            BatchStatementHandler,
         )
         from gulfofmexico.engine.handlers.functions import (
             FunctionDefinitionHandler,
@@ -92,6 +93,7 @@ class InterpretEngine:
         self.registry.register(ConditionalHandler())
         self.registry.register(WhenStatementHandler())
         self.registry.register(AfterStatementHandler())
+        self.registry.register(BatchStatementHandler())
 
         # Register function/class handlers
         self.registry.register(FunctionDefinitionHandler())
@@ -121,6 +123,7 @@ class InterpretEngine:
         """
         # Import here to avoid circular dependency
         from gulfofmexico.interpreter import determine_statement_type
+        from gulfofmexico.lifetimes import lifetime_expiry
 
         result = None
 
@@ -130,6 +133,7 @@ class InterpretEngine:
 
             if statement is None:
                 continue
+            lifetime_expiry.tick()
 
             # Update current line for error reporting
             if hasattr(statement, "name") and hasattr(statement.name, "line"):
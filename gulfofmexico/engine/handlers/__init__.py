@@ -7,7 +7,7 @@ These handlers exist as a proof-of-concept for an alternative modular
 architecture organized by functionality:
 
 - variables: Variable declarations and assignments
-- control_flow: Conditionals, when, and after statements
+- control_flow: Conditionals, when, after and batch statements
 - functions: Function definitions and class declarations
 - special: Delete, reverse, import, export, return, and expression statements
 """
@@ -21,6 +21,7 @@ from gulfofmexico.engine.handlers.control_flow import (
     ConditionalHandler,
     WhenStatementHandler,
     AfterStatementHandler,
+    BatchStatementHandler,
 )
 from gulfofmexico.engine.handlers.functions import (
     FunctionDefinitionHandler,
@@ -44,6 +45,7 @@ __all__ = [
     "ConditionalHandler",
     "WhenStatementHandler",
     "AfterStatementHandler",
+    "BatchStatementHandler",
     # Function/class handlers
     "FunctionDefinitionHandler",
     "ClassDeclarationHandler",
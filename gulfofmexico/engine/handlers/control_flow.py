@@ -14,6 +14,7 @@ from gulfofmexico.processor.syntax_tree import (
     Conditional,
     WhenStatement,
     AfterStatement,
+    BatchStatement,
 )
 from gulfofmexico.context import ExecutionContext
 from gulfofmexico.builtin import GulfOfMexicoValue
@@ -202,3 +203,54 @@ class AfterStatementHandler(StatementHandler):
             AfterStatement class
         """
         return AfterStatement
+
+
+class BatchStatementHandler(StatementHandler):
+    """Handler for 'batch' blocks."""
+
+    def can_handle(self, statement: CodeStatement) -> bool:
+        """Check if this is a batch statement.
+
+        Args:
+            statement: Statement to check
+
+        Returns:
+            True if this is a BatchStatement
+        """
+        return isinstance(statement, BatchStatement)
+
+    def execute(
+        self,
+        statement: CodeStatement,
+        context: ExecutionContext,
+    ) -> Optional[GulfOfMexicoValue]:
+        """Execute a batch block, then the when statements it set off.
+
+        Args:
+            statement: The batch statement
+            context: Execution context
+
+        Returns:
+            Optional return value from the block's code
+        """
+        from gulfofmexico.interpreter import execute_batch_statement
+
+        assert isinstance(statement, BatchStatement)
+
+        return execute_batch_statement(
+            statement.code,
+            context.namespaces,
+            context.async_statements,
+            context.when_watchers,
+            context.importable_names,
+            context.exported_names,
+        )
+
+    @property
+    def statement_type(self) -> Type[CodeStatement]:
+        """Return the statement type this handler processes.
+
+        Returns:
+            BatchStatement class
+        """
+        return BatchStatement
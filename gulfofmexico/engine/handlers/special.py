@@ -92,8 +92,8 @@ class ReverseStatementHandler(StatementHandler):
 
         if isinstance(value, GulfOfMexicoList):
             # Reverse list in-place
+            value.own_storage()
             value.values.reverse()
-            value.create_namespace()
         elif isinstance(value, GulfOfMexicoString):
             # Reverse string - create new reversed string
             reversed_str = value.value[::-1]
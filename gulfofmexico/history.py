@@ -0,0 +1,118 @@
+"""
+Previous Values of Gulf of Mexico Variables
+
+Every time a variable gets a new value, the old one is added to its
+previous values. `previous x` reads the last one, and `next x` counts how
+many there are to tell whether x has changed, then reads the one at the
+count it started with.
+
+Keeping every value meant a counter updated a million times kept a million
+old values alive. A ValueHistory keeps only the last few of them (its depth)
+in a deque, but still counts every value it was given, so len() and
+indexing from the start work as they did with a list:
+
+    history[-1]  the last value, what previous reads
+    len(history) how many values there have ever been
+    history[i]   the value at that count, if it is still kept
+
+Depth:
+    previous only looks back one value, which is the default depth. A next
+    that is waiting pins the count it started with (pin() / unpin()), and
+    nothing from there on is let go of until it unpins, however deep the
+    history is. A depth of 0 keeps every value.
+
+    - ValueHistory.default_depth: the depth of every variable, set by
+      `--history-depth` on the command line
+    - history.depth: the depth of one variable, or None for the default
+
+Usage:
+    - Variable.prev_values is a ValueHistory
+    - history.copy(copy_value): the history of a copied variable
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import TYPE_CHECKING, Callable, ClassVar, Iterable, Iterator, Optional
+
+if TYPE_CHECKING:
+    from gulfofmexico.builtin import GulfOfMexicoValue
+
+__all__ = ["ValueHistory"]
+
+
+class ValueHistory:
+    """The last values of a variable, see the module docstring."""
+
+    __slots__ = ("values", "start", "depth", "pins")
+
+    # how many values a variable keeps, unless it sets its own; 0 keeps all
+    default_depth: ClassVar[int] = 1
+
+    def __init__(
+        self, values: Iterable[GulfOfMexicoValue] = (), depth: Optional[int] = None
+    ) -> None:
+        self.values: deque[GulfOfMexicoValue] = deque(values)
+        self.start = 0  # how many values have been let go of
+        self.depth = depth
+        self.pins: dict[int, int] = {}  # pinned count -> how many times
+        self.trim()
+
+    def append(self, value: GulfOfMexicoValue) -> None:
+        self.values.append(value)
+        self.trim()
+
+    def trim(self) -> None:
+        """Let go of the values older than the depth and every pin."""
+        depth = self.default_depth if self.depth is None else self.depth
+        if not depth:
+            return
+        extra = len(self.values) - depth
+        if self.pins:
+            extra = min(extra, min(self.pins) - self.start)
+        for _ in range(extra):
+            self.values.popleft()
+        self.start += max(extra, 0)
+
+    def pin(self, index: int) -> None:
+        """Keep the value at index, and the ones after it, until unpinned."""
+        self.pins[index] = self.pins.get(index, 0) + 1
+
+    def unpin(self, index: int) -> None:
+        if self.pins[index] == 1:
+            del self.pins[index]
+            self.trim()
+        else:
+            self.pins[index] -= 1
+
+    def copy(
+        self, copy_value: Callable[[GulfOfMexicoValue], GulfOfMexicoValue]
+    ) -> ValueHistory:
+        """A history of copy_value of each kept value, at the same counts,
+        with the same depth and pins."""
+        copied = ValueHistory(depth=self.depth)
+        copied.values.extend(map(copy_value, self.values))
+        copied.start = self.start
+        copied.pins = self.pins.copy()
+        return copied
+
+    def oldest_since(self, index: int) -> GulfOfMexicoValue:
+        """The value at index, or the oldest one kept if it has been let go
+        of."""
+        return self.values[max(index - self.start, 0)]
+
+    def __getitem__(self, index: int) -> GulfOfMexicoValue:
+        if index < 0:
+            return self.values[index]
+        if index < self.start:
+            raise IndexError("previous value is no longer kept")
+        return self.values[index - self.start]
+
+    def __len__(self) -> int:
+        return self.start + len(self.values)
+
+    def __iter__(self) -> Iterator[GulfOfMexicoValue]:
+        return iter(self.values)
+
+    def __repr__(self) -> str:
+        return f"ValueHistory({list(self.values)!r}, start={self.start})"
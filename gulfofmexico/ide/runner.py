@@ -25,6 +25,7 @@ class ExecutionSession:
     importable_names: dict[str, dict[str, GulfOfMexicoValue]] = field(
         default_factory=dict
     )
+    engine: str = "interpreter"
 
     def init_globals(self, filename: str, code: str) -> None:
         exported_names: list[tuple[str, str, GulfOfMexicoValue]] = []
@@ -55,12 +56,16 @@ def run_code(
 ) -> tuple[str, Optional[str]]:
     """Run code via production interpreter and capture stdout.
 
+    The session's engine (one of interpreter.ENGINES) runs the code.
+
     Returns (stdout, error) where error is formatted message or None.
     """
     out = OutputCapture()
     old_stdout = sys.stdout
     try:
         sys.stdout = out
+        interpreter.set_engine(session.engine)
+        interpreter.clear_tree_caches()  # the trees of earlier runs
         interpreter.filename = filename
         interpreter.code = code
         tokens = tokenize(filename, code)
@@ -171,6 +171,7 @@ class GOMWebIDEHandler(http.server.SimpleHTTPRequestHandler):
                 # Set up interpreter
                 import gulfofmexico.interpreter as interpreter
 
+                interpreter.start_program()
                 interpreter.filename = "web_ide"
                 interpreter.code = code
 
@@ -0,0 +1,357 @@
+"""
+Index Maps for Gulf of Mexico Lists and Strings
+
+Lists start at -1 and can be assigned between their indexes: list[0.5] = x
+inserts x between list[0] and list[1]. GulfOfMexicoList.indexer converts the
+index a user writes to the position of the value in the list, and every
+insert moves the positions of all the indexes after it up by one.
+
+With a dict that meant a loop over every index on each insert, so building a
+list by inserting into it was quadratic. An IndexMap is a treap (a binary
+search tree balanced by random priorities) ordered by user index, whose nodes
+carry pending additions for their subtrees. Moving every index after some key
+splits the tree at that key and marks the right part, so lookups, inserts
+and shifts all take O(log n), and iteration is in index order.
+
+Implicit Identity:
+    A new list or string of length n maps -1 .. n-2 to themselves. Most
+    never get a fractional index, so IndexMap.identity(start, stop) only
+    stores the range, in O(1), and the tree is built the first time an
+    index moves. Pushing onto the end keeps the range.
+
+Usage:
+    - IndexMap.identity(start, stop): range(start, stop), each to itself
+    - index_map[user_index] / index_map.get(user_index): the position
+    - index_map[user_index] = position: insert or replace one index
+    - index_map.shift_after(user_index, by): move every later index by `by`
+    - index_map.max_key(): the largest user index
+    - index_map.copy(): an independent map with the same indexes
+
+StringIndexMap stores (position, extra characters) for each index of a
+string instead. Both are MutableMappings, so they still compare equal to
+the dicts that hold the same indexes.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator, MutableMapping
+from random import Random
+from typing import Any, Iterable, Optional, Union
+
+__all__ = ["IndexMap", "StringIndexMap"]
+
+Key = Union[int, float]
+
+# a private generator, so that lists never move the seeded global one
+priorities = Random(0)
+
+
+class Node:
+    """One index; lazy is added to everything below it when it is visited."""
+
+    __slots__ = ("key", "value", "priority", "lazy", "left", "right")
+
+    def __init__(self, key: Key, value: int, priority: float):
+        self.key = key
+        self.value = value
+        self.priority = priority
+        self.lazy = 0
+        self.left: Optional[Node] = None
+        self.right: Optional[Node] = None
+
+    def push_down(self) -> None:
+        if self.lazy:
+            for child in (self.left, self.right):
+                if child is not None:
+                    child.value += self.lazy
+                    child.lazy += self.lazy
+            self.lazy = 0
+
+
+def split(node: Optional[Node], key: Key) -> tuple[Optional[Node], Optional[Node]]:
+    """The indexes <= key and the indexes > key."""
+    if node is None:
+        return None, None
+    node.push_down()
+    if node.key <= key:
+        node.right, right = split(node.right, key)
+        return node, right
+    left, node.left = split(node.left, key)
+    return left, node
+
+
+def split_before(
+    node: Optional[Node], key: Key
+) -> tuple[Optional[Node], Optional[Node]]:
+    """The indexes < key and the indexes >= key."""
+    if node is None:
+        return None, None
+    node.push_down()
+    if node.key < key:
+        node.right, right = split_before(node.right, key)
+        return node, right
+    left, node.left = split_before(node.left, key)
+    return left, node
+
+
+def merge(left: Optional[Node], right: Optional[Node]) -> Optional[Node]:
+    """Join two trees, every index of left being smaller than those of right."""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.push_down()
+        left.right = merge(left.right, right)
+        return left
+    right.push_down()
+    right.left = merge(left, right.left)
+    return right
+
+
+def build_sorted(items: Iterable[tuple[Key, int]]) -> Optional[Node]:
+    """A tree of (index, position) pairs given in index order, in O(n)."""
+    spine: list[Node] = []  # the right spine of the tree built so far
+    for key, position in items:
+        node = Node(key, position, priorities.random())
+        last = None
+        while spine and spine[-1].priority < node.priority:
+            last = spine.pop()
+        node.left = last
+        if spine:
+            spine[-1].right = node
+        spine.append(node)
+    return spine[0] if spine else None
+
+
+class IndexMap(MutableMapping):
+    """Sorted map of user indexes to list positions, see the module docstring."""
+
+    __slots__ = ("root", "size", "start", "stop")
+
+    def __init__(self, items: Iterable[tuple[Key, Any]] = ()):
+        self.root: Optional[Node] = None
+        self.size = 0
+        # while stop is set, the map is range(start, stop) mapped to itself
+        # and has no tree; see Implicit Identity
+        self.start = 0
+        self.stop: Optional[int] = None
+        for key, value in items:
+            self[key] = value
+
+    @classmethod
+    def identity(cls, start: int, stop: int) -> IndexMap:
+        """Map every index in range(start, stop) to itself, in O(1)."""
+        index_map = cls()
+        index_map.start = start
+        index_map.stop = max(stop, start)
+        return index_map
+
+    def build_tree(self) -> None:
+        """Replace the implicit identity with a tree of the same indexes."""
+        if self.stop is None:
+            return
+        self.root = build_sorted((key, key) for key in range(self.start, self.stop))
+        self.size = self.stop - self.start
+        self.stop = None
+
+    def copy(self) -> IndexMap:
+        """An independent map with the same indexes, in O(n) at most."""
+        copied = type(self)()
+        if self.stop is not None:
+            copied.start, copied.stop = self.start, self.stop
+        else:
+            copied.root = build_sorted(self.positions())
+            copied.size = self.size
+        return copied
+
+    # positions; subclasses map these to the values they store
+
+    def find(self, key: Key) -> Optional[int]:
+        """The position of key, or None if it is not an index."""
+        if self.stop is not None:
+            if self.start <= key < self.stop and key % 1 == 0:
+                return int(key)
+            return None
+        node = self.root
+        pending = 0
+        while node is not None:
+            if key == node.key:
+                return node.value + pending
+            pending += node.lazy
+            node = node.left if key < node.key else node.right
+        return None
+
+    def set_position(self, key: Key, position: int) -> None:
+        if self.stop is not None:
+            if key == self.stop and position == key:
+                self.stop += 1  # push keeps the identity
+                return
+            if self.find(key) == position:
+                return
+            self.build_tree()
+        node = self.root
+        while node is not None:
+            node.push_down()
+            if key == node.key:
+                node.value = position
+                return
+            node = node.left if key < node.key else node.right
+        left, right = split(self.root, key)
+        node = Node(key, position, priorities.random())
+        self.root = merge(merge(left, node), right)
+        self.size += 1
+
+    def remove(self, key: Key) -> None:
+        if self.find(key) is None:
+            raise KeyError(key)
+        self.build_tree()
+        left, rest = split_before(self.root, key)
+        _, right = split(rest, key)
+        self.root = merge(left, right)
+        self.size -= 1
+
+    def positions(self) -> Iterator[tuple[Key, int]]:
+        """The indexes and their positions, smallest index first."""
+        if self.stop is not None:
+            yield from ((key, key) for key in range(self.start, self.stop))
+            return
+        stack: list[tuple[Node, int]] = []
+        node, pending = self.root, 0
+        while stack or node is not None:
+            while node is not None:
+                stack.append((node, pending))
+                pending += node.lazy
+                node = node.left
+            node, pending = stack.pop()
+            yield node.key, node.value + pending
+            pending += node.lazy
+            node = node.right
+
+    def shift_after(self, key: Key, by: int) -> None:
+        """Add by to the position of every index greater than key."""
+        if not by:
+            return
+        if self.stop is not None:
+            if key >= self.stop - 1:
+                return  # no index is greater
+            self.build_tree()
+        left, right = split(self.root, key)
+        if right is not None:
+            right.value += by
+            right.lazy += by
+        self.root = merge(left, right)
+
+    def max_key(self) -> Key:
+        """The largest index; a ValueError if there is none, like max()."""
+        if self.stop is not None and self.stop > self.start:
+            return self.stop - 1
+        node = self.root
+        if node is None:
+            raise ValueError("max() arg is an empty sequence")
+        while node.right is not None:
+            node = node.right
+        return node.key
+
+    # the mapping
+
+    def __getitem__(self, key: Key):
+        position = self.find(key)
+        if position is None:
+            raise KeyError(key)
+        return position
+
+    def get(self, key: Key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key: object) -> bool:
+        try:
+            return self.find(key) is not None  # type: ignore[arg-type]
+        except TypeError:
+            return False
+
+    def __setitem__(self, key: Key, position: int) -> None:
+        self.set_position(key, position)
+
+    def __delitem__(self, key: Key) -> None:
+        self.remove(key)
+
+    def items(self) -> Iterator[tuple[Key, Any]]:  # type: ignore[override]
+        """The indexes and their values, smallest index first."""
+        return self.positions()
+
+    def __iter__(self) -> Iterator[Key]:
+        return (key for key, _ in self.positions())
+
+    def __len__(self) -> int:
+        if self.stop is not None:
+            return self.stop - self.start
+        return self.size
+
+    def __eq__(self, other: object) -> bool:
+        if (
+            type(other) is type(self)
+            and self.stop is not None
+            and other.stop is not None  # type: ignore[attr-defined]
+        ):
+            return len(self) == len(other) == 0 or (  # type: ignore[arg-type]
+                self.start == other.start  # type: ignore[attr-defined]
+                and self.stop == other.stop  # type: ignore[attr-defined]
+            )
+        return super().__eq__(other)
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self.items())!r})"
+
+
+class StringIndexMap(IndexMap):
+    """The indexer of a string: each index maps to (position, extra characters).
+
+    An index assigned more than one character keeps the ones after the first
+    as its extra characters; only those indexes are stored in extras.
+    """
+
+    __slots__ = ("extras",)
+
+    def __init__(self, items: Iterable[tuple[Key, Any]] = ()):
+        self.extras: dict[Key, str] = {}
+        super().__init__(items)
+
+    def copy(self) -> StringIndexMap:
+        copied = super().copy()
+        copied.extras = dict(self.extras)  # type: ignore[attr-defined]
+        return copied  # type: ignore[return-value]
+
+    def __getitem__(self, key: Key) -> tuple[int, str]:
+        position = self.find(key)
+        if position is None:
+            raise KeyError(key)
+        return position, self.extras.get(key, "")
+
+    def __setitem__(self, key: Key, value: tuple[int, str]) -> None:
+        position, extra = value
+        self.set_position(key, position)
+        if extra:
+            self.extras[key] = extra
+        else:
+            self.extras.pop(key, None)
+
+    def __delitem__(self, key: Key) -> None:
+        self.remove(key)
+        self.extras.pop(key, None)
+
+    def items(self) -> Iterator[tuple[Key, tuple[int, str]]]:  # type: ignore[override]
+        extras = self.extras
+        return ((key, (pos, extras.get(key, ""))) for key, pos in self.positions())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, StringIndexMap) and self.extras != other.extras:
+            return False
+        return super().__eq__(other)
+
+    __hash__ = None  # type: ignore[assignment]
@@ -37,12 +37,19 @@ import locale
 import random
 import pickle
 import requests
+import weakref
 from time import sleep
 from pathlib import Path
-from copy import deepcopy
 from threading import Thread
 from difflib import SequenceMatcher
-from typing import Literal, Optional, TypeAlias, Union
+from typing import (
+    Callable,
+    Collection,
+    NamedTuple,
+    Optional,
+    TypeAlias,
+    Union,
+)
 
 KEY_MOUSE_IMPORTED = True
 try:
@@ -83,17 +90,31 @@ from gulfofmexico.builtin import (
     GulfOfMexicoPromise,
     GulfOfMexicoSpecialBlankValue,
     GulfOfMexicoString,
-    GulfOfMexicoUndefined,
     Name,
     Variable,
     GulfOfMexicoValue,
     VariableLifetime,
+    FALSE,
+    MAYBE,
+    TRUE,
+    UNDEFINED,
+    copy_value,
+    db_boolean,
     db_not,
+    db_number,
     db_to_boolean,
     db_to_number,
     db_to_string,
     is_int,
+    is_shared,
 )
+from gulfofmexico.deletion import DeletedValues
+from gulfofmexico.history import ValueHistory
+from gulfofmexico.lifetimes import lifetime_expiry
+from gulfofmexico.reactive import WhenWatcher, when_graph
+from gulfofmexico.scheduler import AsyncScheduler, AsyncTask
+from gulfofmexico.scheduler import stats as scheduler_stats
+from gulfofmexico.scope import Namespace, ScopeChain
 from gulfofmexico.serialize import serialize_obj, deserialize_obj
 from gulfofmexico.processor.lexer import tokenize as db_tokenize
 from gulfofmexico.processor.expression_tree import (
@@ -104,11 +125,16 @@ from gulfofmexico.processor.expression_tree import (
     ValueNode,
     IndexNode,
     ExpressionNode,
+    StringTemplate,
+    apply_escape_sequences,
     build_expression_tree,
+    compile_string_template,
+    decode_number,
     get_expr_first_token,
 )
 from gulfofmexico.processor.syntax_tree import (
     AfterStatement,
+    BatchStatement,
     ClassDeclaration,
     CodeStatement,
     CodeStatementKeywordable,
@@ -144,7 +170,7 @@ IMMUTABLE_CONSTANTS_VALUES_PATH = ".immutable_constants_values"
 DB_VAR_TO_VALUE_SEP = ";;;"  # i'm feeling fancy
 
 # :D
-Namespace: TypeAlias = dict[str, Union[Variable, Name]]
+Namespaces: TypeAlias = ScopeChain[Namespace]
 CodeStatementWithExpression: TypeAlias = Union[
     ReturnStatement,
     Conditional,
@@ -154,34 +180,52 @@ CodeStatementWithExpression: TypeAlias = Union[
     AfterStatement,
     VariableDeclaration,
 ]
-AsyncStatements: TypeAlias = list[
-    tuple[
-        list[tuple[CodeStatement, ...]],
-        list[Namespace],
-        int,
-        Union[Literal[1], Literal[-1]],
-    ]
-]
+AsyncStatements: TypeAlias = list[AsyncTask]
 NameWatchers: TypeAlias = dict[
     tuple[str, int],
     tuple[
         CodeStatementWithExpression,
         set[tuple[str, int]],
-        list[Namespace],
+        Namespaces,
         Optional[GulfOfMexicoPromise],
     ],
 ]
-WhenStatementWatchers: TypeAlias = list[
-    dict[
-        Union[str, int],
-        list[tuple[ExpressionTreeNode, list[tuple[CodeStatement, ...]]]],
-    ]
-]  # bro there are six square brackets...
+# the scopes that when statements are declared in, each holding its watchers
+# by id; what they watch is in when_graph (see gulfofmexico/reactive.py)
+WhenStatementWatchers: TypeAlias = ScopeChain[dict[int, WhenWatcher]]
+EngineRunner: TypeAlias = Callable[
+    [
+        list[tuple[CodeStatement, ...]],
+        Namespaces,
+        AsyncStatements,
+        WhenStatementWatchers,
+        dict[str, dict[str, GulfOfMexicoValue]],
+        list[tuple[str, str, GulfOfMexicoValue]],
+    ],
+    Optional[GulfOfMexicoValue],
+]  # and in_tail_position as a keyword, like interpret_code_statements
+
+
+class TailCall(NamedTuple):
+    """A call in tail position, returned by its block instead of being made.
+
+    The function call that is running the block makes it once the block has
+    returned, so a chain of tail calls runs in a loop instead of piling up
+    Python frames.
+    """
+
+    expr: FunctionNode
+    func: GulfOfMexicoFunction
+    args: list[GulfOfMexicoValue]
+    namespaces: Namespaces
+    when_statement_watchers: WhenStatementWatchers
 
 
 def get_built_expression(
     expr: Union[list[Token], ExpressionTreeNode],
 ) -> ExpressionTreeNode:
+    # expressions are normally built in generate_syntax_tree; tokens only reach
+    # this point when they failed to build there, so this raises the parse error
     return (
         expr
         if isinstance(expr, ExpressionTreeNode)
@@ -189,6 +233,12 @@ def get_built_expression(
     )
 
 
+def renamed_value_node(node: ValueNode, new_name: str) -> ValueNode:
+    """Returns a copy of a name node that refers to new_name instead."""
+    token = node.name_or_value
+    return ValueNode(Token(token.type, new_name, token.line, token.col))
+
+
 def get_modified_next_name(name: str, ns: int) -> str:
     return f"{name}_{ns}__next"
 
@@ -201,7 +251,7 @@ def get_modified_prev_name(name: str) -> str:
 def evaluate_normal_function(
     expr: FunctionNode,
     func: Union[GulfOfMexicoFunction, BuiltinFunction],
-    namespaces: list[Namespace],
+    namespaces: Namespaces,
     args: list[GulfOfMexicoValue],
     when_statement_watchers: WhenStatementWatchers,
 ) -> GulfOfMexicoValue:
@@ -216,40 +266,74 @@ def evaluate_normal_function(
                 expr.name,
             )
         max_arg_count = func.arg_count if func.arg_count >= 0 else len(args)
-        return func.function(*args[:max_arg_count]) or GulfOfMexicoUndefined()
+        return func.function(*args[:max_arg_count]) or UNDEFINED
 
-    # check length is proper, adjust namespace, and run this code
-    if len(func.args) > len(args):
-        raise_error_at_token(
-            filename,
-            code,
-            f"Expected more arguments for function call with {len(func.args)} argument{'s' if len(func.args) != 1 else ''}.",
-            expr.name,
-        )
-    new_namespace: Namespace = {
-        name: Name(name, arg) for name, arg in zip(func.args, args)
-    }
-    return (
-        interpret_code_statements(
+    # check length is proper, adjust namespace, and run this code. calls in tail
+    # position come back as a TailCall and are made here, one after the other
+    while True:
+        result = interpret_code_statements(
             func.code,
-            namespaces + [new_namespace],
+            namespaces.push(bind_function_arguments(expr, func, args)),
             [],
-            when_statement_watchers + [{}],
+            when_statement_watchers.push(),
             {},
             [],
+            in_tail_position=True,
         )
-        or GulfOfMexicoUndefined()
-    )
+        if not isinstance(result, TailCall):
+            return result or UNDEFINED
+        expr, func, args = result.expr, result.func, result.args
+        # the finished call's scopes can be left out if the new call shadows
+        # everything in them, so tail recursion does not grow the chain either
+        if not (
+            scopes_are_shadowed(result.namespaces, namespaces, func.args)
+            and scopes_are_shadowed(
+                result.when_statement_watchers, when_statement_watchers, ()
+            )
+        ):
+            namespaces = result.namespaces
+            when_statement_watchers = result.when_statement_watchers
 
 
-def register_async_function(
-    expr: FunctionNode,
-    func: GulfOfMexicoFunction,
-    namespaces: list[Namespace],
-    args: list[GulfOfMexicoValue],
+def scopes_are_shadowed(
+    scope: ScopeChain, base: ScopeChain, names: Collection[str]
+) -> bool:
+    """Whether the scopes from scope down to base (not included) only bind names."""
+    while scope is not base:
+        if scope is None or any(name not in names for name in scope.namespace):
+            return False
+        scope = scope.parent  # type: ignore[assignment]
+    return True
+
+
+def make_tail_call(
+    expr: Union[list[Token], ExpressionTreeNode],
+    namespaces: Namespaces,
     async_statements: AsyncStatements,
-) -> None:
-    """Adds a job to the async statements queue, which is accessed in the interpret_code_statements function."""
+    when_statement_watchers: WhenStatementWatchers,
+) -> Optional[TailCall]:
+    """Evaluate the arguments of a call of a synchronous GOM function and return
+    the call as a TailCall. Anything else is left for evaluate_expression."""
+    if not isinstance(expr, FunctionNode) or not expr.args or "." in expr.name.value:
+        return None
+    func = namespaces.lookup(expr.name.value)
+    if func is None or type(func.value) is not GulfOfMexicoFunction:
+        return None
+    if func.value.is_async:
+        return None
+    args = [
+        evaluate_expression(arg, namespaces, async_statements, when_statement_watchers)
+        for arg in expr.args
+    ]
+    if isinstance(args[0], GulfOfMexicoSpecialBlankValue):
+        args = args[1:]
+    return TailCall(expr, func.value, args, namespaces, when_statement_watchers)
+
+
+def bind_function_arguments(
+    expr: FunctionNode, func: GulfOfMexicoFunction, args: list[GulfOfMexicoValue]
+) -> Namespace:
+    """The namespace a function call runs in, with each argument bound to its name."""
     if len(func.args) > len(args):
         raise_error_at_token(
             filename,
@@ -257,43 +341,76 @@ def register_async_function(
             f"Expected more arguments for function call with {len(func.args)} argument{'s' if len(func.args) != 1 else ''}.",
             expr.name,
         )
-    function_namespaces = namespaces + [
-        {name: Name(name, arg) for name, arg in zip(func.args, args)}
-    ]
-    async_statements.append((func.code, function_namespaces, 0, 1))
+    return {name: Name(name, arg) for name, arg in zip(func.args, args)}
 
 
-def get_code_from_when_statement_watchers(
-    name_or_id: Union[str, int], when_statement_watchers: WhenStatementWatchers
-) -> list[tuple[ExpressionTreeNode, list[tuple[CodeStatement, ...]]]]:
-    vals = []
-    for watcher_dict in when_statement_watchers:
-        if val := watcher_dict.get(name_or_id):
-            vals += val
-    return vals
+def register_async_function(
+    expr: FunctionNode,
+    func: GulfOfMexicoFunction,
+    namespaces: Namespaces,
+    args: list[GulfOfMexicoValue],
+    async_statements: AsyncStatements,
+) -> None:
+    """Adds a job to the async statements queue, which is accessed in the interpret_code_statements function."""
+    function_namespaces = namespaces.push(bind_function_arguments(expr, func, args))
+    async_statements.append(AsyncTask(func.code, function_namespaces))
 
 
-def remove_from_when_statement_watchers(
-    name_or_id: Union[str, int],
-    watcher: tuple[ExpressionTreeNode, list[tuple[CodeStatement, ...]]],
+def run_when_watcher(
+    watcher: WhenWatcher,
+    async_statements: AsyncStatements,
     when_statement_watchers: WhenStatementWatchers,
 ) -> None:
-    for watcher_dict in when_statement_watchers:
-        if vals := watcher_dict.get(name_or_id):
-            remove = None
-            for i, v in enumerate(vals):
-                if v == watcher:
-                    remove = i
-            if remove is not None:
-                del vals[remove]
-
-
-def remove_from_all_when_statement_watchers(
-    name_or_id: Union[str, int], when_statement_watchers: WhenStatementWatchers
+    """Check a when statement's condition and run its body if it is met."""
+    condition_val = evaluate_expression(
+        watcher.condition,
+        watcher.namespaces,
+        async_statements,
+        when_statement_watchers,
+    )
+    execute_conditional(
+        condition_val,
+        watcher.statements,
+        watcher.namespaces,
+        when_statement_watchers,
+        {},
+        [],
+    )
+
+
+def when_watcher_writes(watcher: WhenWatcher) -> list[object]:
+    """What a when statement's body may change, following the functions it
+    calls since those run in its scope."""
+    keys: list[object] = []
+    seen: set[str] = set()
+    pending = [*gather_written_names(watcher.statements)]
+    while pending:
+        if (name := pending.pop()) in seen:
+            continue
+        seen.add(name)
+        binding = watcher.namespaces.lookup(name)
+        keys.append(binding if isinstance(binding, Variable) else name)
+        if binding is None or isinstance(binding, Variable) and not binding.lifetimes:
+            continue  # it has no value yet
+        if isinstance(binding.value, GulfOfMexicoMutable):
+            keys.append(binding.value)
+        elif isinstance(binding.value, GulfOfMexicoFunction):
+            pending.extend(gather_written_names(binding.value.code))
+    return keys
+
+
+def flush_when_watchers(
+    async_statements: AsyncStatements,
+    when_statement_watchers: WhenStatementWatchers,
 ) -> None:
-    for watcher_dict in when_statement_watchers:
-        if name_or_id in watcher_dict:
-            del watcher_dict[name_or_id]
+    """Run the when statements set off since the last flush, see Propagation
+    in gulfofmexico/reactive.py."""
+    when_graph.flush(
+        lambda watcher: run_when_watcher(
+            watcher, async_statements, when_statement_watchers
+        ),
+        when_watcher_writes,
+    )
 
 
 def load_global_gulfofmexico_variables(namespaces: list[Namespace]) -> None:
@@ -529,7 +646,7 @@ def check_type_annotation(value: GulfOfMexicoValue, type_tokens: list[Token]) ->
 def declare_new_variable(
     statement: VariableDeclaration,
     value: GulfOfMexicoValue,
-    namespaces: list[Namespace],
+    namespaces: Namespaces,
     async_statements: AsyncStatements,
     when_statement_watchers: WhenStatementWatchers,
 ) -> None:
@@ -541,19 +658,17 @@ def declare_new_variable(
     can_be_reset = "var" in [mod.value for mod in statement.modifiers]
     can_edit_value = "const" not in [mod.value for mod in statement.modifiers]
 
-    # Parse lifetime if provided
+    # Parse lifetime if provided: a number of lines (<2>), of seconds (<2s>
+    # or <2.0>), or Infinity
     duration = 100000000000  # default infinite
     is_temporal = False
     temporal_duration = 0.0
-    if lifetime:
+    if lifetime and lifetime != "Infinity":
         try:
-            if lifetime.startswith("<") and lifetime.endswith(">"):
-                # Temporal lifetime like <5.0>
-                temporal_duration = float(lifetime[1:-1])
-                duration = 100000000000  # still infinite lines
+            if lifetime.endswith("s") or "." in lifetime:
+                temporal_duration = float(lifetime.removesuffix("s"))
                 is_temporal = True
             else:
-                # Line-based lifetime
                 duration = int(lifetime)
         except ValueError:
             raise_error_at_token(
@@ -565,7 +680,7 @@ def declare_new_variable(
 
     # Create the variable
     var = Variable(name, [], [])
-    var.add_lifetime(
+    var_lifetime = var.add_lifetime(
         value,
         confidence,
         duration,
@@ -574,9 +689,14 @@ def declare_new_variable(
         is_temporal=is_temporal,
         temporal_duration=temporal_duration,
     )
+    if is_temporal:
+        lifetime_expiry.schedule_time(var, var_lifetime)
+    elif lifetime and lifetime != "Infinity":
+        lifetime_expiry.schedule_lines(var, var_lifetime, duration)
 
     # Add to namespace
-    namespaces[-1][name] = var
+    namespaces.declare(name, var)
+    Variable.notify_waiting()
 
     # Check type annotation if provided
     if statement.type_annotation:
@@ -601,33 +721,18 @@ def declare_new_variable(
             pass
 
     # Trigger when statement watchers for this new variable
-    when_watchers = get_code_from_when_statement_watchers(
-        id(var), when_statement_watchers
-    )
-    for when_watcher in when_watchers:
-        condition, inside_statements = when_watcher
-        condition_val = evaluate_expression(
-            condition, namespaces, async_statements, when_statement_watchers
-        )
+    for when_watcher in when_graph.watchers_of(var):
         if isinstance(value, GulfOfMexicoMutable):
-            if id(value) not in when_statement_watchers[-1]:
-                when_statement_watchers[-1][id(value)] = []
-            when_statement_watchers[-1][id(value)].append(when_watcher)
-        execute_conditional(
-            condition_val,
-            inside_statements,
-            namespaces,
-            when_statement_watchers,
-            {},
-            [],
-        )
+            when_graph.add(value, when_watcher)
+        when_graph.mark(when_watcher)
+    flush_when_watchers(async_statements, when_statement_watchers)
 
 
 def assign_variable(
     statement: VariableAssignment,
     indexes: list[GulfOfMexicoValue],
     new_value: GulfOfMexicoValue,
-    namespaces: list[Namespace],
+    namespaces: Namespaces,
     async_statements: AsyncStatements,
     when_statement_watchers: WhenStatementWatchers,
 ):
@@ -639,7 +744,7 @@ def assign_variable(
     name_token = statement.name
 
     var, ns = get_name_and_namespace_from_namespaces(name, namespaces)
-    if var is None:
+    if var is None or isinstance(var, Variable) and not var.lifetimes:
         raise_error_at_token(
             filename, code, "Attempted to set a name that is undefined.", name_token
         )
@@ -690,7 +795,6 @@ def assign_variable(
                 statement.name,
             )
 
-    visited_whens = []
     if indexes:
 
         # goes down the list until it can assign something in the list
@@ -716,28 +820,8 @@ def assign_variable(
                     value_to_modify.access_index(index), remaining_indexes
                 )
             # check for some watchers here too!!!!!!!!!!!
-            when_watchers = get_code_from_when_statement_watchers(
-                id(value_to_modify), when_statement_watchers
-            )
-            for when_watcher in when_watchers:  # i just wanna be done with this :(
-                if any([when_watcher == x for x in visited_whens]):
-                    continue
-                (condition, inside_statements, captured_namespaces) = when_watcher
-                condition_val = evaluate_expression(
-                    condition,
-                    captured_namespaces,
-                    async_statements,
-                    when_statement_watchers,
-                )
-                execute_conditional(
-                    condition_val,
-                    inside_statements,
-                    captured_namespaces,
-                    when_statement_watchers,
-                    {},
-                    [],
-                )
-                visited_whens.append(when_watcher)
+            for when_watcher in when_graph.watchers_of(value_to_modify):
+                when_graph.mark(when_watcher)
 
         # Note: For indexed assignment (e.g., list[0] = x), we don't check can_edit_value
         # because const var allows modifying elements, just not replacing the entire value
@@ -773,8 +857,8 @@ def assign_variable(
     if watcher := name_watchers.get(watchers_key):
         st, stored_nexts, watcher_ns, promise = watcher
         mod_name = get_modified_next_name(*watchers_key)
-        watcher_ns[-1][mod_name] = Name(
-            mod_name, new_value
+        watcher_ns.declare(
+            mod_name, Name(mod_name, new_value)
         )  # add the value to the uppermost namespace
         stored_nexts.remove(
             watchers_key
@@ -785,52 +869,15 @@ def assign_variable(
             )
         del name_watchers[watchers_key]  # stop watching this name
 
-    # check if this name appears in a when statement of the appropriate scope  --  it would have to be watching the name
-    if when_watchers := get_code_from_when_statement_watchers(
-        id(var), when_statement_watchers
-    ):
-        for when_watcher in when_watchers:  # i just wanna be done with this :(
-            if len(when_watcher) == 3:
-                condition, inside_statements, captured_namespaces = when_watcher
-            else:
-                condition, inside_statements = when_watcher
-                captured_namespaces = namespaces
-            condition_val = evaluate_expression(
-                condition,
-                captured_namespaces,
-                async_statements,
-                when_statement_watchers,
-            )
-            if isinstance(new_value, GulfOfMexicoMutable):
-                if id(new_value) not in when_statement_watchers[-1]:
-                    when_statement_watchers[-1][id(new_value)] = []
-                if when_watcher not in when_statement_watchers[-1][id(new_value)]:
-                    when_statement_watchers[-1][id(new_value)].append(
-                        when_watcher
-                    )  # remember: this is tuple so it is immutable and copied!
-            if isinstance(
-                var.prev_values[-1], GulfOfMexicoMutable
-            ):  # if prev value was being observed under this statement, remove it
-                remove_from_when_statement_watchers(
-                    id(var.prev_values[-1]),
-                    when_watcher,
-                    when_statement_watchers,
-                )
-            if id(var) not in when_statement_watchers[-1]:
-                when_statement_watchers[-1][id(var)] = []
-            if when_watcher not in when_statement_watchers[-1][id(var)]:
-                when_statement_watchers[-1][id(var)].append(
-                    when_watcher
-                )  # put this where the new variable is
-            execute_conditional(
-                condition_val,
-                inside_statements,
-                captured_namespaces,
-                when_statement_watchers,
-                {},
-                [],
-            )
-        # Removed: remove_from_all_when_statement_watchers(id(var), when_statement_watchers)
+    # run the when statements watching this variable, which now also watch
+    # its new value instead of the old one if those can change in place
+    for when_watcher in when_graph.watchers_of(var):
+        if isinstance(new_value, GulfOfMexicoMutable):
+            when_graph.add(new_value, when_watcher)
+        if isinstance(var.prev_values[-1], GulfOfMexicoMutable):
+            when_graph.discard(var.prev_values[-1], when_watcher)
+        when_graph.mark(when_watcher)
+    flush_when_watchers(async_statements, when_statement_watchers)
 
 
 def perform_single_value_operation(
@@ -840,8 +887,9 @@ def perform_single_value_operation(
         case TokenType.SUBTRACT:
             match val:
                 case GulfOfMexicoNumber():
-                    return GulfOfMexicoNumber(-val.value)
+                    return db_number(-val.value)
                 case GulfOfMexicoList():
+                    val.own_storage()  # the new list holds the same items
                     return GulfOfMexicoList(val.values[::-1])
                 case GulfOfMexicoString():
                     return GulfOfMexicoString(val.value[::-1])
@@ -865,79 +913,79 @@ def is_approx_equal(
 ) -> GulfOfMexicoBoolean:
     """Approximate equality with fuzzy matching based on ratios."""
     if type(left) != type(right):
-        return GulfOfMexicoBoolean(False)
+        return FALSE
 
     match left:
         case GulfOfMexicoNumber():
             if not isinstance(right, GulfOfMexicoNumber):
-                return GulfOfMexicoBoolean(False)
+                return FALSE
             if left.value == right.value:
-                return GulfOfMexicoBoolean(True)
+                return TRUE
             if (
                 abs(left.value) < FLOAT_TO_INT_PREC
                 and abs(right.value) < FLOAT_TO_INT_PREC
             ):
-                return GulfOfMexicoBoolean(True)
+                return TRUE
             ratio = abs(left.value - right.value) / max(
                 abs(left.value), abs(right.value)
             )
-            return GulfOfMexicoBoolean(ratio <= NUM_EQUALITY_RATIO)
+            return db_boolean(ratio <= NUM_EQUALITY_RATIO)
 
         case GulfOfMexicoString():
             if not isinstance(right, GulfOfMexicoString):
-                return GulfOfMexicoBoolean(False)
+                return FALSE
             if left.value == right.value:
-                return GulfOfMexicoBoolean(True)
+                return TRUE
             # Use sequence matcher for string similarity
             ratio = SequenceMatcher(None, left.value, right.value).ratio()
-            return GulfOfMexicoBoolean(ratio >= STRING_EQUALITY_RATIO)
+            return db_boolean(ratio >= STRING_EQUALITY_RATIO)
 
         case GulfOfMexicoList():
             if not isinstance(right, GulfOfMexicoList):
-                return GulfOfMexicoBoolean(False)
+                return FALSE
             if len(left.values) != len(right.values):
-                return GulfOfMexicoBoolean(False)
+                return FALSE
             if len(left.values) == 0:
-                return GulfOfMexicoBoolean(True)
+                return TRUE
             equal_count = 0
             for l_val, r_val in zip(left.values, right.values):
                 if is_approx_equal(l_val, r_val).value:
                     equal_count += 1
             ratio = equal_count / len(left.values)
-            return GulfOfMexicoBoolean(ratio >= LIST_EQUALITY_RATIO)
+            return db_boolean(ratio >= LIST_EQUALITY_RATIO)
 
         case GulfOfMexicoMap():
             if not isinstance(right, GulfOfMexicoMap):
-                return GulfOfMexicoBoolean(False)
+                return FALSE
             if len(left.self_dict) != len(right.self_dict):
-                return GulfOfMexicoBoolean(False)
+                return FALSE
             if len(left.self_dict) == 0:
-                return GulfOfMexicoBoolean(True)
+                return TRUE
             equal_count = 0
             for key in left.self_dict:
                 if key in right.self_dict:
                     if is_approx_equal(left.self_dict[key], right.self_dict[key]).value:
                         equal_count += 1
             ratio = equal_count / len(left.self_dict)
-            return GulfOfMexicoBoolean(ratio >= MAP_EQUALITY_RATIO)
+            return db_boolean(ratio >= MAP_EQUALITY_RATIO)
 
         case GulfOfMexicoFunction():
             if not isinstance(right, GulfOfMexicoFunction):
-                return GulfOfMexicoBoolean(False)
+                return FALSE
             # Functions are equal if they have the same args and code
             if (
                 left.args == right.args
                 and left.code == right.code
                 and left.is_async == right.is_async
             ):
-                return GulfOfMexicoBoolean(True)
-            return GulfOfMexicoBoolean(False)
+                return TRUE
+            return FALSE
 
         case GulfOfMexicoObject():
             if not isinstance(right, GulfOfMexicoObject):
-                return GulfOfMexicoBoolean(False)
+                return FALSE
             if left.class_name != right.class_name:
-                return GulfOfMexicoBoolean(False)
+                return FALSE
             # Compare namespaces
             equal_count = 0
             total_count = len(left.namespace)
@@ -948,39 +996,39 @@ def is_approx_equal(
                     ).value:
                         equal_count += 1
             if total_count == 0:
-                return GulfOfMexicoBoolean(True)
+                return TRUE
             ratio = equal_count / total_count
-            return GulfOfMexicoBoolean(ratio >= OBJECT_EQUALITY_RATIO)
+            return db_boolean(ratio >= OBJECT_EQUALITY_RATIO)
 
         case _:
             # For other types, use strict equality
-            return GulfOfMexicoBoolean(left == right)
+            return db_boolean(left == right)
 
 
 def is_equal(left: GulfOfMexicoValue, right: GulfOfMexicoValue) -> GulfOfMexicoBoolean:
     """Regular equality - stricter than approximate."""
     if type(left) != type(right):
-        return GulfOfMexicoBoolean(False)
+        return FALSE
 
     match left:
         case GulfOfMexicoNumber():
             if not isinstance(right, GulfOfMexicoNumber):
-                return GulfOfMexicoBoolean(False)
-            return GulfOfMexicoBoolean(
+                return FALSE
+            return db_boolean(
                 abs(left.value - right.value) < FLOAT_TO_INT_PREC
             )
 
         case GulfOfMexicoString():
             if not isinstance(right, GulfOfMexicoString):
-                return GulfOfMexicoBoolean(False)
-            return GulfOfMexicoBoolean(left.value == right.value)
+                return FALSE
+            return db_boolean(left.value == right.value)
 
         case GulfOfMexicoList():
             if not isinstance(right, GulfOfMexicoList):
-                return GulfOfMexicoBoolean(False)
+                return FALSE
             if len(left.values) != len(right.values):
-                return GulfOfMexicoBoolean(False)
-            return GulfOfMexicoBoolean(
+                return FALSE
+            return db_boolean(
                 all(
                     is_equal(l_val, r_val).value
                     for l_val, r_val in zip(left.values, right.values)
@@ -989,10 +1037,10 @@ def is_equal(left: GulfOfMexicoValue, right: GulfOfMexicoValue) -> GulfOfMexicoB
 
         case GulfOfMexicoMap():
             if not isinstance(right, GulfOfMexicoMap):
-                return GulfOfMexicoBoolean(False)
+                return FALSE
             if len(left.self_dict) != len(right.self_dict):
-                return GulfOfMexicoBoolean(False)
-            return GulfOfMexicoBoolean(
+                return FALSE
+            return db_boolean(
                 all(
                     key in right.self_dict
                     and is_equal(left.self_dict[key], right.self_dict[key]).value
@@ -1002,8 +1050,8 @@ def is_equal(left: GulfOfMexicoValue, right: GulfOfMexicoValue) -> GulfOfMexicoB
 
         case GulfOfMexicoFunction():
             if not isinstance(right, GulfOfMexicoFunction):
-                return GulfOfMexicoBoolean(False)
-            return GulfOfMexicoBoolean(
+                return FALSE
+            return db_boolean(
                 left.args == right.args
                 and left.code == right.code
                 and left.is_async == right.is_async
@@ -1011,10 +1059,10 @@ def is_equal(left: GulfOfMexicoValue, right: GulfOfMexicoValue) -> GulfOfMexicoB
 
         case GulfOfMexicoObject():
             if not isinstance(right, GulfOfMexicoObject):
-                return GulfOfMexicoBoolean(False)
+                return FALSE
             if left.class_name != right.class_name:
-                return GulfOfMexicoBoolean(False)
-            return GulfOfMexicoBoolean(
+                return FALSE
+            return db_boolean(
                 all(
                     key in right.namespace
                     and is_equal(
@@ -1025,7 +1073,7 @@ def is_equal(left: GulfOfMexicoValue, right: GulfOfMexicoValue) -> GulfOfMexicoB
             )
 
         case _:
-            return GulfOfMexicoBoolean(left == right)
+            return db_boolean(left == right)
 
 
 def is_really_equal(
@@ -1033,14 +1081,14 @@ def is_really_equal(
 ) -> GulfOfMexicoBoolean:
     """Really equal - even stricter, checks identity for mutable objects."""
     if type(left) != type(right):
-        return GulfOfMexicoBoolean(False)
+        return FALSE
 
     # For mutable objects, check identity
     if isinstance(
         left,
         (GulfOfMexicoList, GulfOfMexicoMap, GulfOfMexicoObject, GulfOfMexicoString),
     ):
-        return GulfOfMexicoBoolean(left is right)
+        return db_boolean(left is right)
 
     # For immutable objects, use regular equality
     return is_equal(left, right)
@@ -1049,8 +1097,12 @@ def is_really_equal(
 def is_really_really_equal(
     left: GulfOfMexicoValue, right: GulfOfMexicoValue
 ) -> GulfOfMexicoBoolean:
-    """Really really equal - strictest equality, always checks identity."""
-    return GulfOfMexicoBoolean(left is right)
+    """Really really equal - strictest equality, always checks identity.
+
+    Shared values (see gulfofmexico/builtin.py) stand for many results that
+    used to be separate objects, so they are never identical to anything.
+    """
+    return db_boolean(left is right and not is_shared(left))
 
 
 def is_less_than(
@@ -1058,32 +1110,32 @@ def is_less_than(
 ) -> GulfOfMexicoBoolean:
     """Less than comparison."""
     if type(left) != type(right):
-        return GulfOfMexicoBoolean(False)
+        return FALSE
 
     match left:
         case GulfOfMexicoNumber():
             if not isinstance(right, GulfOfMexicoNumber):
-                return GulfOfMexicoBoolean(False)
-            return GulfOfMexicoBoolean(left.value < right.value)
+                return FALSE
+            return db_boolean(left.value < right.value)
 
         case GulfOfMexicoString():
             if not isinstance(right, GulfOfMexicoString):
-                return GulfOfMexicoBoolean(False)
-            return GulfOfMexicoBoolean(left.value < right.value)
+                return FALSE
+            return db_boolean(left.value < right.value)
 
         case GulfOfMexicoList():
             if not isinstance(right, GulfOfMexicoList):
-                return GulfOfMexicoBoolean(False)
+                return FALSE
             # Compare lexicographically
             for l_val, r_val in zip(left.values, right.values):
                 if is_really_equal(l_val, r_val).value:
                     continue
                 return is_less_than(l_val, r_val)
-            return GulfOfMexicoBoolean(len(left.values) < len(right.values))
+            return db_boolean(len(left.values) < len(right.values))
 
         case _:
             # For other types, not comparable
-            return GulfOfMexicoBoolean(False)
+            return FALSE
 
 
 def perform_two_value_operation(
@@ -1102,7 +1154,7 @@ def perform_two_value_operation(
                 )
             left_num = db_to_number(left)
             right_num = db_to_number(right)
-            return GulfOfMexicoNumber(left_num.value + right_num.value)
+            return db_number(left_num.value + right_num.value)
         case OperatorType.SUB | OperatorType.MUL | OperatorType.DIV | OperatorType.EXP:
             left_num = db_to_number(left)
             right_num = db_to_number(right)
@@ -1110,7 +1162,7 @@ def perform_two_value_operation(
                 operator == OperatorType.DIV
                 and abs(right_num.value) < FLOAT_TO_INT_PREC
             ):  # pretty much zero
-                return GulfOfMexicoUndefined()
+                return UNDEFINED
             elif (
                 operator == OperatorType.EXP
                 and left_num.value < -FLOAT_TO_INT_PREC
@@ -1131,7 +1183,7 @@ def perform_two_value_operation(
                     result = left_num.value / right_num.value
                 case OperatorType.EXP:
                     result = pow(left_num.value, right_num.value)
-            return GulfOfMexicoNumber(result)
+            return db_number(result)
         case OperatorType.OR:
             left_bool = db_to_boolean(left)
             right_bool = db_to_boolean(right)
@@ -1186,8 +1238,8 @@ def perform_two_value_operation(
                 case (None, _) | (_, None):
                     is_le = None
             if operator == OperatorType.LE:
-                return GulfOfMexicoBoolean(is_le)
-            return db_not(GulfOfMexicoBoolean(is_le))
+                return db_boolean(is_le)
+            return db_not(db_boolean(is_le))
         case OperatorType.LT | OperatorType.GE:
             if operator == OperatorType.LT:
                 return is_less_than(left, right)
@@ -1197,16 +1249,18 @@ def perform_two_value_operation(
 
 
 def get_value_from_namespaces(
-    name_or_value: Token, namespaces: list[Namespace]
+    name_or_value: Token, namespaces: Namespaces
 ) -> GulfOfMexicoValue:
 
     # what the frick am i doing rn
     if v := get_name_from_namespaces(name_or_value.value, namespaces):
-        if isinstance(v.value, GulfOfMexicoPromise):
-            return deepcopy(
-                v.value.value
-            )  # consider not deepcopying this but it doesnt really matter
-        return v.value
+        try:
+            value = v.value
+        except NonFormattedError:  # every lifetime of the variable has ended
+            return UNDEFINED
+        if isinstance(value, GulfOfMexicoPromise):
+            return copy_value(value.value)  # type: ignore[return-value]
+        return value
     return determine_non_name_value(name_or_value)
 
 
@@ -1214,7 +1268,7 @@ def print_expression_debug(
     debug: int,
     expr: Union[list[Token], ExpressionTreeNode],
     value: GulfOfMexicoValue,
-    namespaces: list[Namespace],
+    namespaces: Namespaces,
 ) -> None:
     expr = get_built_expression(expr)
     msg = None
@@ -1240,54 +1294,65 @@ def print_expression_debug(
 
 def interpret_formatted_string(
     string_token: Token,
-    namespaces: list[Namespace],
+    namespaces: Namespaces,
     async_statements: AsyncStatements,
     when_statement_watchers: WhenStatementWatchers,
 ) -> GulfOfMexicoString:
     """Interpret a formatted string with ${} expressions."""
-    string_value = string_token.value
-    result = ""
-    i = 0
-    while i < len(string_value):
-        if string_value[i : i + 2] == "${":
-            # Find the closing }
-            j = i + 2
-            brace_count = 1
-            while j < len(string_value) and brace_count > 0:
-                if string_value[j] == "{":
-                    brace_count += 1
-                elif string_value[j] == "}":
-                    brace_count -= 1
-                j += 1
-            if brace_count > 0:
-                raise_error_at_token(
-                    filename,
-                    code,
-                    "Unclosed ${} expression in string",
-                    string_token,
-                )
-            # Extract the expression
-            expr_str = string_value[i + 2 : j - 1]
-            # Tokenize the expression
-            tokens = db_tokenize(filename, expr_str)
-            # Build expression tree
-            expr_tree = build_expression_tree(filename, tokens, code)
-            # Evaluate the expression
-            value = evaluate_expression(
-                expr_tree, namespaces, async_statements, when_statement_watchers
-            )
-            # Convert to string
-            result += db_to_string(value).value
-            i = j
-        else:
-            result += string_value[i]
-            i += 1
-    return GulfOfMexicoString(result)
+    return render_string_template(
+        compile_string_template(string_token.value),
+        string_token,
+        namespaces,
+        async_statements,
+        when_statement_watchers,
+        escape=False,
+    )
+
+
+def render_string_template(
+    template: StringTemplate,
+    string_token: Token,
+    namespaces: Namespaces,
+    async_statements: AsyncStatements,
+    when_statement_watchers: WhenStatementWatchers,
+    *,
+    escape: bool = True,
+) -> GulfOfMexicoString:
+    """Evaluate the expressions of a string literal and join them into a new string.
+
+    Escape sequences are replaced in the whole joined string, values included;
+    when no escape can reach into a value, the pre-escaped literals are joined
+    instead.
+    """
+    if not template.expressions and not template.unclosed:
+        return GulfOfMexicoString(
+            template.escaped[0] if escape else template.literals[0]
+        )
+    values = []
+    for expr in template.expressions:
+        if isinstance(expr, str):  # raises the error that kept it from building
+            expr = build_expression_tree(filename, db_tokenize(filename, expr), code)
+        value = evaluate_expression(
+            expr, namespaces, async_statements, when_statement_watchers
+        )
+        values.append(db_to_string(value).value)
+    if template.unclosed:
+        raise_error_at_token(
+            filename,
+            code,
+            "Unclosed ${} expression in string",
+            string_token,
+        )
+    if not escape:
+        return GulfOfMexicoString(template.join(values))
+    if template.escapes_join and not any("\\" in value for value in values):
+        return GulfOfMexicoString(template.join(values, escaped=True))
+    return GulfOfMexicoString(apply_escape_sequences(template.join(values)))
 
 
 def evaluate_expression(
     expr: Union[list[Token], ExpressionTreeNode],
-    namespaces: list[dict[str, Union[Variable, Name]]],
+    namespaces: Namespaces,
     async_statements: AsyncStatements,
     when_statement_watchers: WhenStatementWatchers,
     *,
@@ -1301,10 +1366,7 @@ def evaluate_expression(
         when_statement_watchers,
         ignore_string_escape_sequences,
     )
-    if (
-        isinstance(retval, (GulfOfMexicoNumber, GulfOfMexicoString))
-        and retval in deleted_values
-    ):
+    if deleted_values.bits and retval in deleted_values:
         raise_error_at_line(
             filename, code, current_line, f"The value {retval.value} has been deleted."
         )
@@ -1313,20 +1375,12 @@ def evaluate_expression(
 
 def evaluate_escape_sequences(string_value: GulfOfMexicoString) -> GulfOfMexicoString:
     """Process escape sequences in a GulfOfMexicoString."""
-    # Simple escape sequence processing
-    escaped = string_value.value
-    escaped = escaped.replace("\\n", "\n")
-    escaped = escaped.replace("\\t", "\t")
-    escaped = escaped.replace("\\r", "\r")
-    escaped = escaped.replace('\\"', '"')
-    escaped = escaped.replace("\\'", "'")
-    escaped = escaped.replace("\\\\", "\\")
-    return GulfOfMexicoString(escaped)
+    return GulfOfMexicoString(apply_escape_sequences(string_value.value))
 
 
 def evaluate_expression_for_real(
     expr: Union[list[Token], ExpressionTreeNode],
-    namespaces: list[dict[str, Union[Variable, Name]]],
+    namespaces: Namespaces,
     async_statements: AsyncStatements,
     when_statement_watchers: WhenStatementWatchers,
     ignore_string_escape_sequences: bool,
@@ -1456,19 +1510,26 @@ def evaluate_expression_for_real(
                     # This is a bit of a hack, but it works with the existing watcher system
                     dummy_return = ReturnStatement(
                         keyword=None,
-                        expression=[
+                        expression=ValueNode(
                             expr.args[0].name_or_value
-                        ],  # Just return the variable value
+                        ),  # Just return the variable value
                         debug=0,
                     )
 
-                    # Register the watcher
+                    # Register the watcher. It only resolves the promise, so
+                    # it holds it weakly and is dropped once nothing else can
+                    # see the promise any more; it only reads the variable,
+                    # so it keeps its namespace rather than the whole scope
+                    # the promise may be stored in
                     watchers_key = (var_name, ns_id)
-                    name_watchers[watchers_key] = (
+                    watcher = name_watchers[watchers_key] = (
                         dummy_return,
                         {watchers_key},  # Only watching this one variable
-                        namespaces + [{}],  # Empty namespace for the watcher
-                        promise,
+                        ScopeChain(ns).push(),  # Empty namespace for the watcher
+                        weakref.proxy(promise),
+                    )
+                    weakref.finalize(
+                        promise, forget_name_watcher, watchers_key, watcher
                     )
 
                     return promise
@@ -1481,83 +1542,24 @@ def evaluate_expression_for_real(
                     expr.name,
                 )
 
-            caller = None
-            if len(name_split := expr.name.value.split(".")) > 1:
-                caller = ".".join(name_split[:-1])
-                expr = deepcopy(
-                    expr
-                )  # we create a copy of the expression as to not modify it badly
-                expr.args.insert(
-                    0,
-                    ValueNode(
-                        Token(TokenType.NAME, caller, expr.name.line, expr.name.col)
-                    ),
-                )  # artificially put this here, as this is the imaginary "this"
+            # a method call puts the imaginary "this" in front of the arguments
+            caller = expr.caller
+            expr = expr.method_call or expr
             args = [
                 evaluate_expression(
                     arg, namespaces, async_statements, when_statement_watchers
                 )
                 for arg in expr.args
             ]
-            if isinstance(args[0], GulfOfMexicoSpecialBlankValue):
-                args = args[1:]
-            if (
-                isinstance(func.value, GulfOfMexicoFunction)
-                and func.value.is_async
-                and not force_execute_sync
-            ):
-                register_async_function(
-                    expr, func.value, namespaces, args, async_statements
-                )
-                return GulfOfMexicoUndefined()
-            elif (
-                isinstance(func.value, BuiltinFunction) and func.value.modifies_caller
-            ):  # special cases where the function itself modifies the caller
-                if (
-                    caller
-                ):  # seems like a needless check but it makes the errors go away
-                    caller_var = get_name_from_namespaces(caller, namespaces)
-                    if (
-                        isinstance(caller_var, Variable)
-                        and not caller_var.can_edit_value
-                    ):
-                        raise_error_at_line(
-                            filename,
-                            code,
-                            current_line,
-                            "Cannot edit the value of this variable.",
-                        )
-
-                retval = evaluate_normal_function(
-                    expr, func.value, namespaces, args, when_statement_watchers
-                )
-                when_watchers = get_code_from_when_statement_watchers(
-                    id(args[0]), when_statement_watchers
-                )
-                for when_watcher in when_watchers:  # i just wanna be done with this :(
-                    if len(when_watcher) == 3:
-                        condition, inside_statements, captured_namespaces = when_watcher
-                    else:
-                        condition, inside_statements = when_watcher
-                        captured_namespaces = namespaces
-                    condition_val = evaluate_expression(
-                        condition,
-                        captured_namespaces,
-                        async_statements,
-                        when_statement_watchers,
-                    )
-                    execute_conditional(
-                        condition_val,
-                        inside_statements,
-                        captured_namespaces,
-                        when_statement_watchers,
-                        {},
-                        [],
-                    )
-                return retval
-
-            return evaluate_normal_function(
-                expr, func.value, namespaces, args, when_statement_watchers
+            return call_function(
+                expr,
+                func.value,
+                caller,
+                args,
+                force_execute_sync,
+                namespaces,
+                async_statements,
+                when_statement_watchers,
             )
 
         case ListNode():  # done :)
@@ -1571,16 +1573,19 @@ def evaluate_expression_for_real(
             )
 
         case ValueNode():  # done :)
-            if expr.name_or_value.type == TokenType.STRING:
-                retval = interpret_formatted_string(
+            if expr.template is not None:
+                return render_string_template(
+                    expr.template,
                     expr.name_or_value,
                     namespaces,
                     async_statements,
                     when_statement_watchers,
+                    escape=not ignore_string_escape_sequences,
                 )
-                if not ignore_string_escape_sequences:
-                    return evaluate_escape_sequences(retval)
-                return retval
+            if expr.number is not None and not namespaces.is_bound(
+                expr.name_or_value.value
+            ):
+                return db_number(expr.number)
             return get_value_from_namespaces(expr.name_or_value, namespaces)
 
         case IndexNode():  # done :)
@@ -1624,15 +1629,62 @@ def evaluate_expression_for_real(
             )
             return perform_single_value_operation(val, expr.operator)
 
-    return GulfOfMexicoUndefined()
+    return UNDEFINED
+
+
+def call_function(
+    expr: FunctionNode,
+    func: Union[BuiltinFunction, GulfOfMexicoFunction],
+    caller: Optional[str],
+    args: list[GulfOfMexicoValue],
+    force_execute_sync: bool,
+    namespaces: Namespaces,
+    async_statements: AsyncStatements,
+    when_statement_watchers: WhenStatementWatchers,
+) -> GulfOfMexicoValue:
+    """Call a function with its evaluated arguments, running async functions later."""
+    if isinstance(args[0], GulfOfMexicoSpecialBlankValue):
+        args = args[1:]
+    if (
+        isinstance(func, GulfOfMexicoFunction)
+        and func.is_async
+        and not force_execute_sync
+    ):
+        register_async_function(expr, func, namespaces, args, async_statements)
+        return UNDEFINED
+    elif (
+        isinstance(func, BuiltinFunction) and func.modifies_caller
+    ):  # special cases where the function itself modifies the caller
+        if caller:  # seems like a needless check but it makes the errors go away
+            caller_var = get_name_from_namespaces(caller, namespaces)
+            if isinstance(caller_var, Variable) and not caller_var.can_edit_value:
+                raise_error_at_line(
+                    filename,
+                    code,
+                    current_line,
+                    "Cannot edit the value of this variable.",
+                )
+
+        retval = evaluate_normal_function(
+            expr, func, namespaces, args, when_statement_watchers
+        )
+        for when_watcher in when_graph.watchers_of(args[0]):
+            when_graph.mark(when_watcher)
+        flush_when_watchers(async_statements, when_statement_watchers)
+        return retval
+
+    return evaluate_normal_function(
+        expr, func, namespaces, args, when_statement_watchers
+    )
 
 
 def handle_next_expressions(
-    expr: ExpressionTreeNode, namespaces: list[Namespace]
+    expr: ExpressionTreeNode, namespaces: Namespaces
 ) -> tuple[ExpressionTreeNode, set[tuple[str, int]], set[str]]:
     """
     This function looks for the "next" keyword in an expression, and detects seperate await modifiers for that keyword.
-    Then, it removes the "next" and "await next" nodes from the ExpressionTree, and returns the head of the tree.
+    Then, it returns the head of a new tree with the "next" and "await next" nodes removed. The input tree is
+        shared with the syntax tree and is never modified.
     Additionally, every name that appears in the function as a next or async next, its value is saved in a temporary namespace.
     With the returned set of names that are used in "next" and "await next", we can insert these into a dictionary
         that contains information about which names are being "watched" for changes. When this dictionary changes,
@@ -1686,8 +1738,9 @@ def handle_next_expressions(
                         )
                     last_name = name.split(".")[-1]
                     normal_nexts.add((name, id(ns)))
-                    expr = expr.args[0]
-                    expr.name_or_value.value = get_modified_next_name(last_name, id(ns))
+                    expr = renamed_value_node(
+                        expr.args[0], get_modified_next_name(last_name, id(ns))
+                    )
 
                 elif is_await:
 
@@ -1734,9 +1787,9 @@ def handle_next_expressions(
                         async_nexts.add(
                             name
                         )  # only need to store the name for the async ones because we are going to wait anyways
-                        expr = inner_expr.args[0]
-                        expr.name_or_value.value = get_modified_next_name(
-                            last_name, id(ns)
+                        expr = renamed_value_node(
+                            inner_expr.args[0],
+                            get_modified_next_name(last_name, id(ns)),
                         )
 
             else:
@@ -1747,7 +1800,7 @@ def handle_next_expressions(
                     )
                     inner_nexts.append((normal_arg_nexts, async_arg_nexts))
                     replacement_args.append(new_expr)
-                expr.args = replacement_args
+                expr = FunctionNode(expr.name, replacement_args)
 
         case ListNode():
             replacement_values = []
@@ -1757,7 +1810,7 @@ def handle_next_expressions(
                 )
                 inner_nexts.append((normal_expr_nexts, async_expr_nexts))
                 replacement_values.append(new_expr)
-            expr.values = replacement_values
+            expr = ListNode(replacement_values)
         case IndexNode():
             new_value, normal_value_nexts, async_value_nexts = handle_next_expressions(
                 expr.value, namespaces
@@ -1765,8 +1818,7 @@ def handle_next_expressions(
             new_index, normal_index_nexts, async_index_nexts = handle_next_expressions(
                 expr.index, namespaces
             )
-            expr.value = new_value
-            expr.index = new_index
+            expr = IndexNode(new_value, new_index)
             inner_nexts.extend(
                 [
                     (normal_value_nexts, async_value_nexts),
@@ -1780,8 +1832,9 @@ def handle_next_expressions(
             new_right, normal_right_nexts, async_right_nexts = handle_next_expressions(
                 expr.right, namespaces
             )
-            expr.left = new_left
-            expr.right = new_right
+            expr = ExpressionNode(
+                new_left, new_right, expr.operator, expr.operator_token
+            )
             inner_nexts.extend(
                 [
                     (normal_left_nexts, async_left_nexts),
@@ -1792,7 +1845,7 @@ def handle_next_expressions(
             new_expr, normal_expr_nexts, async_expr_nexts = handle_next_expressions(
                 expr.expression, namespaces
             )
-            expr.expression = new_expr
+            expr = SingleOperatorNode(new_expr, expr.operator)
             inner_nexts.append((normal_expr_nexts, async_expr_nexts))
     for nn, an in inner_nexts:
         normal_nexts |= nn
@@ -1801,76 +1854,169 @@ def handle_next_expressions(
 
 
 def save_previous_values_next_expr(
-    expr_to_modify: ExpressionTreeNode, nexts: set[str], namespaces: list[Namespace]
-) -> Namespace:
+    expr: ExpressionTreeNode, nexts: set[str], namespaces: Namespaces
+) -> tuple[ExpressionTreeNode, Namespace]:
+    """
+    Returns a copy of the expression with every name in nexts renamed to its "prev"
+    name, together with a namespace that holds the current values under those names.
+    """
 
     saved_namespace: Namespace = {}
-    match expr_to_modify:
+    match expr:
         case ValueNode():
-            if expr_to_modify.name_or_value.type == TokenType.STRING:
-                return {}
-            name = expr_to_modify.name_or_value.value
+            if expr.name_or_value.type == TokenType.STRING:
+                return expr, {}
+            name = expr.name_or_value.value
             if name not in nexts:
-                return {}
+                return expr, {}
             val = get_name_from_namespaces(name, namespaces)
             if not val:
-                val = Name("", determine_non_name_value(expr_to_modify.name_or_value))
+                val = Name("", determine_non_name_value(expr.name_or_value))
             mod_name = get_modified_prev_name(name)
-            expr_to_modify.name_or_value.value = mod_name
-            return {mod_name: Name(mod_name, val.value)}
+            return renamed_value_node(expr, mod_name), {
+                mod_name: Name(mod_name, val.value)
+            }
         case ExpressionNode():
-            left_ns = save_previous_values_next_expr(
-                expr_to_modify.left, nexts, namespaces
+            left, left_ns = save_previous_values_next_expr(expr.left, nexts, namespaces)
+            right, right_ns = save_previous_values_next_expr(
+                expr.right, nexts, namespaces
             )
-            right_ns = save_previous_values_next_expr(
-                expr_to_modify.right, nexts, namespaces
+            return (
+                ExpressionNode(left, right, expr.operator, expr.operator_token),
+                left_ns | right_ns,
             )
-            return left_ns | right_ns
         case IndexNode():
-            value_ns = save_previous_values_next_expr(
-                expr_to_modify.value, nexts, namespaces
+            value, value_ns = save_previous_values_next_expr(
+                expr.value, nexts, namespaces
             )
-            index_ns = save_previous_values_next_expr(
-                expr_to_modify.index, nexts, namespaces
+            index, index_ns = save_previous_values_next_expr(
+                expr.index, nexts, namespaces
             )
-            return value_ns | index_ns
+            return IndexNode(value, index), value_ns | index_ns
         case ListNode():
-            for ex in expr_to_modify.values:
-                saved_namespace |= save_previous_values_next_expr(ex, nexts, namespaces)
-            return saved_namespace
+            values = []
+            for ex in expr.values:
+                new_ex, ns = save_previous_values_next_expr(ex, nexts, namespaces)
+                values.append(new_ex)
+                saved_namespace |= ns
+            return ListNode(values), saved_namespace
         case FunctionNode():
-            for arg in expr_to_modify.args:
-                saved_namespace |= save_previous_values_next_expr(
-                    arg, nexts, namespaces
-                )
-            return saved_namespace
+            args = []
+            for arg in expr.args:
+                new_arg, ns = save_previous_values_next_expr(arg, nexts, namespaces)
+                args.append(new_arg)
+                saved_namespace |= ns
+            return FunctionNode(expr.name, args), saved_namespace
         case SingleOperatorNode():
-            return save_previous_values_next_expr(
-                expr_to_modify.expression, nexts, namespaces
-            )
-    return saved_namespace
+            inner, ns = save_previous_values_next_expr(
+                expr.expression, nexts, namespaces
+            )
+            return SingleOperatorNode(inner, expr.operator), ns
+    return expr, saved_namespace
+
+
+# the keywords each kind of keyword statement can start with
+STATEMENT_KEYWORDS: dict[type[CodeStatementKeywordable], set[str]] = {
+    Conditional: {"if"},
+    WhenStatement: {"when"},
+    AfterStatement: {"after"},
+    BatchStatement: {"batch"},
+    ClassDeclaration: {"class", "className"},
+    DeleteStatement: {"delete"},
+    ReverseStatement: {"reverse"},
+    ImportStatement: {"import"},
+}
+FUNCTION_KEYWORD = re.compile(r"^f?u?n?c?t?i?o?n?$")
+
+# the caches of what is worked out once for a node of the program's trees,
+# keyed by the id of the node, which each entry keeps so that the id cannot be
+# reused while it exists; clear_tree_caches empties them before each program
+# and each REPL input, so they only ever hold the trees of the one running
+tree_caches: list[dict] = []
+
+# id of a statement tuple -> (the tuple, ScopeChain.version, bound_names of the
+# chain it was resolved in, the candidate it resolved to)
+statement_type_cache: dict[
+    int,
+    tuple[tuple[CodeStatement, ...], int, set[str], Optional[CodeStatement]],
+] = {}
+tree_caches.append(statement_type_cache)
 
 
 def determine_statement_type(
-    possible_statements: tuple[CodeStatement, ...], namespaces: list[Namespace]
+    possible_statements: tuple[CodeStatement, ...], namespaces: Namespaces
 ) -> Optional[CodeStatement]:
-    instance_to_keywords: dict[type[CodeStatementKeywordable], set[str]] = {
-        Conditional: {"if"},
-        WhenStatement: {"when"},
-        AfterStatement: {"after"},
-        ClassDeclaration: {"class", "className"},
-        DeleteStatement: {"delete"},
-        ReverseStatement: {"reverse"},
-        ImportStatement: {"import"},
-    }
+    """Pick the candidate a statement runs as.
+
+    The choice only depends on what the keyword names of the candidates are
+    bound to, so it is cached for each statement and reused until one of
+    those names is rebound (see Keyword Versions in scope.py).
+    """
+    cached = statement_type_cache.get(id(possible_statements))
+    if (
+        cached is not None
+        and cached[1] == ScopeChain.version
+        and cached[2] is namespaces.bound_names
+        and cached[0] is possible_statements
+    ):
+        return cached[3]
+
+    keyword_names = get_statement_keyword_names(possible_statements)
+    ScopeChain.watched_names.update(keyword_names)
+    version = ScopeChain.version
+    statement = resolve_statement_type(possible_statements, namespaces)
+
+    # names bound above the root depend on the caller, and variables can
+    # change value without being rebound, so only plain root names are cached
+    root_namespace = namespaces.root_namespace
+    if all(
+        name not in namespaces.bound_names
+        and (
+            (v := root_namespace.get(name)) is None
+            or (isinstance(v, Name) and not isinstance(v.value, GulfOfMexicoPromise))
+        )
+        for name in keyword_names
+    ):
+        statement_type_cache[id(possible_statements)] = (
+            possible_statements,
+            version,
+            namespaces.bound_names,
+            statement,
+        )
+    return statement
+
 
+def get_statement_keyword_names(
+    possible_statements: tuple[CodeStatement, ...],
+) -> set[str]:
+    """The names that decide which candidate of a statement runs."""
+    names: set[str] = set()
+    for st in possible_statements:
+        if isinstance(st, CodeStatementKeywordable):
+            names.add(st.keyword.value)
+        elif isinstance(st, ReturnStatement):
+            if st.keyword is not None:
+                names.add(st.keyword.value)
+        elif isinstance(st, FunctionDefinition):
+            names.update(keyword.value for keyword in st.keywords)
+        elif isinstance(st, VariableDeclaration):
+            names.update(modifier.value for modifier in st.modifiers)
+        elif isinstance(st, ExportStatement):
+            names.add(st.export_keyword.value)
+            names.add(st.to_keyword.value)
+    return names
+
+
+def resolve_statement_type(
+    possible_statements: tuple[CodeStatement, ...], namespaces: Namespaces
+) -> Optional[CodeStatement]:
     for st in possible_statements:
         if isinstance(st, CodeStatementKeywordable):
             val = get_name_from_namespaces(st.keyword.value, namespaces)
             if (
                 val is not None
                 and isinstance(val.value, GulfOfMexicoKeyword)
-                and val.value.value in instance_to_keywords[type(st)]
+                and val.value.value in STATEMENT_KEYWORDS[type(st)]
             ):
                 return st
         elif isinstance(st, ReturnStatement):
@@ -1891,7 +2037,7 @@ def determine_statement_type(
                 if (
                     val
                     and isinstance(val.value, GulfOfMexicoKeyword)
-                    and re.match(r"^f?u?n?c?t?i?o?n?$", val.value.value)
+                    and FUNCTION_KEYWORD.match(val.value.value)
                 ):
                     return st
             elif len(st.keywords) == 2:
@@ -1902,7 +2048,7 @@ def determine_statement_type(
                     and other_val
                     and isinstance(val.value, GulfOfMexicoKeyword)
                     and isinstance(other_val.value, GulfOfMexicoKeyword)
-                    and re.match(r"^f?u?n?c?t?i?o?n?$", other_val.value.value)
+                    and FUNCTION_KEYWORD.match(other_val.value.value)
                     and val.value.value == "async"
                 ):
                     return st
@@ -1964,77 +2110,122 @@ def determine_statement_type(
     return None
 
 
+def get_next_state(val: Optional[Union[Name, Variable]]) -> Optional[int]:
+    """What a next waits to change: how many values a name has had, or None
+    while it is undefined."""
+    return None if not val else len(v) if (v := getattr(val, "prev_values")) else 0
+
+
+def wait_for_new_values(
+    names: Collection[str], old_states: list[Optional[int]], namespaces: Namespaces
+) -> None:
+    """Block until each name has changed since old_states was taken.
+
+    Only the threads of the after statements can change them meanwhile; they
+    wake this one through Variable.changed, so waiting takes no CPU. If
+    there are none, nothing will ever change, and the program exits.
+    """
+    pending = [
+        (name, old_state)
+        for name, old_state in zip(names, old_states)
+        if get_next_state(get_name_from_namespaces(name, namespaces)) == old_state
+    ]
+    if not pending:
+        return
+    exit_on_dead_listener()
+
+    def all_changed() -> bool:
+        return all(
+            get_next_state(get_name_from_namespaces(name, namespaces)) != old_state
+            for name, old_state in pending
+        )
+
+    with Variable.changed:
+        Variable.waiting += 1
+        try:
+            Variable.changed.wait_for(all_changed)
+        finally:
+            Variable.waiting -= 1
+
+
+def first_value(v: Union[Name, Variable]) -> GulfOfMexicoValue:
+    """The first value of a name that was undefined when a next started
+    waiting for it. There was no history to pin then, so if it has changed
+    too often since, the oldest value still kept stands in for it."""
+    if isinstance(v, Name) or not v.prev_values:
+        return v.value
+    return v.prev_values.oldest_since(0)
+
+
 def adjust_for_normal_nexts(
     statement: CodeStatementWithExpression,
     async_nexts: set[str],
     normal_nexts: set[tuple[str, int]],
     promise: Optional[GulfOfMexicoPromise],
-    namespaces: list[Namespace],
+    namespaces: Namespaces,
     prev_namespace: Namespace,
 ):
 
-    old_async_vals, old_normal_vals = [], []
-    get_state_watcher = lambda val: (
-        None if not val else len(v) if (v := getattr(val, "prev_values")) else 0
-    )
-    for name in async_nexts:
-        old_async_vals.append(
-            get_state_watcher(get_name_from_namespaces(name, namespaces))
-        )
-    for name, _ in normal_nexts:
-        old_normal_vals.append(
-            get_state_watcher(get_name_from_namespaces(name, namespaces))
-        )
+    # the values at these states are read once they have changed, so they
+    # are kept until then, however many come after them
+    pinned: list[tuple[ValueHistory, int]] = []
 
-    # for each async one, wait until each one is different
-    for name, start_len in zip(async_nexts, old_async_vals):
-        curr_len = get_state_watcher(get_name_from_namespaces(name, namespaces))
-        while start_len == curr_len:
-            exit_on_dead_listener()
-            curr_len = get_state_watcher(get_name_from_namespaces(name, namespaces))
+    def pin_next_state(name: str) -> Optional[int]:
+        val = get_name_from_namespaces(name, namespaces)
+        state = get_next_state(val)
+        if isinstance(val, Variable) and state is not None:
+            val.prev_values.pin(state)
+            pinned.append((val.prev_values, state))
+        return state
 
-    # now, build a namespace for each one
-    new_namespace: Namespace = {}
-    for name, old_len in zip(async_nexts, old_async_vals):
-        v, ns = get_name_and_namespace_from_namespaces(name, namespaces)
-        if not v or not ns or (old_len is not None and not isinstance(v, Variable)):
-            raise_error_at_line(
-                filename,
-                code,
-                current_line,
-                "Something went wrong with accessing the next value of a variable.",
-            )
-        mod_name = get_modified_next_name(name, id(ns))
-        match old_len:
-            case None:
-                new_namespace[mod_name] = Name(
-                    mod_name, v.value if isinstance(v, Name) else v.prev_values[0]
+    old_async_vals = [pin_next_state(name) for name in async_nexts]
+    old_normal_vals = [pin_next_state(name) for name, _ in normal_nexts]
+    try:
+        # for each async one, wait until each one is different
+        wait_for_new_values(async_nexts, old_async_vals, namespaces)
+
+        # now, build a namespace for each one
+        new_namespace: Namespace = {}
+        for name, old_len in zip(async_nexts, old_async_vals):
+            v, ns = get_name_and_namespace_from_namespaces(name, namespaces)
+            if not v or not ns or (old_len is not None and not isinstance(v, Variable)):
+                raise_error_at_line(
+                    filename,
+                    code,
+                    current_line,
+                    "Something went wrong with accessing the next value of a variable.",
                 )
-            case i:
-                if not isinstance(v, Variable):
-                    raise_error_at_line(
-                        filename, code, current_line, "Something went wrong."
-                    )
-                new_namespace[mod_name] = Name(mod_name, v.prev_values[i])
+            mod_name = get_modified_next_name(name, id(ns))
+            match old_len:
+                case None:
+                    new_namespace[mod_name] = Name(mod_name, first_value(v))
+                case i:
+                    if not isinstance(v, Variable):
+                        raise_error_at_line(
+                            filename, code, current_line, "Something went wrong."
+                        )
+                    new_namespace[mod_name] = Name(mod_name, v.prev_values[i])
 
-    # now, adjust for any values that may have already been modified by next statements
-    for (name, ns_id), old_len in zip(normal_nexts, old_normal_vals):
-        new_len = get_state_watcher(v := get_name_from_namespaces(name, namespaces))
-        if v is None or new_len == old_len:
-            continue
-        mod_name = get_modified_next_name(name, ns_id)
-        normal_nexts.remove((name, ns_id))
-        match old_len:
-            case None:
-                new_namespace[mod_name] = Name(
-                    mod_name, v.value if isinstance(v, Name) else v.prev_values[0]
-                )
-            case i:
-                if not isinstance(v, Variable):
-                    raise_error_at_line(
-                        filename, code, current_line, "Something went wrong."
-                    )
-                new_namespace[mod_name] = Name(mod_name, v.prev_values[i])
+        # now, adjust for any values that may have already been modified by
+        # next statements
+        for (name, ns_id), old_len in zip([*normal_nexts], old_normal_vals):
+            new_len = get_next_state(v := get_name_from_namespaces(name, namespaces))
+            if v is None or new_len == old_len:
+                continue
+            mod_name = get_modified_next_name(name, ns_id)
+            normal_nexts.remove((name, ns_id))
+            match old_len:
+                case None:
+                    new_namespace[mod_name] = Name(mod_name, first_value(v))
+                case i:
+                    if not isinstance(v, Variable):
+                        raise_error_at_line(
+                            filename, code, current_line, "Something went wrong."
+                        )
+                    new_namespace[mod_name] = Name(mod_name, v.prev_values[i])
+    finally:
+        for history, state in pinned:
+            history.unpin(state)
 
     # the remaining values are still waiting on a result, add these to the list of name watchers
     # this new_namespace i am adding is purely for use in evaluation of expressions, and the code within
@@ -2044,30 +2235,23 @@ def adjust_for_normal_nexts(
         name_watchers[(name.split(".")[-1], ns_id)] = (
             statement,
             normal_nexts,
-            namespaces + [new_namespace | prev_namespace],
+            namespaces.push(new_namespace | prev_namespace),
             promise,
         )
 
 
 def wait_for_async_nexts(
-    async_nexts: set[str], namespaces: list[Namespace]
+    async_nexts: set[str], namespaces: Namespaces
 ) -> Namespace:
 
     old_async_vals = []
-    get_state_watcher = lambda val: (
-        None if not val else len(v) if (v := getattr(val, "prev_values")) else 0
-    )
     for name in async_nexts:
         old_async_vals.append(
-            get_state_watcher(get_name_from_namespaces(name, namespaces))
+            get_next_state(get_name_from_namespaces(name, namespaces))
         )
 
     # for each async one, wait until each one is different
-    for name, start_len in zip(async_nexts, old_async_vals):
-        curr_len = get_state_watcher(get_name_from_namespaces(name, namespaces))
-        while start_len == curr_len:
-            exit_on_dead_listener()
-            curr_len = get_state_watcher(get_name_from_namespaces(name, namespaces))
+    wait_for_new_values(async_nexts, old_async_vals, namespaces)
 
     # now, build a namespace for each one
     new_namespace: Namespace = {}
@@ -2085,9 +2269,16 @@ def wait_for_async_nexts(
     return new_namespace
 
 
+def forget_name_watcher(key: tuple[str, int], watcher: tuple) -> None:
+    """Drop watcher if it still waits on key, for a next whose promise is
+    gone."""
+    if name_watchers.get(key) is watcher:
+        del name_watchers[key]
+
+
 def interpret_name_watching_statement(
     statement: CodeStatementWithExpression,
-    namespaces: list[Namespace],
+    namespaces: Namespaces,
     promise: Optional[GulfOfMexicoPromise],
     async_statements: AsyncStatements,
     when_statement_watchers: WhenStatementWatchers,
@@ -2107,7 +2298,8 @@ def interpret_name_watching_statement(
         if isinstance(statement, VariableAssignment)
         else []
     )
-    namespaces.pop()  # remove expired namespace  -- THIS IS INCREDIBLY IMPORTANT
+    # remove expired namespace  -- THIS IS INCREDIBLY IMPORTANT
+    namespaces = namespaces.parent  # type: ignore[assignment]
 
     match statement:
         case ReturnStatement():
@@ -2151,38 +2343,69 @@ def interpret_name_watching_statement(
 
 
 def clear_temp_namespace(
-    namespaces: list[Namespace], temp_namespace: Namespace
+    namespaces: Namespaces, temp_namespace: Namespace
 ) -> None:
     for key in temp_namespace:
         del namespaces[-1][key]
+        ScopeChain.binding_changed(key)
 
 
 # simply execute the conditional inside a new scope
 def execute_conditional(
     condition: GulfOfMexicoValue,
     statements_inside_scope: list[tuple[CodeStatement, ...]],
-    namespaces: list[Namespace],
+    namespaces: Namespaces,
     when_statement_watchers: WhenStatementWatchers,
     importable_names: dict[str, dict[str, GulfOfMexicoValue]],
     exported_names: list[tuple[str, str, GulfOfMexicoValue]],
+    *,
+    in_tail_position: bool = False,
 ) -> Optional[GulfOfMexicoValue]:
-    condition = db_to_boolean(condition)
-    execute = (
-        condition.value == True
-        if condition.value is not None
-        else random.random() < 0.50
-    )
-    if execute:
+    if is_condition_met(condition):
         return interpret_code_statements(
             statements_inside_scope,
-            namespaces + [{}],
+            namespaces.push(),
             [],
-            when_statement_watchers + [{}],
+            when_statement_watchers.push(),
             importable_names,
             exported_names,
+            in_tail_position=in_tail_position,
         )  # empty scope and async statements, just for this :)
 
 
+def execute_batch_statement(
+    statements_inside_scope: list[tuple[CodeStatement, ...]],
+    namespaces: Namespaces,
+    async_statements: AsyncStatements,
+    when_statement_watchers: WhenStatementWatchers,
+    importable_names: dict[str, dict[str, GulfOfMexicoValue]],
+    exported_names: list[tuple[str, str, GulfOfMexicoValue]],
+) -> Optional[GulfOfMexicoValue]:
+    """Run a batch body in a new scope, holding back the when statements it
+    sets off until it ends; then each of them runs once."""
+    with when_graph.batch():
+        result = interpret_code_statements(
+            statements_inside_scope,
+            namespaces.push(),
+            [],
+            when_statement_watchers.push(),
+            importable_names,
+            exported_names,
+        )
+    flush_when_watchers(async_statements, when_statement_watchers)
+    return result
+
+
+def is_condition_met(condition: GulfOfMexicoValue) -> bool:
+    """Whether an if body runs. A maybe runs it half of the time."""
+    condition = db_to_boolean(condition)
+    return (
+        condition.value == True
+        if condition.value is not None
+        else random.random() < 0.50
+    )
+
+
 # this is the equaivalent of an event listener
 def get_mouse_event_object(
     x: int, y: int, button: mouse.Button, event: str
@@ -2213,7 +2436,7 @@ def get_keyboard_event_object(
 def execute_after_statement(
     event: GulfOfMexicoValue,
     statements_inside_scope: list[tuple[CodeStatement, ...]],
-    namespaces: list[Namespace],
+    namespaces: Namespaces,
     when_statement_watchers: WhenStatementWatchers,
     importable_names: dict[str, dict[str, GulfOfMexicoValue]],
     exported_names: list[tuple[str, str, GulfOfMexicoValue]],
@@ -2261,7 +2484,7 @@ def execute_after_statement(
                                 }
                             ],
                             [],
-                            when_statement_watchers + [{}],
+                            when_statement_watchers.push(),
                             importable_names,
                             exported_names,
                         )
@@ -2286,7 +2509,7 @@ def execute_after_statement(
                             }
                         ],
                         [],
-                        when_statement_watchers + [{}],
+                        when_statement_watchers.push(),
                         importable_names,
                         exported_names,
                     )
@@ -2310,7 +2533,7 @@ def execute_after_statement(
                             }
                         ],
                         [],
-                        when_statement_watchers + [{}],
+                        when_statement_watchers.push(),
                         importable_names,
                         exported_names,
                     )
@@ -2328,7 +2551,7 @@ def execute_after_statement(
                 nonlocal namespaces, statements_inside_scope
                 if key in keys:
                     event_object = get_keyboard_event_object(key.char if isinstance(key, keyboard.KeyCode) else key, event.value)  # type: ignore
-                    interpret_code_statements(statements_inside_scope, namespaces + [{"event": Name("event", event_object)}], [], when_statement_watchers + [{}], importable_names, exported_names)  # type: ignore
+                    interpret_code_statements(statements_inside_scope, namespaces.push({"event": Name("event", event_object)}), [], when_statement_watchers.push(), importable_names, exported_names)  # type: ignore
                 keys.discard(key)
 
             listener = keyboard.Listener(on_press=on_press, on_release=on_release)  # type: ignore
@@ -2340,9 +2563,9 @@ def execute_after_statement(
                 event_object = get_keyboard_event_object(key.char if isinstance(key, keyboard.KeyCode) else key, event.value)  # type: ignore
                 interpret_code_statements(
                     statements_inside_scope,
-                    namespaces + [{"event": Name("event", event_object)}],
+                    namespaces.push({"event": Name("event", event_object)}),
                     [],
-                    when_statement_watchers + [{}],
+                    when_statement_watchers.push(),
                     importable_names,
                     exported_names,
                 )
@@ -2356,9 +2579,9 @@ def execute_after_statement(
                 event_object = get_keyboard_event_object(key.char if isinstance(key, keyboard.KeyCode) else key, event.value)  # type: ignore
                 interpret_code_statements(
                     statements_inside_scope,
-                    namespaces + [{"event": Name("event", event_object)}],
+                    namespaces.push({"event": Name("event", event_object)}),
                     [],
-                    when_statement_watchers + [{}],
+                    when_statement_watchers.push(),
                     importable_names,
                     exported_names,
                 )
@@ -2401,27 +2624,137 @@ def gather_names_or_values(expr: ExpressionTreeNode) -> set[Token]:
     return names
 
 
+# id of a condition or body -> (it, the names it uses), see gather_free_names
+free_names_cache: dict[int, tuple[object, frozenset[str]]] = {}
+tree_caches.append(free_names_cache)
+
+
+def gather_free_names(code: object) -> frozenset[str]:
+    """Every name a condition or body (or any part of one) reads or writes.
+
+    Names bound inside the code are included too; they only cost a lookup
+    when the code is captured. The result is cached per tree (see
+    tree_caches), and trees are never changed, so this is done once for each
+    when statement.
+    """
+    if (cached := free_names_cache.get(id(code))) is not None and cached[0] is code:
+        return cached[1]
+    names: set[str] = set()
+    pending = [code]
+    while pending:
+        match part := pending.pop():
+            case Token(type=TokenType.NAME):
+                names.add(part.value.split(".")[0])
+            case Token(type=TokenType.STRING):
+                for expr in compile_string_template(part.value).expressions:
+                    if not isinstance(expr, str):
+                        pending.append(expr)
+                        continue
+                    try:  # its tree does not build, but its names still count
+                        pending.extend(db_tokenize(filename, expr))
+                    except InterpretationError:
+                        pass  # not code at all, such as an unmatched quote
+            case ValueNode():
+                pending.append(part.name_or_value)
+            case FunctionNode():  # not method_call, which can be the node itself
+                pending.append(part.name)
+                pending.extend(part.args)
+            case ExpressionTreeNode() | CodeStatement():
+                pending.extend(vars(part).values())
+            case list() | tuple():
+                pending.extend(part)
+    free = frozenset(names)
+    free_names_cache[id(code)] = (code, free)
+    return free
+
+
+written_names_cache: dict[int, tuple[object, frozenset[str]]] = {}
+tree_caches.append(written_names_cache)
+
+
+def gather_written_names(code: object) -> frozenset[str]:
+    """The names a body assigns or calls a method on, and the functions it
+    calls, which can change the others. Cached like gather_free_names."""
+    if (cached := written_names_cache.get(id(code))) is not None and cached[0] is code:
+        return cached[1]
+    names: set[str] = set()
+    pending = [code]
+    while pending:
+        match part := pending.pop():
+            case VariableAssignment():
+                names.add(part.name.value.split(".")[0])
+                pending.extend(vars(part).values())
+            case FunctionNode():
+                if isinstance(part.name, Token):
+                    names.add(part.name.value.split(".")[0])
+                pending.extend(part.args)
+            case ExpressionTreeNode() | CodeStatement():
+                pending.extend(vars(part).values())
+            case list() | tuple():
+                pending.extend(part)
+    written = frozenset(names)
+    written_names_cache[id(code)] = (code, written)
+    return written
+
+
+def capture_when_scope(
+    condition: ExpressionTreeNode,
+    statements_inside_scope: list[tuple[CodeStatement, ...]],
+    namespaces: Namespaces,
+) -> Namespaces:
+    """The scope a when statement's watcher runs in.
+
+    Only the root namespace and the scopes binding a name the condition or
+    body uses are kept, shared and not copied, so registering costs O(free
+    names) and the watcher sees the variables as they change. GOM is
+    dynamically scoped, so the names used by the functions they call count.
+    """
+    if namespaces.parent is None:
+        return namespaces
+    root = namespaces.root_namespace
+    kept: set[int] = set()
+    seen: set[str] = set()
+    pending = [
+        *gather_free_names(condition),
+        *gather_free_names(statements_inside_scope),
+    ]
+    while pending:
+        if (name := pending.pop()) in seen:
+            continue
+        seen.add(name)
+        binding, namespace = namespaces.lookup_with_namespace(name)
+        if binding is None:
+            continue
+        if namespace is not root:
+            kept.add(id(namespace))
+        if isinstance(binding, Variable) and not binding.lifetimes:
+            continue
+        if isinstance(binding.value, GulfOfMexicoFunction):
+            pending.extend(gather_free_names(binding.value.code))
+    return namespaces.keep_only(kept)
+
+
 def register_when_statement(
     condition: Union[list[Token], ExpressionTreeNode],
     statements_inside_scope: list[tuple[CodeStatement, ...]],
-    namespaces: list[Namespace],
+    namespaces: Namespaces,
     async_statements: AsyncStatements,
     when_statement_watchers: WhenStatementWatchers,
     importable_names: dict[str, dict[str, GulfOfMexicoValue]],
     exported_names: list[tuple[str, str, GulfOfMexicoValue]],
 ):
 
-    # if it is a variable, store it as the address to that variable.
-    # if the internal value is a list, store it as an address to that mutable type.
+    # if it is a variable, depend on that variable.
+    # if the internal value is a list, depend on that mutable value too.
     built_condition = get_built_expression(condition)
     gathered_names = gather_names_or_values(built_condition)
     caller_names = [
         n for name in gathered_names if (n := ".".join(name.value.split(".")[:-1]))
     ]
-    dict_keys = (
+    dependencies = (
         [
             (
-                id(v)
+                v
                 if isinstance(
                     v := get_name_from_namespaces(name.value, namespaces), Variable
                 )
@@ -2430,18 +2763,18 @@ def register_when_statement(
             for name in gathered_names
         ]
         + [
-            id(v.value)
+            v.value
             for name in gathered_names
             if (v := get_name_from_namespaces(name.value, namespaces)) is not None
             and isinstance(v.value, GulfOfMexicoMutable)
         ]
         + [
-            id(v)
+            v
             for name in caller_names
             if isinstance(v := get_name_from_namespaces(name, namespaces), Variable)
         ]
         + [
-            id(v.value)
+            v.value
             for name in caller_names
             if (v := get_name_from_namespaces(name, namespaces)) is not None
             and isinstance(v.value, GulfOfMexicoMutable)
@@ -2450,24 +2783,16 @@ def register_when_statement(
     # the last comprehension watches callers of things (like list in list.length), and requires some implementation in the evaluate_expression function
     # so that the caller of a function is also observed for it being called
 
-    # register for future whens
-    for name in dict_keys:
-        if name not in when_statement_watchers[-1]:
-            when_statement_watchers[-1][name] = []
-        # store the built condition, the body, and a snapshot of the current
-        # namespaces so the watcher runs with the same scope when triggered.
-        captured_ns = deepcopy(namespaces)
-        # DEBUG: Print what we're capturing
-        try:
-            debug_keys = [list(ns.keys()) for ns in captured_ns]
-            debug_print_no_token(
-                filename, f"Capturing namespaces for when: {debug_keys}"
-            )
-        except Exception:
-            pass
-        when_statement_watchers[-1][name].append(
-            (built_condition, statements_inside_scope, captured_ns)
-        )
+    # register for future whens, to run in the scope the when was declared in
+    when_graph.declare(
+        when_statement_watchers,
+        WhenWatcher(
+            built_condition,
+            statements_inside_scope,
+            capture_when_scope(built_condition, statements_inside_scope, namespaces),
+        ),
+        dependencies,
+    )
 
     # check the condition now
     # Evaluate the condition immediately inside the same namespaces that the
@@ -2516,23 +2841,17 @@ def load_globals(
 
 
 def get_name_from_namespaces(
-    name: str, namespaces: list[Namespace]
+    name: str, namespaces: Namespaces
 ) -> Optional[Union[Variable, Name]]:
     """Get a name or variable from the namespaces, searching from most local to global."""
-    for namespace in reversed(namespaces):
-        if name in namespace:
-            return namespace[name]
-    return None
+    return namespaces.lookup(name)
 
 
 def get_name_and_namespace_from_namespaces(
-    name: str, namespaces: list[Namespace]
+    name: str, namespaces: Namespaces
 ) -> tuple[Optional[Union[Variable, Name]], Optional[Namespace]]:
     """Get a name or variable and its containing namespace from the namespaces."""
-    for namespace in reversed(namespaces):
-        if name in namespace:
-            return namespace[name], namespace
-    return None, None
+    return namespaces.lookup_with_namespace(name)  # type: ignore[return-value]
 
 
 def determine_non_name_value(name_or_value: Token) -> GulfOfMexicoValue:
@@ -2541,36 +2860,27 @@ def determine_non_name_value(name_or_value: Token) -> GulfOfMexicoValue:
         case TokenType.STRING:
             return GulfOfMexicoString(name_or_value.value)
         case TokenType.NAME:
-            # Try to parse as number
-            try:
-                # Check if it's an integer
-                if (
-                    "." not in name_or_value.value
-                    and "e" not in name_or_value.value.lower()
-                ):
-                    return GulfOfMexicoNumber(int(name_or_value.value))
-                else:
-                    return GulfOfMexicoNumber(float(name_or_value.value))
-            except ValueError:
-                # Not a number, check if it's a keyword or undefined
-                if name_or_value.value in ["true", "false", "maybe", "undefined"]:
-                    # Handle keywords not in KEYWORDS
-                    match name_or_value.value:
-                        case "true":
-                            return GulfOfMexicoBoolean(True)
-                        case "false":
-                            return GulfOfMexicoBoolean(False)
-                        case "maybe":
-                            return GulfOfMexicoBoolean(None)
-                        case "undefined":
-                            return GulfOfMexicoUndefined()
-                # If it's not a recognized literal, it's an undefined name
-                raise_error_at_token(
-                    filename,
-                    code,
-                    f"Undefined name: {name_or_value.value}",
-                    name_or_value,
-                )
+            if (number := decode_number(name_or_value.value)) is not None:
+                return db_number(number)
+            # Not a number, check if it's a keyword or undefined
+            if name_or_value.value in ["true", "false", "maybe", "undefined"]:
+                # Handle keywords not in KEYWORDS
+                match name_or_value.value:
+                    case "true":
+                        return TRUE
+                    case "false":
+                        return FALSE
+                    case "maybe":
+                        return MAYBE
+                    case "undefined":
+                        return UNDEFINED
+            # If it's not a recognized literal, it's an undefined name
+            raise_error_at_token(
+                filename,
+                code,
+                f"Undefined name: {name_or_value.value}",
+                name_or_value,
+            )
         case _:
             raise_error_at_token(
                 filename,
@@ -2587,8 +2897,11 @@ code: str = ""
 # Global variable for current line
 current_line: int = 0
 
-# Set of deleted values
-deleted_values: set[GulfOfMexicoValue] = set()
+# Values deleted by the running program, see gulfofmexico/deletion.py. Like
+# lifetime_expiry and the scheduler stats, it is module state that
+# start_program() clears: the engines run one program at a time and share no
+# per-program object to keep it on, so no program sees another's deletions.
+deleted_values = DeletedValues()
 
 # Global watchers for reactive programming
 name_watchers: NameWatchers = {}
@@ -2597,6 +2910,47 @@ after_listeners: list = []
 # Global flags
 is_lifetime_temporal: bool = False
 
+# Execution engine. "interpreter" walks the syntax tree in this module; any
+# other engine is set with set_engine, which installs its statement runner.
+ENGINES = ("interpreter", "closures", "vm")
+engine: str = "interpreter"
+engine_runner: Optional[EngineRunner] = None
+
+
+def set_engine(name: str) -> None:
+    """Select the engine that runs code statements from now on."""
+    global engine, engine_runner
+    if name not in ENGINES:
+        raise ValueError(
+            f"Unknown engine {name!r}, expected one of: {', '.join(ENGINES)}"
+        )
+    if name == "closures":
+        from gulfofmexico.closures import interpret_code_statements_compiled
+
+        engine_runner = interpret_code_statements_compiled
+    elif name == "vm":
+        from gulfofmexico.vm.machine import interpret_code_statements_vm
+
+        engine_runner = interpret_code_statements_vm
+    else:
+        engine_runner = None
+    engine = name
+
+
+def clear_tree_caches() -> None:
+    """Let go of the trees cached for earlier code, see tree_caches."""
+    for cache in tree_caches:
+        cache.clear()
+
+
+def start_program() -> None:
+    """Forget what the programs run before in this process left behind.
+    Called by everything that starts one: run_file, -c and the REPL."""
+    clear_tree_caches()
+    lifetime_expiry.clear()
+    deleted_values.clear()
+    scheduler_stats.reset()
+
 
 def exit_on_dead_listener() -> None:
     """Exit if there are no active listeners remaining."""
@@ -2606,33 +2960,203 @@ def exit_on_dead_listener() -> None:
 
 def interpret_code_statements_main_wrapper(
     statements: list[tuple[CodeStatement, ...]],
-    namespaces: list[Namespace],
+    namespaces: Union[Namespaces, list[Namespace]],
     async_statements: AsyncStatements,
-    when_statement_watchers: WhenStatementWatchers,
+    when_statement_watchers: Union[WhenStatementWatchers, list[dict]],
     importable_names: dict[str, dict[str, GulfOfMexicoValue]],
     exported_names: list[tuple[str, str, GulfOfMexicoValue]],
 ) -> Optional[GulfOfMexicoValue]:
-    """Main wrapper for interpreting code statements."""
+    """Main wrapper for interpreting code statements.
+
+    Callers may pass plain lists for the namespaces and when statement watchers;
+    they are chained into ScopeChains, sharing the same dicts.
+    """
     return interpret_code_statements(
         statements,
-        namespaces,
+        ScopeChain.from_list(namespaces),
         async_statements,
-        when_statement_watchers,
+        ScopeChain.from_list(when_statement_watchers),
         importable_names,
         exported_names,
     )
 
 
+def get_statement_line(statement: CodeStatement) -> Optional[int]:
+    """The line a statement reports errors at, if it has a name or keyword token."""
+    if hasattr(statement, "name") and hasattr(statement.name, "line"):
+        return statement.name.line
+    elif hasattr(statement, "keyword") and hasattr(statement.keyword, "line"):
+        return statement.keyword.line
+    return None
+
+
+def declare_function(statement: FunctionDefinition, namespaces: Namespaces) -> None:
+    """Bind a function definition in the innermost scope."""
+    func = GulfOfMexicoFunction(
+        [arg.value for arg in statement.args],
+        statement.code,
+        statement.is_async,
+    )
+    namespaces.declare(
+        statement.name.value,
+        Variable(
+            statement.name.value,
+            [VariableLifetime(func, 100000000000, 0, True, True)],
+            [],
+        ),
+    )
+
+
+def declare_class(
+    statement: ClassDeclaration,
+    namespaces: Namespaces,
+    async_statements: AsyncStatements,
+    when_statement_watchers: WhenStatementWatchers,
+    importable_names: dict[str, dict[str, GulfOfMexicoValue]],
+    exported_names: list[tuple[str, str, GulfOfMexicoValue]],
+) -> None:
+    """Run a class body in a new scope and bind the class in the innermost scope."""
+    # Create a class object (simplified for now)
+    class_obj = GulfOfMexicoObject(statement.name.value, {})
+    # Execute the class body in a new scope
+    class_namespace = {statement.name.value: Name(statement.name.value, class_obj)}
+    interpret_code_statements(
+        statement.code,
+        namespaces.push(class_namespace),
+        async_statements,
+        when_statement_watchers.push(),
+        importable_names,
+        exported_names,
+    )
+    # Add the class to the namespace
+    namespaces.declare(statement.name.value, Name(statement.name.value, class_obj))
+
+
+def execute_delete_statement(statement: DeleteStatement, namespaces: Namespaces) -> None:
+    """Mark the value of a name as deleted and remove the name."""
+    var, ns = get_name_and_namespace_from_namespaces(statement.name.value, namespaces)
+    if var and isinstance(var, Variable):
+        deleted_values.add(var.value)
+        if ns:
+            del ns[statement.name.value]
+            ScopeChain.binding_changed(statement.name.value)
+
+
+def execute_reverse_statement(
+    statement: ReverseStatement, namespaces: Namespaces
+) -> None:
+    """Reverse operation - reverses lists and strings in-place."""
+    var, ns = get_name_and_namespace_from_namespaces(statement.name.value, namespaces)
+    if var is None:
+        raise_error_at_token(
+            filename,
+            code,
+            f"Cannot reverse undefined name: {statement.name.value}",
+            statement.name,
+        )
+
+    value = var.value if isinstance(var, Name) else var.value
+
+    if isinstance(value, GulfOfMexicoList):
+        # Reverse list in-place
+        value.own_storage()
+        value.values.reverse()
+    elif isinstance(value, GulfOfMexicoString):
+        # Reverse string - create new reversed string
+        reversed_str = value.value[::-1]
+        new_value = GulfOfMexicoString(reversed_str)
+        if isinstance(var, Variable):
+            var.add_lifetime(
+                new_value,
+                0,  # confidence 0 for auto-generated
+                100000000000,  # infinite duration
+                var.can_be_reset,
+                var.can_edit_value,
+            )
+        elif isinstance(var, Name):
+            var.value = new_value
+    else:
+        raise_error_at_token(
+            filename,
+            code,
+            f"Cannot reverse type {type(value).__name__}. Only lists and strings can be reversed.",
+            statement.name,
+        )
+
+
+def execute_import_statement(
+    statement: ImportStatement,
+    namespaces: Namespaces,
+    importable_names: dict[str, dict[str, GulfOfMexicoValue]],
+) -> None:
+    """Bind each imported name, searching every file that exported names."""
+    for name_token in statement.names:
+        name = name_token.value
+        found = False
+        for file_dict in importable_names.values():
+            if name in file_dict:
+                namespaces.declare(name, Name(name, file_dict[name]))
+                found = True
+                break
+        if not found:
+            raise_error_at_token(
+                filename,
+                code,
+                f"Cannot find imported name: {name}",
+                name_token,
+            )
+
+
+def execute_export_statement(
+    statement: ExportStatement,
+    namespaces: Namespaces,
+    exported_names: list[tuple[str, str, GulfOfMexicoValue]],
+) -> None:
+    """Queue each exported name for its target file."""
+    for name_token in statement.names:
+        name = name_token.value
+        v = get_name_from_namespaces(name, namespaces)
+        if v is None:
+            raise_error_at_token(
+                filename,
+                code,
+                f"Cannot export undefined name: {name}",
+                name_token,
+            )
+        value = v.value if isinstance(v, Name) else v.value
+        target = statement.target_file.value
+        exported_names.append((target, name, value))
+
+
 def interpret_code_statements(
     statements: list[tuple[CodeStatement, ...]],
-    namespaces: list[Namespace],
+    namespaces: Namespaces,
     async_statements: AsyncStatements,
     when_statement_watchers: WhenStatementWatchers,
     importable_names: dict[str, dict[str, GulfOfMexicoValue]],
     exported_names: list[tuple[str, str, GulfOfMexicoValue]],
+    *,
+    in_tail_position: bool = False,
 ) -> Optional[GulfOfMexicoValue]:
-    """Interpret a list of code statements."""
+    """Interpret a list of code statements.
+
+    in_tail_position is set for the body of a function: whatever the block
+    results in is what the call returns, so a call of a GOM function in tail
+    position is not made here but returned as a TailCall.
+    """
+    if engine_runner is not None:
+        return engine_runner(
+            statements,
+            namespaces,
+            async_statements,
+            when_statement_watchers,
+            importable_names,
+            exported_names,
+            in_tail_position=in_tail_position,
+        )
+
     result = None
+    last_statement = statements[-1] if in_tail_position and statements else None
 
     # Process each statement
     for statement_tuple in statements:
@@ -2640,17 +3164,30 @@ def interpret_code_statements(
         statement = determine_statement_type(statement_tuple, namespaces)
         if statement is None:
             continue
+        lifetime_expiry.tick()
 
         # Update current line for error reporting
         global current_line
-        if hasattr(statement, "name") and hasattr(statement.name, "line"):
-            current_line = statement.name.line
-        elif hasattr(statement, "keyword") and hasattr(statement.keyword, "line"):
-            current_line = statement.keyword.line
+        if (line := get_statement_line(statement)) is not None:
+            current_line = line
 
         # Execute the statement based on its type
         match statement:
             case ExpressionStatement():
+                if (
+                    statement_tuple is last_statement
+                    and not statement.debug
+                    and not async_statements
+                    and (
+                        tail_call := make_tail_call(
+                            statement.expression,
+                            namespaces,
+                            async_statements,
+                            when_statement_watchers,
+                        )
+                    )
+                ):
+                    return tail_call
                 result = evaluate_expression(
                     statement.expression,
                     namespaces,
@@ -2705,6 +3242,19 @@ def interpret_code_statements(
                 )
 
             case ReturnStatement():
+                if (
+                    in_tail_position
+                    and not statement.debug
+                    and (
+                        tail_call := make_tail_call(
+                            statement.expression,
+                            namespaces,
+                            async_statements,
+                            when_statement_watchers,
+                        )
+                    )
+                ):
+                    return tail_call
                 result = evaluate_expression(
                     statement.expression,
                     namespaces,
@@ -2726,6 +3276,8 @@ def interpret_code_statements(
                     async_statements,
                     when_statement_watchers,
                 )
+                # an if at the end of a function body returns what its body
+                # returns, so its body is in tail position too
                 result = execute_conditional(
                     condition,
                     statement.code,
@@ -2733,6 +3285,18 @@ def interpret_code_statements(
                     when_statement_watchers,
                     importable_names,
                     exported_names,
+                    in_tail_position=statement_tuple is last_statement
+                    and not async_statements,
+                )
+
+            case BatchStatement():
+                result = execute_batch_statement(
+                    statement.code,
+                    namespaces,
+                    async_statements,
+                    when_statement_watchers,
+                    importable_names,
+                    exported_names,
                 )
 
             case WhenStatement():
@@ -2763,143 +3327,62 @@ def interpret_code_statements(
                 )
 
             case FunctionDefinition():
-                # Create the function object
-                func = GulfOfMexicoFunction(
-                    [arg.value for arg in statement.args],
-                    statement.code,
-                    statement.is_async,
-                )
-                # Add to namespace
-                namespaces[-1][statement.name.value] = Variable(
-                    statement.name.value,
-                    [VariableLifetime(func, 100000000000, 0, True, True)],
-                    [],
-                )
+                declare_function(statement, namespaces)
 
             case ClassDeclaration():
-                # Create a class object (simplified for now)
-                class_obj = GulfOfMexicoObject(statement.name.value, {})
-                # Execute the class body in a new scope
-                class_namespace = {
-                    statement.name.value: Name(statement.name.value, class_obj)
-                }
-                interpret_code_statements(
-                    statement.code,
-                    namespaces + [class_namespace],
+                declare_class(
+                    statement,
+                    namespaces,
                     async_statements,
-                    when_statement_watchers + [{}],
+                    when_statement_watchers,
                     importable_names,
                     exported_names,
                 )
-                # Add the class to the namespace
-                namespaces[-1][statement.name.value] = Name(
-                    statement.name.value, class_obj
-                )
 
             case DeleteStatement():
-                # Mark value as deleted
-                var, ns = get_name_and_namespace_from_namespaces(
-                    statement.name.value, namespaces
-                )
-                if var and isinstance(var, Variable):
-                    deleted_values.add(var.value)
-                    if ns:
-                        del ns[statement.name.value]
+                execute_delete_statement(statement, namespaces)
 
             case ReverseStatement():
-                # Reverse operation - reverses lists and strings in-place
-                var, ns = get_name_and_namespace_from_namespaces(
-                    statement.name.value, namespaces
-                )
-                if var is None:
-                    raise_error_at_token(
-                        filename,
-                        code,
-                        f"Cannot reverse undefined name: {statement.name.value}",
-                        statement.name,
-                    )
-
-                value = var.value if isinstance(var, Name) else var.value
-
-                if isinstance(value, GulfOfMexicoList):
-                    # Reverse list in-place
-                    value.values.reverse()
-                    value.create_namespace()
-                elif isinstance(value, GulfOfMexicoString):
-                    # Reverse string - create new reversed string
-                    reversed_str = value.value[::-1]
-                    new_value = GulfOfMexicoString(reversed_str)
-                    if isinstance(var, Variable):
-                        var.add_lifetime(
-                            new_value,
-                            0,  # confidence 0 for auto-generated
-                            100000000000,  # infinite duration
-                            var.can_be_reset,
-                            var.can_edit_value,
-                        )
-                    elif isinstance(var, Name):
-                        var.value = new_value
-                else:
-                    raise_error_at_token(
-                        filename,
-                        code,
-                        f"Cannot reverse type {type(value).__name__}. Only lists and strings can be reversed.",
-                        statement.name,
-                    )
+                execute_reverse_statement(statement, namespaces)
 
             case ImportStatement():
-                for name_token in statement.names:
-                    name = name_token.value
-                    found = False
-                    for file_dict in importable_names.values():
-                        if name in file_dict:
-                            namespaces[-1][name] = Name(name, file_dict[name])
-                            found = True
-                            break
-                    if not found:
-                        raise_error_at_token(
-                            filename,
-                            code,
-                            f"Cannot find imported name: {name}",
-                            name_token,
-                        )
+                execute_import_statement(statement, namespaces, importable_names)
 
             case ExportStatement():
-                for name_token in statement.names:
-                    name = name_token.value
-                    v = get_name_from_namespaces(name, namespaces)
-                    if v is None:
-                        raise_error_at_token(
-                            filename,
-                            code,
-                            f"Cannot export undefined name: {name}",
-                            name_token,
-                        )
-                    value = v.value if isinstance(v, Name) else v.value
-                    target = statement.target_file.value
-                    exported_names.append((target, name, value))
-
-    # Process async statements
-    while async_statements:
-        async_stmt = async_statements.pop(0)
-        (statements_list, async_namespaces, current_index, direction) = async_stmt
-
-        if current_index < len(statements_list):
-            # Execute the current statement
-            result = interpret_code_statements(
-                [statements_list[current_index]],
-                async_namespaces,
-                async_statements,
-                when_statement_watchers,
-                importable_names,
-                exported_names,
-            )
+                execute_export_statement(statement, namespaces, exported_names)
 
-            # Update index for next execution
-            new_index = current_index + (1 if direction == 1 else -1)
-            if 0 <= new_index < len(statements_list):
-                async_statements.append(
-                    (statements_list, async_namespaces, new_index, direction)
-                )
+    return run_async_statements(
+        async_statements,
+        when_statement_watchers,
+        importable_names,
+        exported_names,
+        result,
+    )
 
-    return result
+
+def run_async_statements(
+    async_statements: AsyncStatements,
+    when_statement_watchers: WhenStatementWatchers,
+    importable_names: dict[str, dict[str, GulfOfMexicoValue]],
+    exported_names: list[tuple[str, str, GulfOfMexicoValue]],
+    result: Optional[GulfOfMexicoValue],
+) -> Optional[GulfOfMexicoValue]:
+    """Run queued async statements, taking turns, until none are left (see
+    gulfofmexico/scheduler.py). A statement of theirs runs with the same
+    list, and the run it starts returns at once.
+
+    Returns the result of the last statement run, or result if none ran.
+    """
+    if not async_statements:
+        return result
+    return AsyncScheduler(async_statements).run(
+        lambda task: interpret_code_statements(
+            [task.statements[task.index]],
+            task.namespaces,
+            async_statements,
+            when_statement_watchers,
+            importable_names,
+            exported_names,
+        ),
+        result,
+    )
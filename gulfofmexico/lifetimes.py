@@ -0,0 +1,162 @@
+"""
+Expiry of Gulf of Mexico Variable Lifetimes
+
+A variable can be declared to last for a number of lines, or of seconds:
+
+    const const name<2> = "Luke"!
+    const const name<20s> = "Luke"!  (or <20.0>)
+
+Its lifetime then ends once that many statements have run after the
+declaration, or once that much time has passed, and the variable falls
+back to its next lifetime, or becomes undefined if it has none.
+
+Decrementing every lifetime after each statement, or comparing every one
+with the clock, would cost O(variables) per statement. Instead:
+
+Line Lifetimes:
+    Statements are counted by one epoch that only grows, and each lifetime
+    is put in a min-heap under the epoch it ends at. A statement only
+    compares the epoch with the top of the heap, and a lifetime costs
+    O(log n) once, when it ends.
+
+Temporal Lifetimes:
+    These are in a second min-heap, under the time they end at, which each
+    statement compares with the clock while the heap is not empty. A
+    variable also keeps the earliest time one of its lifetimes ends at
+    (Variable.expires_at), so reading it in the middle of a long statement
+    ends what is due then; reading a variable without one costs nothing
+    more.
+
+Variable Lifetime:
+    The heaps hold their variables and lifetimes weakly, so a lifetime that
+    ends far ahead does not keep a variable alive once its scope has ended;
+    the entry then ends nothing when it is due. The entries of lifetimes
+    that are gone are counted, and let go of as soon as they are half of
+    the heaps, the next time one is scheduled. start_program clears both
+    heaps, so nothing a program scheduled ends in the next one.
+
+Usage:
+    - lifetime_expiry.tick(): once before each statement, in every engine
+    - lifetime_expiry.schedule_lines(variable, lifetime, lines)
+    - lifetime_expiry.schedule_time(variable, lifetime)
+    - lifetime_expiry.clear(): forget every lifetime, before a new program
+"""
+
+from __future__ import annotations
+
+import heapq
+import weakref
+from itertools import count
+from time import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from gulfofmexico.builtin import Variable, VariableLifetime
+
+__all__ = ["LifetimeExpiry", "lifetime_expiry"]
+
+NEVER = float("inf")
+
+# (epoch or time it ends at, tie breaker, variable, lifetime); the tie breaker
+# means the references are never compared
+Entry = tuple[
+    float, int, "weakref.ref[Variable]", "weakref.ref[VariableLifetime]"
+]
+
+
+class LifetimeExpiry:
+    """The lifetimes that have not ended yet, see the module docstring."""
+
+    __slots__ = ("epoch", "lines", "next_line_expiry", "timers", "order", "dead")
+
+    def __init__(self) -> None:
+        self.epoch = 0  # how many statements have run
+        self.lines: list[Entry] = []
+        self.next_line_expiry: float = NEVER
+        self.timers: list[Entry] = []
+        self.order = count()
+        self.dead = 0  # how many entries have a lifetime that is gone
+
+    def tick(self) -> None:
+        """Count a statement, ending the lifetimes it outlasts."""
+        self.epoch += 1
+        if self.epoch >= self.next_line_expiry:
+            self.expire_lines()
+        if self.timers and time() >= self.timers[0][0]:
+            self.expire_timers()
+
+    def schedule_lines(
+        self, variable: Variable, lifetime: VariableLifetime, lines: int
+    ) -> None:
+        """End lifetime (one of variable's) once lines more statements ran."""
+        if self.dead * 2 > len(self):
+            self.prune()
+        expiry = self.epoch + max(lines, 0) + 1
+        heapq.heappush(self.lines, self.entry(expiry, variable, lifetime))
+        if expiry < self.next_line_expiry:
+            self.next_line_expiry = expiry
+
+    def schedule_time(self, variable: Variable, lifetime: VariableLifetime) -> None:
+        """End a temporal lifetime (one of variable's) once its time is up."""
+        if self.dead * 2 > len(self):
+            self.prune()
+        deadline = lifetime.creation_time + lifetime.temporal_duration
+        heapq.heappush(self.timers, self.entry(deadline, variable, lifetime))
+
+    def entry(
+        self, due: float, variable: Variable, lifetime: VariableLifetime
+    ) -> Entry:
+        return (
+            due,
+            next(self.order),
+            weakref.ref(variable),
+            weakref.ref(lifetime, self.count_dead),
+        )
+
+    def count_dead(self, _: object) -> None:
+        # called by the garbage collector, maybe in the middle of a heap
+        # operation, so the entry is only let go of by the next prune
+        self.dead += 1
+
+    def prune(self) -> None:
+        """Let go of the entries whose variable or lifetime is gone."""
+        self.dead = 0
+        for heap in (self.lines, self.timers):
+            heap[:] = [e for e in heap if e[2]() is not None and e[3]() is not None]
+            heapq.heapify(heap)
+        self.next_line_expiry = self.lines[0][0] if self.lines else NEVER
+
+    def expire_lines(self) -> None:
+        self.next_line_expiry = self.expire(self.lines, self.epoch)
+
+    def expire_timers(self) -> None:
+        self.expire(self.timers, time())
+
+    @staticmethod
+    def expire(heap: list, now: float) -> float:
+        """End the lifetimes of heap that are due by now, and return when
+        the next one is. The threads of after statements run statements
+        too, so an entry that is not due after all goes back."""
+        while heap and heap[0][0] <= now:
+            entry = heapq.heappop(heap)
+            if entry[0] > now:  # another thread took the one that was due
+                heapq.heappush(heap, entry)
+                break
+            variable, lifetime = entry[2](), entry[3]()
+            if variable is not None and lifetime is not None:
+                variable.end_lifetime(lifetime)
+        return heap[0][0] if heap else NEVER
+
+    def clear(self) -> None:
+        """Forget every lifetime, see Variable Lifetime."""
+        self.lines.clear()
+        self.next_line_expiry = NEVER
+        self.timers.clear()
+        self.dead = 0
+
+    def __len__(self) -> int:
+        return len(self.lines) + len(self.timers)
+
+
+# the lifetimes of the running program
+lifetime_expiry = LifetimeExpiry()
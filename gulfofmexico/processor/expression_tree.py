@@ -14,8 +14,9 @@ Node Types:
 
 Expression Building:
     build_expression_tree() converts token lists into trees using
-    operator precedence and parentheses grouping. The tree is then
-    evaluated by evaluate_expression() in interpreter.py.
+    operator precedence and parentheses grouping. generate_syntax_tree()
+    builds every statement's trees once, at parse time, and the interpreter
+    evaluates those same (immutable) trees on every execution.
 
 Operator Precedence (highest to lowest):
     1. Indexing: []
@@ -31,14 +32,17 @@ Operator Precedence (highest to lowest):
 
 Special Features:
     - Short-circuit evaluation for & and |
-    - String interpolation: "${expression}" within strings
+    - String interpolation: "${expression}" within strings, split into a
+      StringTemplate when the string's ValueNode is built
     - Approximate equality with fuzzy matching
     - Multiple equality levels (=, ==, ===, ====)
 """
 
 from __future__ import annotations
 from abc import ABCMeta, abstractmethod
-from typing import Optional
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from typing import Optional, Union
 
 from gulfofmexico.base import (
     STR_TO_OPERATOR,
@@ -49,10 +53,16 @@ from gulfofmexico.base import (
     InterpretationError,
     raise_error_at_token,
 )
+from gulfofmexico.processor.lexer import tokenize
 
 
 class ExpressionTreeNode(metaclass=ABCMeta):
-    """Base class for all expression tree nodes."""
+    """Base class for all expression tree nodes.
+
+    Trees are built once, when the syntax tree is generated, and are then
+    shared by every execution of the statement that owns them. Nodes are
+    therefore frozen: code that needs a different tree builds new nodes.
+    """
 
     @abstractmethod
     def to_string(self, tabs: int = 0) -> str:
@@ -60,6 +70,7 @@ class ExpressionTreeNode(metaclass=ABCMeta):
         pass
 
 
+@dataclass(frozen=True, eq=False)
 class SingleOperatorNode(ExpressionTreeNode):
     """Unary operator node (negation, logical not).
 
@@ -68,9 +79,8 @@ class SingleOperatorNode(ExpressionTreeNode):
         ; (semicolon): Logical NOT
     """
 
-    def __init__(self, expression: ExpressionTreeNode, operator: Token) -> None:
-        self.expression = expression
-        self.operator = operator
+    expression: ExpressionTreeNode
+    operator: Token
 
     def to_string(self, tabs: int = 0) -> str:
         return (
@@ -81,9 +91,12 @@ class SingleOperatorNode(ExpressionTreeNode):
         )
 
 
+@dataclass(frozen=True, eq=False)
 class ListNode(ExpressionTreeNode):
-    def __init__(self, values: list[ExpressionTreeNode]):
-        self.values = values
+    values: tuple[ExpressionTreeNode, ...]
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "values", tuple(self.values))
 
     def to_string(self, tabs: int = 0) -> str:
         return (
@@ -93,18 +106,12 @@ class ListNode(ExpressionTreeNode):
         )
 
 
+@dataclass(frozen=True, eq=False)
 class ExpressionNode(ExpressionTreeNode):
-    def __init__(
-        self,
-        left: ExpressionTreeNode,
-        right: ExpressionTreeNode,
-        operator: OperatorType,
-        operator_token: Token,
-    ):
-        self.left = left
-        self.right = right
-        self.operator = operator
-        self.operator_token = operator_token
+    left: ExpressionTreeNode
+    right: ExpressionTreeNode
+    operator: OperatorType
+    operator_token: Token
 
     def to_string(self, tabs: int = 0) -> str:
         return (
@@ -117,10 +124,30 @@ class ExpressionNode(ExpressionTreeNode):
         )
 
 
+@dataclass(frozen=True, eq=False)
 class FunctionNode(ExpressionTreeNode):
-    def __init__(self, name: Token, args: list[ExpressionTreeNode]):
-        self.name = name
-        self.args = args
+    name: Token
+    args: tuple[ExpressionTreeNode, ...]
+    # whether args already start with the imaginary "this" of a method call
+    has_receiver: bool = field(default=False, repr=False)
+    # for a.b(...): "a", and the call with a in front of the arguments, built
+    # once here so that no engine has to build it on every call
+    caller: Optional[str] = field(init=False, repr=False, default=None)
+    method_call: Optional[FunctionNode] = field(init=False, repr=False, default=None)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "args", tuple(self.args))
+        name = self.name
+        if not isinstance(name, Token) or "." not in name.value:
+            return
+        caller = name.value.rsplit(".", 1)[0]
+        object.__setattr__(self, "caller", caller)
+        if self.has_receiver:
+            method_call = self
+        else:
+            receiver = ValueNode(Token(TokenType.NAME, caller, name.line, name.col))
+            method_call = FunctionNode(name, (receiver, *self.args), True)
+        object.__setattr__(self, "method_call", method_call)
 
     def to_string(self, tabs: int = 0) -> str:
         return (
@@ -131,10 +158,10 @@ class FunctionNode(ExpressionTreeNode):
         )
 
 
+@dataclass(frozen=True, eq=False)
 class IndexNode(ExpressionTreeNode):
-    def __init__(self, value: ExpressionTreeNode, index: ExpressionTreeNode):
-        self.value = value
-        self.index = index
+    value: ExpressionTreeNode
+    index: ExpressionTreeNode
 
     def to_string(self, tabs: int = 0) -> str:
         return (
@@ -146,9 +173,108 @@ class IndexNode(ExpressionTreeNode):
         )
 
 
+def apply_escape_sequences(text: str) -> str:
+    """Replace the escape sequences of a string literal, one kind at a time."""
+    text = text.replace("\\n", "\n")
+    text = text.replace("\\t", "\t")
+    text = text.replace("\\r", "\r")
+    text = text.replace('\\"', '"')
+    text = text.replace("\\'", "'")
+    return text.replace("\\\\", "\\")
+
+
+@dataclass(frozen=True, eq=False)
+class StringTemplate:
+    """A string literal split at its ${} expressions.
+
+    literals holds the text around the expressions (one more than there are
+    expressions) as written, and escaped the same text with its escape
+    sequences replaced. An expression whose tree does not build is kept as its
+    source, so that the error is raised when the string is evaluated, like
+    before. unclosed is set when the last ${ has no closing }.
+    """
+
+    literals: tuple[str, ...]
+    escaped: tuple[str, ...]
+    expressions: tuple[Union[ExpressionTreeNode, str], ...]
+    unclosed: bool
+    # escapes never reach across a literal into an expression's value, so the
+    # escaped literals can be joined with values that contain no backslash
+    escapes_join: bool
+
+    def join(self, values: list[str], escaped: bool = False) -> str:
+        literals = self.escaped if escaped else self.literals
+        parts = [literals[0]]
+        for value, literal in zip(values, literals[1:]):
+            parts.append(value)
+            parts.append(literal)
+        return "".join(parts)
+
+
+def compile_string_template(string_value: str) -> StringTemplate:
+    """Split a string literal at its ${} expressions and build their trees."""
+    literals: list[str] = []
+    expressions: list[Union[ExpressionTreeNode, str]] = []
+    unclosed = False
+    start = i = 0
+    while (i := string_value.find("${", i)) != -1:
+        # find the closing }
+        j = i + 2
+        brace_count = 1
+        while j < len(string_value) and brace_count > 0:
+            if string_value[j] == "{":
+                brace_count += 1
+            elif string_value[j] == "}":
+                brace_count -= 1
+            j += 1
+        literals.append(string_value[start:i])
+        if brace_count > 0:
+            unclosed = True
+            break
+        expr_str = string_value[i + 2 : j - 1]
+        try:
+            expressions.append(build_expression_tree("", tokenize("", expr_str), ""))
+        except Exception:
+            expressions.append(expr_str)
+        start = i = j
+    else:
+        literals.append(string_value[start:])
+    return StringTemplate(
+        tuple(literals),
+        tuple(apply_escape_sequences(literal) for literal in literals),
+        tuple(expressions),
+        unclosed,
+        not any(literal.endswith("\\") for literal in literals[:-1]),
+    )
+
+
+def decode_number(text: str) -> Optional[Union[int, float]]:
+    """The number a name spells, like 42 or 3.14, or None if it is not one."""
+    try:
+        if "." not in text and "e" not in text.lower():
+            return int(text)
+        return float(text)
+    except ValueError:
+        return None
+
+
+@dataclass(frozen=True, eq=False)
 class ValueNode(ExpressionTreeNode):
-    def __init__(self, name_or_value: Token):
-        self.name_or_value = name_or_value
+    name_or_value: Token
+    # the split of a string literal, made once when the node is built
+    template: Optional[StringTemplate] = field(init=False, repr=False, default=None)
+    # the number a name like 42 spells, used while nothing is bound to the name
+    number: Optional[Union[int, float]] = field(init=False, repr=False, default=None)
+
+    def __post_init__(self) -> None:
+        token = self.name_or_value
+        if not isinstance(token, Token):
+            return
+        if token.type == TokenType.STRING:
+            template = compile_string_template(token.value)
+            object.__setattr__(self, "template", template)
+        elif token.type == TokenType.NAME:
+            object.__setattr__(self, "number", decode_number(token.value))
 
     def to_string(self, tabs: int = 0) -> str:
         return f"{'  ' * tabs}Value: {self.name_or_value}"
@@ -170,345 +296,407 @@ def get_expr_first_token(expr: ExpressionTreeNode) -> Optional[Token]:
             return get_expr_first_token(expr.value) or get_expr_first_token(expr.index)
 
 
-def build_expression_tree(
-    filename: str, tokens: list[Token], code: str
-) -> ExpressionTreeNode:
+class ExpressionTokens:
     """
-    This language has significant whitespace, so the biggest split happens where there is most space
-     - func a, b  +  c becomes func(a, b) + c but func a, b+c  becomes func(a, b + c)
-     - a + func   b  ,  c + d is not legal because it translates to (a + func)(b, c + d)
-     - 2 * 1+3 becomes 2 * (1 + 3)
+    Tables about the tokens of one expression, all filled in a single pass, that let
+    build_expression_tree work on (lo, hi) index ranges instead of slicing and
+    rescanning the token list for every subexpression.
     """
 
-    if not tokens:
-        # Empty expression returns undefined
-        return ValueNode(Token(TokenType.NAME, "undefined", 0, 0))
+    def __init__(self, filename: str, tokens: list[Token], code: str):
+        self.filename = filename
+        self.tokens = tokens
+        self.code = code
+
+        n = len(tokens)
+        self.ops: list[OperatorType | Token] = []
+        self.widths = [0] * (n + 1)  # length of the token if it is whitespace
+        self.depths = [0] * (n + 1)  # bracket depth right before each token
+        self.closing: dict[int, int] = {}  # index of "[" -> index of its "]"
+        self.opening: dict[int, int] = {}  # index of "]" -> index of its "["
+        self.commas: list[int] = []
+        self.commas_by_depth: dict[int, list[int]] = {}
+        self.operators_by_depth: dict[int, list[int]] = {}
+        self.next_non_whitespace = [n] * (n + 1)
+        self.prev_non_whitespace = [-1] * (n + 1)
+        self.next_invalid = [n] * (n + 1)  # tabs and newlines
+
+        unclosed: dict[int, int] = {}
+        depth, prev_non_whitespace = 0, -1
+        for i, token in enumerate(tokens):
+            op = STR_TO_OPERATOR.get(token.value, token)
+            self.ops.append(op)
+            self.depths[i] = depth
+            if token.type == TokenType.WHITESPACE:
+                self.widths[i] = len(token.value)
+            else:
+                prev_non_whitespace = i
+            self.prev_non_whitespace[i] = prev_non_whitespace
+
+            if token.type == TokenType.L_SQUARE:
+                unclosed[depth] = i
+                depth += 1
+            elif token.type == TokenType.R_SQUARE:
+                depth -= 1
+                if (start := unclosed.pop(depth, None)) is not None:
+                    self.closing[start] = i
+                    self.opening[i] = start
+            elif isinstance(op, OperatorType):
+                self.operators_by_depth.setdefault(depth, []).append(i)
+                if op == OperatorType.COM:
+                    self.commas.append(i)
+                    self.commas_by_depth.setdefault(depth, []).append(i)
+        self.depths[n] = depth
+
+        for i in reversed(range(n)):
+            token = tokens[i]
+            self.next_non_whitespace[i] = (
+                self.next_non_whitespace[i + 1]
+                if token.type == TokenType.WHITESPACE
+                else i
+            )
+            self.next_invalid[i] = (
+                i
+                if token.type == TokenType.WHITESPACE
+                and "\t" in token.value
+                or token.type == TokenType.NEWLINE
+                else self.next_invalid[i + 1]
+            )
 
-    # tabs at the beginning or end do not matter
-    for token in tokens[1:-1]:
-        if token.type == TokenType.WHITESPACE and "\t" in token.value:
-            raise_error_at_token(
-                filename, code, "Tabs are not allowed in expressions.", token
+        # filled in by get_operator_tables the first time a depth has to be searched
+        self.operator_tables: dict[
+            int, tuple[list[int], list[list[tuple[int, int]]]]
+        ] = {}
+
+    def get_operator_tables(
+        self, depth: int
+    ) -> tuple[list[int], list[list[tuple[int, int]]]]:
+        """
+        For the operators at a depth: the first unequally spaced operator at or after
+        each of them, and a sparse table to find the widest operator in any range.
+        """
+        if (tables := self.operator_tables.get(depth)) is not None:
+            return tables
+        positions = self.operators_by_depth[depth]
+        keys = [self.operator_key(i) for i in positions]
+        next_unequal = [len(positions)] * (len(positions) + 1)
+        for j in reversed(range(len(positions))):
+            next_unequal[j] = j if keys[j][0] == -2 else next_unequal[j + 1]
+        widest = [keys]
+        size = 1
+        while size * 2 <= len(keys):
+            prev = widest[-1]
+            widest.append(
+                [max(prev[j], prev[j + size]) for j in range(len(keys) - size * 2 + 1)]
             )
-        elif token.type == TokenType.NEWLINE:
+            size *= 2
+        self.operator_tables[depth] = next_unequal, widest
+        return next_unequal, widest
+
+    def operator_key(self, i: int) -> tuple[int, int]:
+        """
+        (width, index) of an operator with tokens on both sides, (-1, -1) if it is a
+        negative sign and (-2, -2) if the whitespace around it is not equal.
+        """
+        if i == 0 or i == len(self.tokens) - 1:
+            return (-1, -1)  # these are always either skipped or an error
+        op = self.ops[i]
+        if (
+            self.tokens[i - 1].type == TokenType.WHITESPACE
+            and self.tokens[i + 1].type != TokenType.WHITESPACE
+            and op == OperatorType.SUB
+        ):
+            return (-1, -1)
+        l_len, r_len = self.widths[i - 1], self.widths[i + 1]
+        if l_len != r_len and op != OperatorType.COM:
+            return (-2, -2)
+        return (r_len, i)
+
+    def find_widest_operator(self, lo: int, hi: int) -> tuple[int, int]:
+        """Returns the width and index of the operator to split at, or (-1, -1)."""
+        positions = self.operators_by_depth.get(self.depths[lo])
+        if not positions:
+            return -1, -1
+
+        # the first operator of the range is skipped, as it has to be a sign
+        start = bisect_right(positions, lo)
+        end = bisect_left(positions, hi - 1)
+        if start < end:
+            next_unequal, widest = self.get_operator_tables(self.depths[lo])
+            if (j := next_unequal[start]) < end:
+                raise_error_at_token(
+                    self.filename,
+                    self.code,
+                    "Whitespace must be equal on either side of an operator.",
+                    self.tokens[positions[j]],
+                )
+        if end < len(positions) and positions[end] == hi - 1 and hi - 1 > lo:
             raise_error_at_token(
-                filename,
-                code,
-                "Due to the laws of significant whitespace, no newline characters are permitted in expressions. If your code is so long that it needs newlines, consider rewriting it :)",
-                token,
+                self.filename,
+                self.code,
+                "Operator cannot be at the end of an expression.",
+                self.tokens[hi - 1],
             )
-
-    # create a new list consisting and tokens and a brand new type: the list
-    tokens_without_whitespace = [
-        token for token in tokens if token.type != TokenType.WHITESPACE
-    ]
-    if (
-        len(tokens_without_whitespace) == 2
-        and tokens_without_whitespace[0].type == TokenType.L_SQUARE
-        and tokens_without_whitespace[1].type == TokenType.R_SQUARE
-    ):
-        return ListNode([])  # easy way out xD
-    starts_with_whitespace = tokens[0].type == TokenType.WHITESPACE
-    ends_with_whitespace = tokens[-1].type == TokenType.WHITESPACE
-
-    # transform a list of tokens to include operators
-    # find the operator with the maximum whitespace between it and other things
-    updated_list = [STR_TO_OPERATOR.get(token.value, token) for token in tokens]
-    max_width, max_index = -1, -1
-    bracket_layers = 0
-    for i in range(len(updated_list)):
-        if tokens[i].type == TokenType.L_SQUARE:
-            bracket_layers += 1
-        elif tokens[i].type == TokenType.R_SQUARE:
-            bracket_layers -= 1
-        if isinstance(updated_list[i], OperatorType) and bracket_layers == 0:
-            try:
-
-                # first check for negative sign -- this is horrible :D
-                if (
-                    i == 0
-                    or tokens[i - 1].type == TokenType.WHITESPACE
-                    and tokens[i + 1].type != TokenType.WHITESPACE
-                    and updated_list[i] == OperatorType.SUB
-                ):  # l_len greater than zero no matter what fr
-                    continue
-
-                # make sure whitespace is equal and then determine maxes
-                l_len, r_len = 0, 0
-                if tokens[i - 1].type == TokenType.WHITESPACE:
-                    l_len = len(tokens[i - 1].value)
-                if tokens[i + 1].type == TokenType.WHITESPACE:
-                    r_len = len(tokens[i + 1].value)
-                if l_len != r_len and updated_list[i] != OperatorType.COM:
-                    raise_error_at_token(
-                        filename,
-                        code,
-                        "Whitespace must be equal on either side of an operator.",
-                        tokens[i],
-                    )
-                if r_len >= max_width:
-                    max_width = r_len
-                    max_index = i
-
-            except IndexError:
+        if start >= end:
+            return -1, -1
+
+        level = (end - start).bit_length() - 1
+        width, index = max(
+            widest[level][start], widest[level][end - (1 << level)]
+        )  # ties go to the rightmost operator
+        return (width, index) if width >= 0 else (-1, -1)
+
+    def get_non_whitespace(self, i: int, hi: int) -> Token:
+        """The first non-whitespace token at or after i, raising like a list would."""
+        if (i := self.next_non_whitespace[i]) >= hi:
+            raise IndexError("list index out of range")
+        return self.tokens[i]
+
+    def build(self, lo: int, hi: int) -> ExpressionTreeNode:
+        """Build the expression tree of tokens[lo:hi]."""
+
+        tokens = self.tokens
+        if lo >= hi:
+            # Empty expression returns undefined
+            return ValueNode(Token(TokenType.NAME, "undefined", 0, 0))
+
+        # tabs at the beginning or end do not matter
+        if (i := self.next_invalid[lo + 1]) < hi - 1:
+            if tokens[i].type == TokenType.WHITESPACE:
                 raise_error_at_token(
-                    filename,
-                    code,
-                    "Operator cannot be at the end of an expression.",
+                    self.filename,
+                    self.code,
+                    "Tabs are not allowed in expressions.",
                     tokens[i],
                 )
+            raise_error_at_token(
+                self.filename,
+                self.code,
+                "Due to the laws of significant whitespace, no newline characters are permitted in expressions. If your code is so long that it needs newlines, consider rewriting it :)",
+                tokens[i],
+            )
 
-    # detecting single argument function
-    # this doesn't seem to adhere to my standards 100%, so its not a bug, its a feature
-    starts_with_operator = int(
-        tokens_without_whitespace[0].type in {TokenType.SEMICOLON, TokenType.SUBTRACT}
-    )
-    first_name_index = int(starts_with_whitespace) + int(starts_with_operator)
-    if (
-        len(tokens) >= 3 + first_name_index
-        and tokens[first_name_index].type == TokenType.NAME
-        and tokens[first_name_index + 1].type == TokenType.WHITESPACE
-        and tokens[first_name_index + 2].type
-        in [
-            TokenType.NAME,
-            TokenType.L_SQUARE,
-            TokenType.STRING,
-            TokenType.SUBTRACT,
-            TokenType.SEMICOLON,
-        ]
-        and len(tokens[first_name_index + 1].value) > max_width
-    ):
-        function_node = FunctionNode(
-            tokens[first_name_index],
-            [build_expression_tree(filename, tokens[first_name_index + 1 :], code)],
-        )
-        if starts_with_operator:
-            return SingleOperatorNode(function_node, tokens_without_whitespace[0])
-        return function_node
-
-    # check if there is an operator at the beginning of the thing
-    if starts_with_operator and (
-        max_index == -1
-        or (t := tokens[int(starts_with_whitespace) + 1]).type == TokenType.WHITESPACE
-        and len(t.value) > max_width
-        or updated_list[max_index] == OperatorType.COM
-    ):
-        return SingleOperatorNode(
-            build_expression_tree(
-                filename, tokens[int(starts_with_whitespace) + 1 :], code
-            ),
-            tokens_without_whitespace[0],
+        first = self.next_non_whitespace[lo]
+        last = self.prev_non_whitespace[hi - 1]
+        if (
+            first < hi
+            and tokens[first].type == TokenType.L_SQUARE
+            and (second := self.next_non_whitespace[first + 1]) < hi
+            and tokens[second].type == TokenType.R_SQUARE
+            and self.next_non_whitespace[second + 1] >= hi
+        ):
+            return ListNode([])  # easy way out xD
+        starts_with_whitespace = int(tokens[lo].type == TokenType.WHITESPACE)
+        ends_with_whitespace = int(tokens[hi - 1].type == TokenType.WHITESPACE)
+
+        # find the operator with the maximum whitespace between it and other things
+        max_width, max_index = self.find_widest_operator(lo, hi)
+
+        # detecting single argument function
+        # this doesn't seem to adhere to my standards 100%, so its not a bug, its a feature
+        first_token = self.get_non_whitespace(lo, hi)
+        starts_with_operator = int(
+            first_token.type in {TokenType.SEMICOLON, TokenType.SUBTRACT}
         )
-
-    # value, like a list, name, or anything else
-    if max_index == -1:
-
-        # just making sure the input is correct
-        try:
-            name_or_value = tokens_without_whitespace[0]
-            if name_or_value.type not in [
+        first_name_index = lo + starts_with_whitespace + starts_with_operator
+        if (
+            hi >= first_name_index + 3
+            and tokens[first_name_index].type == TokenType.NAME
+            and tokens[first_name_index + 1].type == TokenType.WHITESPACE
+            and tokens[first_name_index + 2].type
+            in [
                 TokenType.NAME,
                 TokenType.L_SQUARE,
                 TokenType.STRING,
-            ]:
-                raise_error_at_token(
-                    filename,
-                    code,
-                    "Expected name or value.",
-                    tokens_without_whitespace[0],
-                )
-        except IndexError:
+                TokenType.SUBTRACT,
+                TokenType.SEMICOLON,
+            ]
+            and self.widths[first_name_index + 1] > max_width
+        ):
+            function_node = FunctionNode(
+                tokens[first_name_index], [self.build(first_name_index + 1, hi)]
+            )
+            if starts_with_operator:
+                return SingleOperatorNode(function_node, first_token)
+            return function_node
+
+        # check if there is an operator at the beginning of the thing
+        after_operator = lo + starts_with_whitespace + 1
+        if starts_with_operator and (
+            max_index == -1
+            or tokens[after_operator].type == TokenType.WHITESPACE
+            and self.widths[after_operator] > max_width
+            or self.ops[max_index] == OperatorType.COM
+        ):
+            return SingleOperatorNode(self.build(after_operator, hi), first_token)
+
+        # value, like a list, name, or anything else
+        if max_index == -1:
+            return self.build_value(
+                lo, hi, first, last, starts_with_whitespace, ends_with_whitespace
+            )
+
+        # max_index is the token with the maximum surrouding whitespace
+        if self.ops[max_index] == OperatorType.COM:
+            return self.build_function(lo, hi, first, max_width, starts_with_whitespace)
+
+        operator = self.ops[max_index]
+        if not isinstance(operator, OperatorType):
             raise_error_at_token(
-                filename, code, "Expected name or value.", tokens_without_whitespace[0]
+                self.filename,
+                self.code,
+                "Something went wrong. My bad.",
+                tokens[max_index],
+            )
+        return ExpressionNode(
+            self.build(lo, max_index),
+            self.build(max_index + 1, hi),
+            operator=operator,
+            operator_token=tokens[max_index],
+        )
+
+    def build_value(
+        self,
+        lo: int,
+        hi: int,
+        first: int,
+        last: int,
+        starts_with_whitespace: int,
+        ends_with_whitespace: int,
+    ) -> ExpressionTreeNode:
+        tokens = self.tokens
+        name_or_value = tokens[first]
+        if name_or_value.type not in [
+            TokenType.NAME,
+            TokenType.L_SQUARE,
+            TokenType.STRING,
+        ]:
+            raise_error_at_token(
+                self.filename, self.code, "Expected name or value.", name_or_value
             )
 
         # this is a list :)
-        if name_or_value.type == TokenType.L_SQUARE:
-            bracket_layers = 1
-            for i, token in enumerate(tokens_without_whitespace[1:], start=1):
-                if token.type == TokenType.L_SQUARE:
-                    bracket_layers += 1
-                elif token.type == TokenType.R_SQUARE:
-                    bracket_layers -= 1
-
-                # this means the closing happen, signifying the end of the list
-                if bracket_layers == 0:
-                    if i == len(tokens_without_whitespace) - 1:
-
-                        # let's find the most significant comma, and split by that
-                        # if there's a function in the middle of the list, too bad :)
-                        # [func a, b]  == [func(a), b] and also [func(a, b)]  # literally how do i tell them apart
-
-                        # need to consider the width of whitespace from either side fr
-                        l_width = (
-                            len(token.value)
-                            if (token := tokens[int(starts_with_whitespace) + 1]).type
-                            == TokenType.WHITESPACE
-                            else 0
-                        )
-                        r_width = (
-                            len(token.value)
-                            if (
-                                token := tokens[
-                                    len(tokens) - int(ends_with_whitespace) - 2
-                                ]
-                            ).type
-                            == TokenType.WHITESPACE
-                            else 0
-                        )
-                        if l_width != r_width:
-                            raise_error_at_token(
-                                filename,
-                                code,
-                                "Whitespace between either bracket of a list must be equal in length.",
-                                tokens[len(tokens) - int(ends_with_whitespace) - 2],
-                            )
-
-                        # now go through all the commas and check if the whitespace is significant
-                        all_commas = []
-                        bracket_layers = 0  # yes i'm setting this damn thing twice
-                        for i, (token, tok_or_op) in enumerate(
-                            zip(tokens[:-1], updated_list)
-                        ):  # stop here to avoid angry errors
-                            if token.type == TokenType.L_SQUARE:
-                                bracket_layers += 1
-                            elif token.type == TokenType.R_SQUARE:
-                                bracket_layers -= 1
-                            if (
-                                tok_or_op == OperatorType.COM
-                                and bracket_layers == 1
-                                and (
-                                    l_width == 0
-                                    or l_width == len(tokens[i + 1].value)
-                                    and tokens[i + 1].type == TokenType.WHITESPACE
-                                )
-                            ):
-                                all_commas.append(i)
-
-                        # not single element
-                        if all_commas:
-                            return ListNode(
-                                [
-                                    build_expression_tree(filename, t, code)
-                                    for t in [
-                                        tokens[comma_index + 1 : next_index]
-                                        for comma_index, next_index in zip(
-                                            [int(starts_with_whitespace), *all_commas],
-                                            [
-                                                *all_commas,
-                                                len(tokens)
-                                                - 1
-                                                - int(ends_with_whitespace),
-                                            ],
-                                        )  # adjusting here in order to avoid the bracket tokens
-                                    ]
-                                ]
-                            )
-
-                        # single element :)
-                        return ListNode(
-                            [
-                                build_expression_tree(
-                                    filename,
-                                    tokens[
-                                        int(starts_with_whitespace)
-                                        + 1 : len(tokens)
-                                        - int(ends_with_whitespace)
-                                        - 1
-                                    ],
-                                    code,
-                                )
-                            ]
-                        )
-                    break
+        if (
+            name_or_value.type == TokenType.L_SQUARE
+            and self.closing.get(first, hi) == last
+        ):
+
+            # let's find the most significant comma, and split by that
+            # if there's a function in the middle of the list, too bad :)
+            # [func a, b]  == [func(a), b] and also [func(a, b)]  # literally how do i tell them apart
+
+            # need to consider the width of whitespace from either side fr
+            l_width = self.widths[lo + starts_with_whitespace + 1]
+            r_index = hi - ends_with_whitespace - 2
+            if l_width != self.widths[r_index]:
+                raise_error_at_token(
+                    self.filename,
+                    self.code,
+                    "Whitespace between either bracket of a list must be equal in length.",
+                    tokens[r_index],
+                )
+
+            # now go through all the commas and check if the whitespace is significant
+            commas = self.commas_by_depth.get(self.depths[lo] + 1, [])
+            all_commas = [
+                i
+                for i in commas[bisect_left(commas, lo) : bisect_left(commas, hi - 1)]
+                if l_width == 0 or self.widths[i + 1] == l_width
+            ]
+            # adjusting here in order to avoid the bracket tokens
+            bounds = zip(
+                [lo + starts_with_whitespace, *all_commas],
+                [*all_commas, hi - 1 - ends_with_whitespace],
+            )
+            return ListNode([self.build(start + 1, end) for start, end in bounds])
 
         # now we need to handle indexes
         # let's go from the back of the list and find the first fully closing sequence
         # i am sure that this guarantees there is an index (i think)
-        if tokens_without_whitespace[-1].type == TokenType.R_SQUARE:
-            bracket_layers = -1
-            end_index = len(tokens) - int(ends_with_whitespace) - 1
-            for i, token in reversed(
-                list(enumerate(tokens[:end_index]))
-            ):  # i don't like this one bit  :(
-                if token.type == TokenType.L_SQUARE:
-                    bracket_layers += 1
-                elif token.type == TokenType.R_SQUARE:
-                    bracket_layers -= 1
-
-                # first index!!!!!!!!!!!!!!!!!!!!
-                if bracket_layers == 0:
-                    return IndexNode(
-                        build_expression_tree(
-                            filename, tokens[int(starts_with_whitespace) : i], code
-                        ),
-                        build_expression_tree(
-                            filename, tokens[i + 1 : end_index], code
-                        ),
-                    )
+        if tokens[last].type == TokenType.R_SQUARE:
+            end_index = hi - ends_with_whitespace - 1
+            start_index = self.find_index_start(lo, end_index)
+            if start_index is not None:
+                return IndexNode(
+                    self.build(lo + starts_with_whitespace, start_index),
+                    self.build(start_index + 1, end_index),
+                )
 
         # finally end this vicious cycle
         return ValueNode(name_or_value)
 
-    # max_index is the token with the maximum surrouding whitespace
-    if updated_list[max_index] == OperatorType.COM:
+    def find_index_start(self, lo: int, end_index: int) -> Optional[int]:
+        """The "[" closed by the token at end_index, if it is in the range."""
+        if self.tokens[end_index].type == TokenType.R_SQUARE:
+            start_index = self.opening.get(end_index, -1)
+            return start_index if start_index >= lo else None
+
+        # only reachable with more than one whitespace token at the end
+        bracket_layers = -1
+        for i in reversed(range(lo, end_index)):
+            if self.tokens[i].type == TokenType.L_SQUARE:
+                bracket_layers += 1
+            elif self.tokens[i].type == TokenType.R_SQUARE:
+                bracket_layers -= 1
+            if bracket_layers == 0:
+                return i
+        return None
+
+    def build_function(
+        self, lo: int, hi: int, first: int, max_width: int, starts_with_whitespace: int
+    ) -> ExpressionTreeNode:
         # this means it is a function
         # we need to find every other comma as they become the arguments of the function
         # additionally, there needs to be a spacing of equal length between the name of the function and the next argument
-
-        if tokens_without_whitespace[
-            0
-        ].type != TokenType.NAME or tokens_without_whitespace[1].type not in [
+        tokens = self.tokens
+        if tokens[first].type != TokenType.NAME or self.get_non_whitespace(
+            first + 1, hi
+        ).type not in [
             TokenType.NAME,
             TokenType.L_SQUARE,
             TokenType.STRING,
         ]:
             raise_error_at_token(
-                filename,
-                code,
+                self.filename,
+                self.code,
                 "Expected function call. This is likely an issue of whitespace, as Gulf of Mexico replaces parentheses with spaces and has significant whitespace.",
-                tokens_without_whitespace[0],
+                tokens[first],
             )
 
         all_commas = []
-        for i in range(len(updated_list)):
-            if (
-                updated_list[i].value == ","
-            ):  # okay this is weird because enums have .value and tokens have .value
-                if (
-                    max_width == 0
-                    or (
-                        tokens[i + 1].type == TokenType.WHITESPACE
-                        and len(tokens[i + 1].value)
-                    )
-                    == max_width
-                ):
-                    all_commas.append(i)
+        start, end = bisect_left(self.commas, lo), bisect_left(self.commas, hi)
+        for i in self.commas[start:end]:
+            if max_width == 0:
+                all_commas.append(i)
+            elif i + 1 >= hi:
+                raise IndexError("list index out of range")
+            elif (
+                tokens[i + 1].type == TokenType.WHITESPACE
+                and self.widths[i + 1] == max_width
+            ):
+                all_commas.append(i)
 
         # i have no idea what the hell im doin
+        bounds = zip([lo + starts_with_whitespace, *all_commas], [*all_commas, hi])
         return FunctionNode(
-            tokens_without_whitespace[0],
-            [
-                build_expression_tree(filename, t, code)
-                for t in [
-                    tokens[comma_index + 1 : next_index]
-                    for comma_index, next_index in zip(
-                        [int(starts_with_whitespace), *all_commas],
-                        [*all_commas, len(tokens)],
-                    )
-                ]
-            ],
+            tokens[first], [self.build(start + 1, end) for start, end in bounds]
         )
 
-    else:
-        operator = updated_list[max_index]
-        if not isinstance(operator, OperatorType):
-            raise_error_at_token(
-                filename, code, "Something went wrong. My bad.", tokens[max_index]
-            )
-        return ExpressionNode(
-            build_expression_tree(filename, tokens[:max_index], code),
-            build_expression_tree(filename, tokens[max_index + 1 :], code),
-            operator=operator,
-            operator_token=tokens[max_index],
-        )
+
+def build_expression_tree(
+    filename: str, tokens: list[Token], code: str
+) -> ExpressionTreeNode:
+    """
+    This language has significant whitespace, so the biggest split happens where there is most space
+     - func a, b  +  c becomes func(a, b) + c but func a, b+c  becomes func(a, b + c)
+     - a + func   b  ,  c + d is not legal because it translates to (a + func)(b, c + d)
+     - 2 * 1+3 becomes 2 * (1 + 3)
+
+    The spacing and bracket depth of every token are found in one pass (see
+    ExpressionTokens), so subexpressions are index ranges that are never rescanned.
+    """
+
+    if not tokens:
+        # Empty expression returns undefined
+        return ValueNode(Token(TokenType.NAME, "undefined", 0, 0))
+    return ExpressionTokens(filename, tokens, code).build(0, len(tokens))
@@ -12,6 +12,7 @@ Statement Types:
     - Conditional: if statements with expression evaluation
     - WhenStatement: reactive when triggers on variable changes
     - AfterStatement: scheduled execution with temporal delays
+    - BatchStatement: a block whose changes set off when statements together
     - ReturnStatement: function returns with optional debug
     - DeleteStatement: value deletion from memory
     - ReverseStatement: reverse string/list/time (special operator)
@@ -26,7 +27,9 @@ Key Features:
     - Lifetimes: <5.0> for temporal, 100 for line-based
 
 These AST nodes are generated by generate_syntax_tree() in this module,
-then executed by pattern matching in interpreter.py.
+then executed by pattern matching in interpreter.py. Expressions are
+compiled into expression trees as part of generating the syntax tree, so
+the interpreter never has to parse tokens while running a program.
 """
 
 from abc import ABCMeta
@@ -35,12 +38,16 @@ from dataclasses import dataclass
 
 from gulfofmexico.base import (
     STR_TO_OPERATOR,
+    InterpretationError,
     Token,
     TokenType,
     raise_error_at_line,
     raise_error_at_token,
 )
-from gulfofmexico.processor.expression_tree import ExpressionTreeNode
+from gulfofmexico.processor.expression_tree import (
+    ExpressionTreeNode,
+    build_expression_tree,
+)
 
 __all__ = [
     "FunctionDefinition",
@@ -54,6 +61,7 @@ __all__ = [
     "ExpressionStatement",
     "WhenStatement",
     "AfterStatement",
+    "BatchStatement",
     "ExportStatement",
     "ImportStatement",
 ]
@@ -215,6 +223,13 @@ class AfterStatement(CodeStatement, CodeStatementKeywordable):
     code: list[tuple[CodeStatement, ...]]
 
 
+# name {
+@dataclass
+class BatchStatement(CodeStatement, CodeStatementKeywordable):
+    keyword: Token
+    code: list[tuple[CodeStatement, ...]]
+
+
 # name name (, name)* name string!
 @dataclass
 class ExportStatement(CodeStatement, CodeStatementDebuggable):
@@ -578,6 +593,11 @@ def create_scoped_code_statement(
             )
         )
 
+    if without_whitespace[1].type == TokenType.L_CURLY:
+        possibilities.append(
+            BatchStatement(keyword=without_whitespace[0], code=statements_inside_scope)
+        )
+
     possibilities.extend(
         [
             Conditional(
@@ -637,7 +657,8 @@ def create_unscoped_code_statement(
 
     tokens_no_ws = [t for t in tokens if t.type != TokenType.WHITESPACE]
 
-    # Check for ReverseStatement: reverse name!
+    # Check for ReverseStatement: reverse name! (or delete name!, which has
+    # the same shape)
     # Should have exactly 3 non-whitespace tokens: keyword, name, punctuation
     if (
         len(tokens_no_ws) == 3
@@ -651,6 +672,11 @@ def create_unscoped_code_statement(
                 name=tokens_no_ws[1],  # variable to reverse
                 debug=debug_level,
             ),
+            DeleteStatement(
+                keyword=tokens_no_ws[0],
+                name=tokens_no_ws[1],
+                debug=debug_level,
+            ),
             ExpressionStatement(tokens[:-1], debug_level),
         )
 
@@ -842,6 +868,56 @@ def create_unscoped_code_statement(
     return tuple(possibilities)
 
 
+def build_statement_expression(
+    filename: str,
+    code: str,
+    expression: Union[list[Token], ExpressionTreeNode],
+) -> Union[list[Token], ExpressionTreeNode]:
+    """Build the expression tree for a statement ahead of execution.
+
+    Only one of the candidate statements produced for a line is ever executed,
+    so a candidate whose expression does not parse keeps its tokens. The parse
+    error is then raised at runtime if (and only if) that candidate is chosen.
+    """
+    if isinstance(expression, ExpressionTreeNode):
+        return expression
+    try:
+        return build_expression_tree(filename, expression, code)
+    except (InterpretationError, IndexError):
+        return expression
+
+
+def build_statement_expressions(
+    filename: str, code: str, statements: tuple[CodeStatement, ...]
+) -> None:
+    """Replace the token-list expressions of each candidate with built trees."""
+    for st in statements:
+        if isinstance(
+            st,
+            (
+                VariableDeclaration,
+                VariableAssignment,
+                Conditional,
+                ReturnStatement,
+                ExpressionStatement,
+                WhenStatement,
+                AfterStatement,
+            ),
+        ):
+            st.expression = build_statement_expression(filename, code, st.expression)
+        if isinstance(st, VariableAssignment):
+            st.indexes = [
+                build_statement_expression(filename, code, index)
+                for index in st.indexes
+            ]
+
+        # scoped bodies were built by their own generate_syntax_tree call, but
+        # the body of a "=>" function is created directly by its parent statement
+        if isinstance(st, FunctionDefinition):
+            for inner_statements in st.code:
+                build_statement_expressions(filename, code, inner_statements)
+
+
 def generate_syntax_tree(
     filename: str, tokens: list[Token], code: str
 ) -> list[tuple[CodeStatement, ...]]:
@@ -884,6 +960,7 @@ def generate_syntax_tree(
 
             # exit if some possiblity was found
             if final_statements[-1]:
+                build_statement_expressions(filename, code, final_statements[-1])
                 continue
         except (
             IndexError
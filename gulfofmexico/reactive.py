@@ -0,0 +1,258 @@
+"""
+Dependency Graph for Gulf of Mexico When Statements
+
+A when statement runs its body whenever something its condition depends on
+changes. Watchers used to be kept in one dict per scope (the layers of
+when_statement_watchers), so every assignment looked through each layer of
+the chain, removing a watcher was a linear search, and the same watcher could
+be stored several times under one key.
+
+WatcherGraph keeps every watcher in one place, keyed by what it depends on:
+the id of a variable, the id of a mutable value, or a name. Looking up the
+watchers of a key, adding a dependency and dropping one are O(1), and a
+watcher is stored once per key however often it is added.
+
+Dependency Lifetime:
+    The graph is given the variables and values themselves, and keys them
+    by id. An id is only unique while its object lives; CPython reuses it
+    afterwards, so a key left behind by a dead variable would run its
+    watchers when an unrelated object gets the same address. The graph
+    holds a weak reference to the object of each key, whose callback drops
+    the key as the object dies. An object that cannot be weakly referenced
+    is held on to instead, so its id stays its own while it is watched.
+
+Scope Lifetime:
+    A watcher belongs to the scope its when statement was declared in, and
+    is dropped with every one of its dependencies when that scope ends. The
+    scope is the innermost node of when_statement_watchers, which is entered
+    at the same places as the namespaces; its dict holds the watchers
+    declared in it, and a finalizer on the node forgets them once the node
+    is gone.
+
+Propagation:
+    Changing a key marks its watchers dirty instead of running them on the
+    spot, and graph.flush(run, writes) then runs the dirty watchers in
+    rounds. A round runs each of them once, a watcher before the ones
+    depending on what its body writes, so a when statement never sees a
+    value the others are still about to change and its condition is checked
+    once per round however many of its keys changed. Whatever the round
+    marks dirty again runs in the next one, until nothing is left; a
+    watcher whose body changes its own keys therefore loops instead of
+    recursing. Watchers that depend on each other run in the order they
+    were marked.
+
+    Assignments flush once they are done, except while a flush is running
+    (the running one picks them up) or inside graph.batch(), which holds
+    every watcher back until the outermost batch ends.
+
+Usage:
+    - graph.declare(scope, watcher, dependencies): a new watcher and what it
+      depends on: variables, mutable values, or names
+    - graph.watchers_of(dependency): the watchers to run when it changes
+    - graph.add(dependency, watcher) / graph.discard(dependency, watcher)
+    - graph.mark(watcher) then graph.flush(run, writes): run what changed
+    - with graph.batch(): ...: hold watchers back until the block ends
+"""
+
+from __future__ import annotations
+
+import heapq
+import weakref
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, NamedTuple, Union
+
+if TYPE_CHECKING:
+    from gulfofmexico.processor.expression_tree import ExpressionTreeNode
+    from gulfofmexico.processor.syntax_tree import CodeStatement
+    from gulfofmexico.scope import Namespace, ScopeChain
+
+__all__ = ["WhenWatcher", "WatcherGraph", "when_graph"]
+
+Key = Union[str, int]
+# a name, or the variable or mutable value a key is the id of
+Dependency = object
+
+
+class WhenWatcher(NamedTuple):
+    """A when statement's condition and body, and the scope they run in."""
+
+    condition: ExpressionTreeNode
+    statements: list[tuple[CodeStatement, ...]]
+    namespaces: ScopeChain[Namespace]
+
+
+class WatcherGraph:
+    """The watchers of every key, see the module docstring."""
+
+    __slots__ = ("watchers", "keys", "refs", "dirty", "batch_depth", "flushing")
+
+    def __init__(self) -> None:
+        # key -> the watchers depending on it, by id so that each is there once
+        self.watchers: dict[Key, dict[int, WhenWatcher]] = {}
+        # id of a watcher -> the keys it depends on
+        self.keys: dict[int, set[Key]] = {}
+        # id key -> a weak reference to its object (or the object itself)
+        self.refs: dict[Key, object] = {}
+        # the watchers to run at the next flush, in the order they were marked
+        self.dirty: dict[int, WhenWatcher] = {}
+        self.batch_depth = 0
+        self.flushing = False
+
+    def declare(
+        self,
+        scope: ScopeChain[dict],
+        watcher: WhenWatcher,
+        dependencies: Iterable[Dependency],
+    ) -> None:
+        """Add a watcher that lives as long as scope, depending on
+        dependencies."""
+        declared = scope.namespace
+        if not declared:  # the first watcher of this scope
+            weakref.finalize(scope, self.forget, declared)
+        declared[id(watcher)] = watcher
+        self.keys[id(watcher)] = set()
+        for dependency in dependencies:
+            self.add(dependency, watcher)
+
+    def add(self, dependency: Dependency, watcher: WhenWatcher) -> None:
+        if (keys := self.keys.get(id(watcher))) is None:
+            return  # its scope has ended
+        key = key_of(dependency)
+        if (watchers := self.watchers.get(key)) is None:
+            watchers = self.watchers[key] = {}
+            if type(key) is int:
+                self.refs[key] = self.reference(dependency, key)
+        watchers[id(watcher)] = watcher
+        keys.add(key)
+
+    def reference(self, dependency: Dependency, key: int) -> object:
+        """Something to keep for the object of key, see Dependency Lifetime."""
+        try:
+            return weakref.ref(dependency, lambda _: self.drop(key))
+        except TypeError:  # kept alive instead, so that its id is not reused
+            return dependency
+
+    def drop(self, key: Key) -> None:
+        """Forget a key and every dependency on it."""
+        for watcher_id in self.watchers.pop(key, ()):
+            if (keys := self.keys.get(watcher_id)) is not None:
+                keys.discard(key)
+        self.refs.pop(key, None)
+
+    def discard(self, dependency: Dependency, watcher: WhenWatcher) -> None:
+        key = key_of(dependency)
+        if (watchers := self.watchers.get(key)) is not None:
+            watchers.pop(id(watcher), None)
+            if not watchers:
+                self.drop(key)
+        if (keys := self.keys.get(id(watcher))) is not None:
+            keys.discard(key)
+
+    def watchers_of(self, dependency: Dependency) -> list[WhenWatcher]:
+        """The watchers depending on dependency, oldest first, as a new list so
+        that running them can add and remove dependencies."""
+        if (watchers := self.watchers.get(key_of(dependency))) is None:
+            return []
+        return list(watchers.values())
+
+    def mark(self, watcher: WhenWatcher) -> None:
+        """Run watcher at the next flush."""
+        self.dirty[id(watcher)] = watcher
+
+    def flush(
+        self,
+        run: Callable[[WhenWatcher], None],
+        writes: Callable[[WhenWatcher], Iterable[Dependency]],
+    ) -> None:
+        """Run the dirty watchers, see Propagation in the module docstring.
+
+        writes(watcher) gives what its body may change, which orders a
+        round; it does not have to be exact.
+        """
+        if self.flushing or self.batch_depth:
+            return
+        self.flushing = True
+        try:
+            while self.dirty:
+                for watcher in self.order(self.dirty, writes):
+                    if self.dirty.pop(id(watcher), None) is None:
+                        continue  # its scope ended during this round
+                    run(watcher)
+        finally:
+            self.flushing = False
+            self.dirty.clear()
+
+    def order(
+        self,
+        dirty: dict[int, WhenWatcher],
+        writes: Callable[[WhenWatcher], Iterable[Dependency]],
+    ) -> list[WhenWatcher]:
+        """The dirty watchers, each before those reading what it writes."""
+        readers: dict[Key, list[int]] = {}
+        for watcher_id in dirty:
+            for key in self.keys.get(watcher_id, ()):
+                readers.setdefault(key, []).append(watcher_id)
+        after: dict[int, set[int]] = {watcher_id: set() for watcher_id in dirty}
+        waiting_on = dict.fromkeys(dirty, 0)
+        for watcher_id, watcher in dirty.items():
+            for dependency in writes(watcher):
+                for reader in readers.get(key_of(dependency), ()):
+                    if reader != watcher_id and reader not in after[watcher_id]:
+                        after[watcher_id].add(reader)
+                        waiting_on[reader] += 1
+        # Kahn's algorithm over the positions the watchers were marked at, so
+        # that of the watchers waiting on nobody the first marked runs first
+        marked = list(dirty)
+        position = {watcher_id: i for i, watcher_id in enumerate(marked)}
+        ready = [i for i, watcher_id in enumerate(marked) if not waiting_on[watcher_id]]
+        oldest = 0  # every watcher marked before this one has run
+        ordered: list[WhenWatcher] = []
+        while len(ordered) < len(marked):
+            if ready:
+                watcher_id = marked[heapq.heappop(ready)]
+            else:
+                # everyone left waits on someone: a cycle, broken by running
+                # the first one left in the order the watchers were marked
+                while marked[oldest] not in waiting_on:
+                    oldest += 1
+                watcher_id = marked[oldest]
+            del waiting_on[watcher_id]
+            ordered.append(dirty[watcher_id])
+            for reader in after[watcher_id]:
+                if reader in waiting_on:
+                    waiting_on[reader] -= 1
+                    if not waiting_on[reader]:
+                        heapq.heappush(ready, position[reader])
+        return ordered
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Hold every watcher back until the outermost batch ends; the caller
+        flushes afterwards."""
+        self.batch_depth += 1
+        try:
+            yield
+        finally:
+            self.batch_depth -= 1
+
+    def forget(self, declared: dict[int, WhenWatcher]) -> None:
+        """Drop the watchers declared in a scope that has ended."""
+        for watcher in declared.values():
+            for key in self.keys.pop(id(watcher), ()):
+                if (watchers := self.watchers.get(key)) is not None:
+                    watchers.pop(id(watcher), None)
+                    if not watchers:
+                        self.drop(key)
+            self.dirty.pop(id(watcher), None)
+        declared.clear()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+def key_of(dependency: Dependency) -> Key:
+    return dependency if type(dependency) is str else id(dependency)
+
+
+# the watchers of the running program
+when_graph = WatcherGraph()
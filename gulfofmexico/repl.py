@@ -11,9 +11,13 @@ Features:
 
 This REPL intentionally avoids the experimental engine; it uses the
 monolithic production interpreter in gulfofmexico/interpreter.py.
+Start it with --engine=closures (or GomRepl(engine="closures")) to run
+inputs with the closure compiler in gulfofmexico/closures.py, or with
+--engine=vm to run them on the bytecode VM in gulfofmexico/vm/.
 """
 
 from __future__ import annotations
+import argparse
 import sys
 from pathlib import Path
 from typing import Optional, Union
@@ -33,7 +37,11 @@ REPL_FILENAME = "__repl__"
 class GomRepl:
     """Stateful REPL runner bound to the production interpreter."""
 
-    def __init__(self) -> None:
+    def __init__(self, engine: str = "interpreter") -> None:
+        # Execution engine used for every input (one of interpreter.ENGINES)
+        interpreter.set_engine(engine)
+        interpreter.start_program()
+        self.engine = engine
         # Shared state across inputs
         # Namespaces: first element is a copy of keyword namespace
         self.namespaces: list[dict[str, Union[Variable, Name]]] = [
@@ -149,6 +157,7 @@ class GomRepl:
         )
 
     def _cmd_reset(self) -> None:
+        interpreter.start_program()
         self.namespaces = [KEYWORDS.copy()]  # type: ignore
         self.async_statements = []
         self.when_statement_watchers = [{}]
@@ -322,6 +331,8 @@ class GomRepl:
         exported_names: list[tuple[str, str, GulfOfMexicoValue]] = []
 
         # Prepare interpreter module state
+        interpreter.set_engine(self.engine)
+        interpreter.clear_tree_caches()  # the trees of earlier inputs
         interpreter.filename = fname
         interpreter.code = code
 
@@ -397,8 +408,15 @@ class GomRepl:
 
 
 def main(argv: list[str] | None = None) -> int:
-    _ = argv or sys.argv[1:]
-    repl = GomRepl()
+    parser = argparse.ArgumentParser(prog="gulfofmexico-repl")
+    parser.add_argument(
+        "--engine",
+        choices=interpreter.ENGINES,
+        default="interpreter",
+        help="execution engine",
+    )
+    ns = parser.parse_args(argv if argv is not None else sys.argv[1:])
+    repl = GomRepl(engine=ns.engine)
     repl.loop()
     return 0
 
@@ -0,0 +1,159 @@
+"""
+Rope Text for Gulf of Mexico Strings
+
+GOM strings are mutable: push appends to them, pop removes a character and
+string[0.5] = "x" inserts between two characters. With a flat str each of
+those copied the whole string, so building a string one push at a time was
+quadratic.
+
+A Rope keeps the text as a list of chunks with the cumulative length at the
+end of each one. Appending adds to the last chunk while it is short, and an
+edit only rebuilds the chunk it falls in (a long chunk is cut into short
+ones first), so pushes are O(1) amortized and pops and inserts are
+O(log n + CHUNK_SIZE) plus the bookkeeping of the chunks after the edit.
+
+The flat str is only joined when someone reads it (printing, hashing,
+comparing, converting) and is kept until the next edit, so reading an
+unchanged string twice costs nothing.
+
+Usage:
+    - Rope(text), len(rope), rope[i]: like the str it holds
+    - rope.append(text): add text to the end
+    - rope.replace(start, stop, text): put text in place of rope[start:stop]
+    - rope.flatten(): the whole text as a str
+    - rope.copy(): an independent rope with the same text
+
+RopeText is the descriptor behind GulfOfMexicoString.value: reading the
+field flattens the string's rope and assigning it starts a new rope, so the
+dataclass __init__, __eq__, __hash__ and __repr__ keep working on a str.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from typing import Any, Optional
+
+__all__ = ["Rope", "RopeText", "CHUNK_SIZE"]
+
+CHUNK_SIZE = 1024
+
+
+class Rope:
+    """Mutable text in chunks, see the module docstring."""
+
+    __slots__ = ("chunks", "ends", "flat")
+
+    def __init__(self, text: str = ""):
+        self.chunks: list[str] = []
+        self.ends: list[int] = []
+        self.flat: Optional[str] = None
+        self.reset(text)
+
+    def reset(self, text: str) -> None:
+        self.chunks = [text] if text else []
+        self.ends = [len(text)] if text else []
+        self.flat = text
+
+    def __len__(self) -> int:
+        return self.ends[-1] if self.ends else 0
+
+    def copy(self) -> Rope:
+        """An independent rope with the same text; the chunks are shared."""
+        copied = Rope()
+        copied.chunks, copied.ends = self.chunks[:], self.ends[:]
+        copied.flat = self.flat
+        return copied
+
+    def flatten(self) -> str:
+        if self.flat is None:
+            self.flat = "".join(self.chunks)
+        return self.flat
+
+    def __str__(self) -> str:
+        return self.flatten()
+
+    def __repr__(self) -> str:
+        return f"Rope({self.flatten()!r})"
+
+    def __getitem__(self, index: int) -> str:
+        """One character, with the negative indexes and IndexError of a str."""
+        if self.flat is not None:
+            return self.flat[index]
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("string index out of range")
+        chunk = bisect_right(self.ends, index)
+        start = self.ends[chunk - 1] if chunk else 0
+        return self.chunks[chunk][index - start]
+
+    def append(self, text: str) -> None:
+        if not text:
+            return
+        if self.chunks and len(self.chunks[-1]) + len(text) <= CHUNK_SIZE:
+            self.chunks[-1] += text
+            self.ends[-1] += len(text)
+        else:
+            self.chunks.append(text)
+            self.ends.append(len(self) + len(text))
+        self.flat = None
+
+    def replace(self, start: int, stop: int, text: str) -> None:
+        """Replace the characters start:stop with text, as slices would."""
+        length = len(self)
+        start, stop, _ = slice(start, stop).indices(length)
+        if stop < start:  # s[:start] + text + s[stop:] repeats characters
+            flat = self.flatten()
+            self.reset(flat[:start] + text + flat[stop:])
+            return
+        if start == stop == length:
+            self.append(text)
+            return
+        first = self.split_chunk_at(start)
+        last = self.split_chunk_at(stop) if stop < length else len(self.chunks)
+        chunk_start = self.ends[first - 1] if first else 0
+        # the chunks first .. last (inclusive, if last is a chunk) are rebuilt
+        end = min(last, len(self.chunks) - 1)
+        old = "".join(self.chunks[first : end + 1])
+        new = old[: start - chunk_start] + text + old[stop - chunk_start :]
+        pieces = [
+            new[i : i + CHUNK_SIZE] for i in range(0, len(new), CHUNK_SIZE)
+        ]
+        self.chunks[first : end + 1] = pieces
+        self.ends[first:] = []
+        total = chunk_start
+        for chunk in self.chunks[first:]:
+            total += len(chunk)
+            self.ends.append(total)
+        self.flat = None
+
+    def split_chunk_at(self, index: int) -> int:
+        """The chunk holding index, cutting it into CHUNK_SIZE pieces if long."""
+        chunk = bisect_right(self.ends, index)
+        text = self.chunks[chunk]
+        if len(text) > 2 * CHUNK_SIZE:
+            start = self.ends[chunk - 1] if chunk else 0
+            pieces = [
+                text[i : i + CHUNK_SIZE] for i in range(0, len(text), CHUNK_SIZE)
+            ]
+            self.chunks[chunk : chunk + 1] = pieces
+            self.ends[chunk : chunk + 1] = [
+                start + min(i + CHUNK_SIZE, len(text))
+                for i in range(0, len(text), CHUNK_SIZE)
+            ]
+            chunk += (index - start) // CHUNK_SIZE
+        return chunk
+
+
+class RopeText:
+    """A str field stored as a Rope in the instance's rope attribute."""
+
+    def __get__(self, obj: Any, owner: Optional[type] = None) -> str:
+        if obj is None:
+            # no class default, so the dataclass field stays required
+            raise AttributeError("value")
+        return obj.rope.flatten()
+
+    def __set__(self, obj: Any, value: str) -> None:
+        obj.rope = Rope(value)
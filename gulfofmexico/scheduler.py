@@ -0,0 +1,214 @@
+"""
+Cooperative Scheduler for Gulf of Mexico Async Functions
+
+Calling an async function queues its body instead of running it. Once the
+block that called it has run its own statements, the queued bodies take
+turns, a slice of statements each, until all of them are done.
+
+The queue used to be the list the bodies were added to: each turn popped
+its first job, which is O(n) in the number of waiting jobs, ran one
+statement and appended the job again. That statement ran with the same
+list, and the block it made ran the list as well, so every turn started a
+nested run of all the other jobs; they ran in an order set by the
+recursion rather than in turns, and thousands of them meant thousands of
+nested frames.
+
+AsyncScheduler keeps the jobs in a deque, so a turn is O(1). The list
+(async_statements) is still where new jobs are added. After each slice the
+scheduler moves them onto its deque, ahead of the job that just ran. A
+nested run of a list that is already being run returns at once.
+
+Statistics:
+    Each scheduler counts its switches (turns taken), the longest its queue
+    got, and the time every task ran for, see get_stats(). The same counts
+    are added up for the whole program in the module's stats, which
+    interpreter.start_program() resets and --scheduler-stats prints.
+
+Usage:
+    - AsyncTask(statements, namespaces): the body of an async function call
+    - AsyncScheduler(async_statements).run(run_statement, result)
+    - SLICE_SIZE: how many statements a task runs per turn (--slice-size)
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from time import perf_counter
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    ClassVar,
+    Literal,
+    Optional,
+    TypeVar,
+    Union,
+)
+
+if TYPE_CHECKING:
+    from gulfofmexico.builtin import GulfOfMexicoValue
+    from gulfofmexico.processor.syntax_tree import CodeStatement
+    from gulfofmexico.scope import Namespace, ScopeChain
+
+__all__ = ["AsyncTask", "AsyncScheduler", "SLICE_SIZE", "stats"]
+
+# how many statements a task runs before the next one takes its turn
+SLICE_SIZE = 1
+
+Result = TypeVar("Result", bound="Optional[GulfOfMexicoValue]")
+
+
+class AsyncTask:
+    """An async function body being run, and how long it has run for."""
+
+    __slots__ = ("statements", "namespaces", "index", "direction", "run_time")
+
+    def __init__(
+        self,
+        statements: list[tuple[CodeStatement, ...]],
+        namespaces: ScopeChain[Namespace],
+        index: int = 0,
+        direction: Union[Literal[1], Literal[-1]] = 1,
+    ) -> None:
+        self.statements = statements
+        self.namespaces = namespaces
+        self.index = index  # the next statement to run
+        self.direction = direction
+        self.run_time = 0.0
+
+    @property
+    def done(self) -> bool:
+        return not 0 <= self.index < len(self.statements)
+
+
+class AsyncScheduler:
+    """Runs the tasks added to one async_statements list, see the module
+    docstring."""
+
+    __slots__ = (
+        "inbox",
+        "queue",
+        "slice_size",
+        "switches",
+        "max_queue_length",
+        "finished",
+        "run_time",
+        "longest_task_run_time",
+    )
+
+    # ids of the lists being run, so that a nested run returns at once
+    running: ClassVar[set[int]] = set()
+
+    def __init__(
+        self, inbox: list[AsyncTask], slice_size: Optional[int] = None
+    ) -> None:
+        self.inbox = inbox
+        self.queue: deque[AsyncTask] = deque()
+        self.slice_size = SLICE_SIZE if slice_size is None else slice_size
+        self.switches = 0
+        self.max_queue_length = 0
+        self.finished = 0
+        self.run_time = 0.0
+        self.longest_task_run_time = 0.0
+
+    def run(
+        self, run_statement: Callable[[AsyncTask], Result], result: Result
+    ) -> Result:
+        """Run every task with run_statement(task), which runs the statement
+        at task.index, until none are left. Returns what the last statement
+        run returned, or result if none ran.
+
+        If the list is already being run, this is a nested run, which leaves
+        the tasks to the outer one."""
+        inbox, queue = self.inbox, self.queue
+        if id(inbox) in AsyncScheduler.running:
+            return result
+        AsyncScheduler.running.add(id(inbox))
+        try:
+            queue.extend(inbox)
+            inbox.clear()
+            while queue:
+                self.max_queue_length = max(self.max_queue_length, len(queue))
+                task = queue.popleft()
+                start = perf_counter()
+                for _ in range(self.slice_size):
+                    if task.done:
+                        break
+                    result = run_statement(task)
+                    task.index += task.direction
+                task.run_time += perf_counter() - start
+                self.switches += 1
+                if inbox:  # started by this slice, so they go first
+                    queue.extend(inbox)
+                    inbox.clear()
+                if not task.done:
+                    queue.append(task)
+                else:
+                    self.finish(task)
+        finally:
+            AsyncScheduler.running.discard(id(inbox))
+            stats.add(self)
+        return result
+
+    def finish(self, task: AsyncTask) -> None:
+        self.finished += 1
+        self.run_time += task.run_time
+        self.longest_task_run_time = max(self.longest_task_run_time, task.run_time)
+
+    def get_stats(self) -> dict[str, Union[int, float]]:
+        return {
+            "switches": self.switches,
+            "queue_length": len(self.queue),
+            "max_queue_length": self.max_queue_length,
+            "finished_tasks": self.finished,
+            "run_time": self.run_time,
+            "longest_task_run_time": self.longest_task_run_time,
+        }
+
+    def __len__(self) -> int:
+        return len(self.queue)
+
+
+class SchedulerStats:
+    """The statistics of every scheduler run so far, added up."""
+
+    __slots__ = (
+        "switches",
+        "max_queue_length",
+        "finished",
+        "run_time",
+        "longest_task_run_time",
+    )
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.switches = 0
+        self.max_queue_length = 0
+        self.finished = 0
+        self.run_time = 0.0
+        self.longest_task_run_time = 0.0
+
+    def add(self, scheduler: AsyncScheduler) -> None:
+        self.switches += scheduler.switches
+        self.max_queue_length = max(
+            self.max_queue_length, scheduler.max_queue_length
+        )
+        self.finished += scheduler.finished
+        self.run_time += scheduler.run_time
+        self.longest_task_run_time = max(
+            self.longest_task_run_time, scheduler.longest_task_run_time
+        )
+
+    def get_stats(self) -> dict[str, Union[int, float]]:
+        return {
+            "switches": self.switches,
+            "max_queue_length": self.max_queue_length,
+            "finished_tasks": self.finished,
+            "run_time": self.run_time,
+            "longest_task_run_time": self.longest_task_run_time,
+        }
+
+
+# the statistics of the running program
+stats = SchedulerStats()
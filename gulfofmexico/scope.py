@@ -0,0 +1,232 @@
+"""
+Scope Chain for Gulf of Mexico
+
+A persistent, linked chain of namespaces used by the interpreter in place of
+the old list of namespace dicts.
+
+Every function call, if body, class body and after listener runs in a new
+scope on top of the one it was created in. With a list, that meant copying
+the whole stack (namespaces + [new_namespace]), so entering a scope at
+depth d cost O(d) and deep recursion was quadratic. A ScopeChain instead
+holds one namespace and a pointer to its parent, so entering a scope is
+O(1) and the outer scopes are shared, never copied.
+
+Usage:
+    - ScopeChain.from_list(namespaces): chain an existing list of dicts
+    - scope.push(namespace): O(1) new scope on top of scope
+    - scope.declare(name, value): bind a name in the innermost scope
+    - scope.lookup(name) / scope.lookup_with_namespace(name): innermost first
+    - scope.is_bound(name): whether a lookup could find name at all
+    - scope.namespace: the innermost dict (what namespaces[-1] used to be)
+    - scope.keep_only(ids): the root and some of the namespaces, shared
+
+Global Fast Path:
+    Keywords, builtins and globals live in the root namespace, at the far
+    end of the chain, and literals like 1 or true are looked up before being
+    decoded, so they would walk every scope only to miss. Each chain keeps
+    the set of names that were ever bound in a scope above its root (names
+    of pushed namespaces, and names bound with declare). Any other name can
+    only be in the root, so it is looked up there directly in O(1). Names in
+    the set are still found by walking the chain, because GOM is dynamically
+    scoped: a function sees the variables of whoever called it. A number
+    literal that is_bound says nothing can be bound to is decoded once, at
+    parse time, instead of on every evaluation.
+
+Keyword Versions:
+    Which candidate of a statement runs depends on what its keyword names
+    (if, const, function, ...) are bound to, so determine_statement_type
+    caches its choice per statement and adds those names to
+    ScopeChain.watched_names. ScopeChain.version counts the bindings that
+    can change what a watched name resolves to: binding or deleting it in a
+    root namespace, or binding it above the root for the first time (after
+    that, lookups of it walk the chain and are not cached). A cached choice
+    stays valid while the version and the chain's bound_names are the same.
+
+Compatibility:
+    ScopeChain also behaves like the list[Namespace] it replaces:
+    chain[-1], chain[0], len(chain), iteration (outermost first),
+    reversed(chain) and chain + [namespace] all work, and to_list()
+    returns a real list for code that needs one.
+
+The same structure is used for the stack of when-statement watcher dicts,
+which is entered at the same places as the namespaces.
+"""
+
+from __future__ import annotations
+
+from typing import (
+    ClassVar,
+    Collection,
+    Generic,
+    Iterable,
+    Iterator,
+    Optional,
+    TypeVar,
+    Union,
+)
+
+from gulfofmexico.builtin import Name, Variable
+
+__all__ = ["Namespace", "ScopeChain"]
+
+Namespace = dict[str, Union[Variable, Name]]
+T = TypeVar("T", bound=dict)
+
+
+class ScopeChain(Generic[T]):
+    """One scope: a namespace and the scope it was entered from."""
+
+    # weak references let reactive.py notice when a scope of watchers ends
+    __slots__ = (
+        "namespace",
+        "parent",
+        "root_namespace",
+        "depth",
+        "bound_names",
+        "__weakref__",
+    )
+
+    # see Keyword Versions above
+    watched_names: ClassVar[set[str]] = set()
+    version: ClassVar[int] = 0
+
+    def __init__(self, namespace: T, parent: Optional[ScopeChain[T]] = None):
+        self.namespace = namespace
+        self.parent = parent
+        if parent is None:
+            self.root_namespace = namespace
+            self.depth = 1
+            self.bound_names: set[str] = set()
+        else:
+            self.root_namespace = parent.root_namespace
+            self.depth = parent.depth + 1
+            self.bound_names = parent.bound_names  # shared by the whole chain
+            if (
+                namespace
+                and not ScopeChain.watched_names.isdisjoint(namespace)
+                and not self.bound_names.issuperset(namespace)
+            ):
+                ScopeChain.version += 1
+            self.bound_names.update(namespace)
+
+    @classmethod
+    def from_list(
+        cls, namespaces: Union[ScopeChain[T], Iterable[T]]
+    ) -> ScopeChain[T]:
+        """Chain a list of namespaces (outermost first). Chains are returned as is."""
+        if isinstance(namespaces, ScopeChain):
+            return namespaces
+        scope: Optional[ScopeChain[T]] = None
+        for namespace in namespaces:
+            scope = cls(namespace, scope)
+        if scope is None:
+            raise ValueError("A scope chain needs at least one namespace.")
+        return scope
+
+    def push(self, namespace: Optional[T] = None) -> ScopeChain[T]:
+        """Enter a new scope on top of this one."""
+        if namespace is None:
+            namespace = {}  # type: ignore[assignment]
+        return ScopeChain(namespace, self)  # type: ignore[arg-type]
+
+    def declare(self, name: str, value) -> None:
+        """Bind a name in the innermost scope, keeping bound_names up to date."""
+        self.namespace[name] = value
+        if name in ScopeChain.watched_names and (
+            self.parent is None or name not in self.bound_names
+        ):
+            ScopeChain.version += 1
+        if self.parent is not None:
+            self.bound_names.add(name)
+
+    @staticmethod
+    def binding_changed(name: str) -> None:
+        """Count a new version if name is watched; for changes made to a
+        namespace dict directly instead of through declare."""
+        if name in ScopeChain.watched_names:
+            ScopeChain.version += 1
+
+    def scopes(self) -> Iterator[ScopeChain[T]]:
+        """Walk the chain from the innermost scope to the outermost."""
+        scope: Optional[ScopeChain[T]] = self
+        while scope is not None:
+            yield scope
+            scope = scope.parent
+
+    def lookup(self, name: str):
+        """The value bound to name in the innermost scope that has it, or None."""
+        if name not in self.bound_names:
+            return self.root_namespace.get(name)
+        scope: Optional[ScopeChain[T]] = self
+        while scope is not None:
+            namespace = scope.namespace
+            if name in namespace:
+                return namespace[name]
+            scope = scope.parent
+        return None
+
+    def is_bound(self, name: str) -> bool:
+        """Whether lookup could find name, without walking the chain."""
+        return name in self.bound_names or name in self.root_namespace
+
+    def lookup_with_namespace(self, name: str) -> tuple[Optional[object], Optional[T]]:
+        """Like lookup, but also returns the namespace the name was found in."""
+        if name not in self.bound_names:
+            if name in self.root_namespace:
+                return self.root_namespace[name], self.root_namespace
+            return None, None
+        scope: Optional[ScopeChain[T]] = self
+        while scope is not None:
+            namespace = scope.namespace
+            if name in namespace:
+                return namespace[name], namespace
+            scope = scope.parent
+        return None, None
+
+    def keep_only(self, namespaces: Collection[int]) -> ScopeChain[T]:
+        """A chain of the root and the namespaces whose id is in namespaces, in
+        the same order. The dicts are shared, not copied, and so is
+        bound_names, so names bound in them later are still found."""
+        kept = [
+            scope.namespace
+            for scope in self.scopes()
+            if scope.parent is not None and id(scope.namespace) in namespaces
+        ]
+        chain: ScopeChain[T] = ScopeChain(self.root_namespace)
+        chain.bound_names = self.bound_names
+        for namespace in reversed(kept):
+            chain = ScopeChain(namespace, chain)
+        return chain
+
+    def to_list(self) -> list[T]:
+        """The namespaces as a list, outermost first."""
+        namespaces = [scope.namespace for scope in self.scopes()]
+        namespaces.reverse()
+        return namespaces
+
+    # list[Namespace] compatibility view
+
+    def __len__(self) -> int:
+        return self.depth
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self.to_list())
+
+    def __reversed__(self) -> Iterator[T]:
+        return (scope.namespace for scope in self.scopes())
+
+    def __getitem__(self, index: int) -> T:
+        if index == -1:
+            return self.namespace
+        if index == 0:
+            return self.root_namespace
+        return self.to_list()[index]
+
+    def __add__(self, namespaces: list[T]) -> ScopeChain[T]:
+        scope = self
+        for namespace in namespaces:
+            scope = scope.push(namespace)
+        return scope
+
+    def __repr__(self) -> str:
+        return f"ScopeChain(depth={self.depth})"
@@ -29,6 +29,7 @@ import json
 import dataclasses
 from typing import Any, Callable, Type, Union, assert_never
 from gulfofmexico.base import NonFormattedError, Token, TokenType
+from gulfofmexico.indexing import IndexMap
 
 from gulfofmexico.builtin import *
 from gulfofmexico.processor.syntax_tree import *
@@ -71,7 +72,7 @@ def serialize_python_obj(obj: Any) -> dict[str, Union[str, dict, list]]:
     match obj:
         case TokenType():
             val = obj.value
-        case dict():
+        case dict() | IndexMap():
             if not all(isinstance(k, str) for k in obj):
                 raise NonFormattedError(
                     "Serialization Error: Encountered non-string dictionary keys."
@@ -163,6 +164,7 @@ def serialize_gulfofmexico_obj(
         "attributes": [
             {"name": field.name, "value": serialize_obj(getattr(val, field.name))}
             for field in dataclasses.fields(val)  # type: ignore
+            if field.init  # the others are rebuilt by __post_init__
         ],
     }
 
@@ -0,0 +1,36 @@
+"""
+Bytecode VM for Gulf of Mexico
+
+An alternative engine for the production interpreter, selected with
+--engine=vm (or interpreter.set_engine("vm")).
+
+Blocks of statements are compiled once into a compact bytecode
+(gulfofmexico/vm/opcodes.py) and run by a single dispatch loop with an
+evaluation stack (gulfofmexico/vm/machine.py), instead of walking the syntax
+tree through evaluate_expression for every node. The VM works on the value
+types from builtin.py and calls the same runtime helpers as interpreter.py,
+so programs behave the same under both engines.
+
+Modules:
+    - opcodes.py: the Op enum and what each instruction does
+    - compiler.py: syntax tree -> CodeObject, cached per block
+    - machine.py: the dispatch loop
+    - disassembler.py: readable listings (python -m gulfofmexico --disassemble)
+"""
+
+from gulfofmexico.vm.compiler import CodeObject, compile_block, get_code_object
+from gulfofmexico.vm.disassembler import disassemble, disassemble_all
+from gulfofmexico.vm.machine import interpret_code_statements_vm, run_code_object
+from gulfofmexico.vm.opcodes import Instruction, Op
+
+__all__ = [
+    "CodeObject",
+    "Instruction",
+    "Op",
+    "compile_block",
+    "disassemble",
+    "disassemble_all",
+    "get_code_object",
+    "interpret_code_statements_vm",
+    "run_code_object",
+]
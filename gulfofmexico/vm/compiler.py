@@ -0,0 +1,227 @@
+"""
+Compiler from Gulf of Mexico syntax trees to bytecode.
+
+A block of statements (a file, a function body, the body of an if) is
+compiled into one CodeObject. Each statement starts with SELECT_STATEMENT,
+which picks one of its parsed candidates at runtime with
+determine_statement_type, exactly like the interpreter, and jumps to the
+code of that candidate. Expression trees are compiled to stack code.
+
+Code objects are cached, so every block is compiled once, the first time it
+runs; the cache only holds the blocks of the running program.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Union
+
+from gulfofmexico.base import OperatorType, Token
+from gulfofmexico.interpreter import get_statement_line, tree_caches
+from gulfofmexico.processor.expression_tree import (
+    ExpressionNode,
+    ExpressionTreeNode,
+    FunctionNode,
+    IndexNode,
+    ListNode,
+    SingleOperatorNode,
+    ValueNode,
+)
+from gulfofmexico.processor.syntax_tree import (
+    AfterStatement,
+    BatchStatement,
+    ClassDeclaration,
+    CodeStatement,
+    Conditional,
+    DeleteStatement,
+    ExportStatement,
+    ExpressionStatement,
+    FunctionDefinition,
+    ImportStatement,
+    ReturnStatement,
+    ReverseStatement,
+    VariableAssignment,
+    VariableDeclaration,
+    WhenStatement,
+)
+from gulfofmexico.vm.opcodes import NO_TAIL, TAIL_RESULT, TAIL_RETURN, Instruction, Op
+
+__all__ = ["CodeObject", "Compiler", "compile_block", "get_code_object"]
+
+Statements = list[tuple[CodeStatement, ...]]
+
+
+@dataclass(frozen=True, eq=False)
+class CodeObject:
+    """The bytecode of a block of statements."""
+
+    instructions: tuple[Instruction, ...]
+    statements: Statements
+
+
+class Compiler:
+    """Emits the instructions of one block."""
+
+    def __init__(self) -> None:
+        self.instructions: list[list[Any]] = []
+
+    def emit(self, op: Op, arg: Any = None) -> int:
+        self.instructions.append([op, arg])
+        return len(self.instructions) - 1
+
+    def patch(self, index: int, arg: Any) -> None:
+        self.instructions[index][1] = arg
+
+    @property
+    def offset(self) -> int:
+        return len(self.instructions)
+
+    def compile_block(self, statements: Statements) -> CodeObject:
+        for i, statement_tuple in enumerate(statements):
+            self.compile_statement(statement_tuple, i == len(statements) - 1)
+        return CodeObject(
+            tuple((op, arg) for op, arg in self.instructions), statements
+        )
+
+    def compile_statement(
+        self, statement_tuple: tuple[CodeStatement, ...], last: bool = False
+    ) -> None:
+        select = self.emit(Op.SELECT_STATEMENT)
+        offsets: dict[int, int] = {}
+        jumps_to_end: list[int] = []
+        for i, statement in enumerate(statement_tuple):
+            offsets[id(statement)] = self.offset
+            self.compile_candidate(statement, last)
+            if i < len(statement_tuple) - 1:
+                jumps_to_end.append(self.emit(Op.JUMP))
+        for jump in jumps_to_end:
+            self.patch(jump, self.offset)
+        self.patch(select, (statement_tuple, offsets, self.offset))
+
+    def compile_candidate(self, statement: CodeStatement, last: bool = False) -> None:
+        """Compile one candidate; last is set for the last statement of the block."""
+        if (line := get_statement_line(statement)) is not None:
+            self.emit(Op.SET_LINE, line)
+
+        match statement:
+            case ExpressionStatement():
+                tail = TAIL_RESULT if last and not statement.debug else NO_TAIL
+                self.compile_expression(statement.expression, tail)
+                self.emit(Op.SET_RESULT, (statement.debug, statement.expression))
+            case ReturnStatement():
+                tail = NO_TAIL if statement.debug else TAIL_RETURN
+                self.compile_expression(statement.expression, tail)
+                self.emit(Op.RETURN_VALUE, (statement.debug, statement.expression))
+            case VariableDeclaration():
+                self.compile_expression(statement.expression)
+                self.emit(Op.DECLARE, statement)
+            case VariableAssignment():
+                for index in statement.indexes:
+                    self.compile_expression(index)
+                self.compile_expression(statement.expression)
+                self.emit(Op.ASSIGN, (statement, len(statement.indexes)))
+            case Conditional():
+                self.compile_expression(statement.expression)
+                self.emit(Op.CONDITIONAL, (statement, last))
+            case BatchStatement():
+                self.emit(Op.BATCH, statement)
+            case WhenStatement():
+                self.emit(Op.REGISTER_WHEN, statement)
+            case AfterStatement():
+                self.compile_expression(statement.expression)
+                self.emit(Op.AFTER, statement)
+            case FunctionDefinition():
+                self.emit(Op.DEFINE_FUNCTION, statement)
+            case ClassDeclaration():
+                self.emit(Op.DEFINE_CLASS, statement)
+            case DeleteStatement():
+                self.emit(Op.DELETE, statement)
+            case ReverseStatement():
+                self.emit(Op.REVERSE, statement)
+            case ImportStatement():
+                self.emit(Op.IMPORT, statement)
+            case ExportStatement():
+                self.emit(Op.EXPORT, statement)
+
+    def compile_expression(
+        self, expr: Union[list[Token], ExpressionTreeNode], tail: int = NO_TAIL
+    ) -> None:
+        """Compile an expression; tail tells a call at its top what follows it."""
+        match expr:
+            case FunctionNode():
+                # method call: the imaginary "this" goes in front of the args
+                call_expr = expr.method_call or expr
+                caller = expr.caller
+                load = self.emit(Op.LOAD_FUNCTION)
+                for arg in call_expr.args:
+                    self.compile_expression(arg)
+                self.emit(Op.CALL, (call_expr, caller, len(call_expr.args), tail))
+                self.patch(load, (expr, self.offset))
+
+            case ListNode():
+                for value in expr.values:
+                    self.compile_expression(value)
+                self.emit(Op.BUILD_LIST, len(expr.values))
+
+            case ValueNode():
+                if (template := expr.template) is not None:
+                    if not template.expressions and not template.unclosed:
+                        text = template.escaped[0]
+                        self.emit(Op.LOAD_TEXT, (text, expr.name_or_value))
+                    else:
+                        self.emit(Op.LOAD_STRING, expr)
+                elif expr.number is not None:
+                    self.emit(Op.LOAD_NUMBER, expr)
+                else:
+                    self.emit(Op.LOAD_NAME, expr.name_or_value)
+
+            case IndexNode():
+                self.compile_expression(expr.value)
+                self.compile_expression(expr.index)
+                self.emit(Op.INDEX)
+
+            case ExpressionNode():
+                self.compile_expression(expr.left)
+                short_circuit = None
+                if expr.operator == OperatorType.OR:
+                    short_circuit = self.emit(Op.JUMP_IF_TRUE_OR_KEEP)
+                elif expr.operator == OperatorType.AND:
+                    short_circuit = self.emit(Op.JUMP_IF_FALSE_OR_KEEP)
+                self.compile_expression(expr.right)
+                self.emit(Op.BINARY_OP, (expr.operator, expr.operator_token))
+                if short_circuit is not None:
+                    self.patch(short_circuit, self.offset)
+
+            case SingleOperatorNode():
+                self.compile_expression(expr.expression)
+                self.emit(Op.UNARY_OP, expr.operator)
+
+            case _:
+                # token lists whose tree failed to build at parse time
+                self.emit(Op.EVAL_TREE, expr)
+
+
+def compile_block(statements: Statements) -> CodeObject:
+    """Compile a block of statements into a new code object."""
+    return Compiler().compile_block(statements)
+
+
+# id of a block (or of the only statement in it) -> (that object, code object)
+# one of interpreter.tree_caches, so it is emptied before each program
+code_objects: dict[int, tuple[object, CodeObject]] = {}
+tree_caches.append(code_objects)
+
+
+def get_code_object(statements: Statements) -> CodeObject:
+    """The code object of a block, compiled on first use.
+
+    Async statements run one at a time in a new single statement list, so
+    those are cached by the statement instead of the list.
+    """
+    key: object = statements[0] if len(statements) == 1 else statements
+    cached = code_objects.get(id(key))
+    if cached is not None and cached[0] is key:
+        return cached[1]
+    code_object = compile_block(statements)
+    code_objects[id(key)] = (key, code_object)
+    return code_object
@@ -0,0 +1,127 @@
+"""
+Disassembler for Gulf of Mexico bytecode, for debugging the VM.
+
+    $ python -m gulfofmexico --disassemble script.gom
+
+prints every block of the file (the file itself, then function, if, when,
+after and class bodies) one instruction per line:
+
+    <file>
+        0  SELECT_STATEMENT  VariableDeclaration -> 1, end 5
+        1  SET_LINE          1
+        2  LOAD_NAME         42
+        ...
+"""
+
+from __future__ import annotations
+
+from typing import Any, Iterator
+
+from gulfofmexico.base import Token
+from gulfofmexico.processor.syntax_tree import CodeStatement
+from gulfofmexico.vm.compiler import CodeObject, compile_block
+from gulfofmexico.vm.opcodes import Op
+
+__all__ = ["disassemble", "disassemble_all", "format_instruction"]
+
+OPNAME_WIDTH = max(len(op.name) for op in Op)
+
+
+def format_argument(op: Op, arg: Any) -> str:
+    match op:
+        case Op.SELECT_STATEMENT:
+            candidates, offsets, end = arg
+            targets = ", ".join(
+                f"{type(st).__name__} -> {offsets[id(st)]}" for st in candidates
+            )
+            return f"{targets}, end {end}"
+        case Op.LOAD_NAME:
+            return str(arg.value)
+        case Op.LOAD_NUMBER:
+            return str(arg.name_or_value.value)
+        case Op.LOAD_STRING:
+            return repr(arg.name_or_value.value)
+        case Op.LOAD_TEXT:
+            return repr(arg[1].value)
+        case Op.BINARY_OP:
+            return arg[0].value
+        case Op.UNARY_OP:
+            return arg.value
+        case Op.LOAD_FUNCTION:
+            expr, skip = arg
+            return f"{expr.name.value} (keyword call skips to {skip})"
+        case Op.CALL:
+            call_expr, _, arg_count, tail = arg
+            tail_call = ", tail call" if tail else ""
+            return f"{call_expr.name.value} with {arg_count} argument(s){tail_call}"
+        case Op.DECLARE:
+            lifetime = f", lifetime {arg.lifetime}" if arg.lifetime else ""
+            modifiers = " ".join(token.value for token in arg.modifiers)
+            return (
+                f"{modifiers} {arg.name.value}, confidence {arg.confidence}"
+                f"{lifetime}"
+            )
+        case Op.ASSIGN:
+            statement, index_count = arg
+            return (
+                f"{statement.name.value} with {index_count} index(es), "
+                f"confidence {statement.confidence}"
+            )
+        case Op.SET_RESULT | Op.RETURN_VALUE:
+            return f"debug {arg[0]}" if arg[0] else ""
+        case Op.EVAL_TREE:
+            if isinstance(arg, list):
+                return " ".join(t.value for t in arg if isinstance(t, Token))
+            return type(arg).__name__
+        case Op.DEFINE_FUNCTION | Op.DEFINE_CLASS | Op.DELETE | Op.REVERSE:
+            return arg.name.value
+        case Op.IMPORT | Op.EXPORT:
+            return ", ".join(token.value for token in arg.names)
+        case Op.CONDITIONAL:
+            statement, last = arg
+            at_end = ", ends the block" if last else ""
+            count = len(statement.code)
+            return f"{statement.keyword.value} body of {count} statement(s){at_end}"
+        case Op.REGISTER_WHEN | Op.AFTER:
+            return f"{arg.keyword.value} body of {len(arg.code)} statement(s)"
+    return "" if arg is None else str(arg)
+
+
+def format_instruction(offset: int, op: Op, arg: Any) -> str:
+    line = f"{offset:>5}  {op.name:<{OPNAME_WIDTH}}  {format_argument(op, arg)}"
+    return line.rstrip()
+
+
+def disassemble(code_object: CodeObject) -> str:
+    """The instructions of one code object, one per line."""
+    return "\n".join(
+        format_instruction(offset, op, arg)
+        for offset, (op, arg) in enumerate(code_object.instructions)
+    )
+
+
+def nested_blocks(
+    statements: list[tuple[CodeStatement, ...]], label: str
+) -> Iterator[tuple[str, list[tuple[CodeStatement, ...]]]]:
+    yield label, statements
+    for statement_tuple in statements:
+        seen: set[int] = set()  # if, when and after candidates share one body
+        for statement in statement_tuple:
+            code = getattr(statement, "code", None)
+            if isinstance(code, list) and id(code) not in seen:
+                seen.add(id(code))
+                name = getattr(statement, "name", None) or getattr(
+                    statement, "keyword", None
+                )
+                inner = f"{type(statement).__name__} {getattr(name, 'value', '')}"
+                yield from nested_blocks(code, f"{label} > {inner.strip()}")
+
+
+def disassemble_all(
+    statements: list[tuple[CodeStatement, ...]], label: str = "<file>"
+) -> str:
+    """Every block of a program and of the bodies inside it."""
+    return "\n\n".join(
+        f"{name}\n{disassemble(compile_block(block))}"
+        for name, block in nested_blocks(statements, label)
+    )
@@ -0,0 +1,567 @@
+"""
+Dispatch loop of the Gulf of Mexico bytecode VM.
+
+run_code_object runs a CodeObject with one evaluation stack, one loop and
+no recursion for expressions. Function bodies and if bodies are blocks of
+their own, run in frames of the same loop (see run_code_object). Class,
+when and after bodies run through interpret_code_statements, which hands
+them back to this VM while it is the selected engine.
+
+Values are the ones from builtin.py, and every statement and operation goes
+through the same helpers as the tree-walking interpreter, so the VM behaves
+the same as interpreter.py.
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+import gulfofmexico.interpreter as interpreter
+from gulfofmexico.base import raise_error_at_line, raise_error_at_token
+from gulfofmexico.builtin import (
+    BuiltinFunction,
+    GulfOfMexicoFunction,
+    GulfOfMexicoIndexable,
+    GulfOfMexicoKeyword,
+    GulfOfMexicoList,
+    GulfOfMexicoSpecialBlankValue,
+    GulfOfMexicoString,
+    GulfOfMexicoValue,
+    UNDEFINED,
+    db_number,
+    db_to_boolean,
+)
+from gulfofmexico.interpreter import (
+    AsyncStatements,
+    Namespaces,
+    WhenStatementWatchers,
+    assign_variable,
+    bind_function_arguments,
+    call_function,
+    declare_class,
+    declare_function,
+    declare_new_variable,
+    determine_statement_type,
+    evaluate_expression_for_real,
+    execute_after_statement,
+    execute_batch_statement,
+    is_condition_met,
+    execute_delete_statement,
+    execute_export_statement,
+    execute_import_statement,
+    execute_reverse_statement,
+    get_value_from_namespaces,
+    perform_single_value_operation,
+    perform_two_value_operation,
+    print_expression_debug,
+    register_when_statement,
+    render_string_template,
+    run_async_statements,
+    scopes_are_shadowed,
+)
+from gulfofmexico.lifetimes import lifetime_expiry
+from gulfofmexico.processor.syntax_tree import CodeStatement
+from gulfofmexico.vm.compiler import CodeObject, get_code_object
+from gulfofmexico.vm.opcodes import TAIL_RETURN, Op
+
+__all__ = ["interpret_code_statements_vm", "run_code_object"]
+
+# the loop compares against module constants rather than Op attributes
+SELECT_STATEMENT = Op.SELECT_STATEMENT
+SET_LINE = Op.SET_LINE
+JUMP = Op.JUMP
+SET_RESULT = Op.SET_RESULT
+RETURN_VALUE = Op.RETURN_VALUE
+DECLARE = Op.DECLARE
+ASSIGN = Op.ASSIGN
+CONDITIONAL = Op.CONDITIONAL
+REGISTER_WHEN = Op.REGISTER_WHEN
+BATCH = Op.BATCH
+AFTER = Op.AFTER
+DEFINE_FUNCTION = Op.DEFINE_FUNCTION
+DEFINE_CLASS = Op.DEFINE_CLASS
+DELETE = Op.DELETE
+REVERSE = Op.REVERSE
+IMPORT = Op.IMPORT
+EXPORT = Op.EXPORT
+LOAD_NAME = Op.LOAD_NAME
+LOAD_STRING = Op.LOAD_STRING
+LOAD_TEXT = Op.LOAD_TEXT
+LOAD_NUMBER = Op.LOAD_NUMBER
+BUILD_LIST = Op.BUILD_LIST
+INDEX = Op.INDEX
+BINARY_OP = Op.BINARY_OP
+UNARY_OP = Op.UNARY_OP
+JUMP_IF_TRUE_OR_KEEP = Op.JUMP_IF_TRUE_OR_KEEP
+JUMP_IF_FALSE_OR_KEEP = Op.JUMP_IF_FALSE_OR_KEEP
+LOAD_FUNCTION = Op.LOAD_FUNCTION
+CALL = Op.CALL
+EVAL_TREE = Op.EVAL_TREE
+
+# what a frame is running; when it is done its value goes back to the frame
+# below it: the value of a call, or the result of the block an if is in
+NO_FRAME = 0
+ROOT_FRAME = 1  # the block run_code_object was given
+CALL_FRAME = 2  # the body of a GOM function
+IF_FRAME = 3  # an if body
+TAIL_IF_FRAME = 4  # an if body whose block ends with it
+
+# fields of a saved frame that tail calls look at
+ASYNC_STATEMENTS = 4
+KIND = 9
+BASE_NAMESPACES = 10
+BASE_WATCHERS = 11
+
+
+def raise_deleted(value: GulfOfMexicoValue) -> None:
+    raise_error_at_line(
+        interpreter.filename,
+        interpreter.code,
+        interpreter.current_line,
+        f"The value {value.value} has been deleted.",  # type: ignore[attr-defined]
+    )
+
+
+def run_code_object(
+    code_object: CodeObject,
+    namespaces: Namespaces,
+    async_statements: AsyncStatements,
+    when_statement_watchers: WhenStatementWatchers,
+    importable_names: dict[str, dict[str, GulfOfMexicoValue]],
+    exported_names: list[tuple[str, str, GulfOfMexicoValue]],
+) -> Optional[GulfOfMexicoValue]:
+    """Run a block of bytecode, like interpret_code_statements runs statements.
+
+    Calls of GOM functions and if bodies do not recurse: the running frame is
+    saved on an explicit stack and the machine carries on with the new block,
+    so their depth is only limited by memory. A call in tail position replaces
+    the frame of the function it ends instead of going on top of it.
+    """
+    instructions = code_object.instructions
+    end = len(instructions)
+    deleted_values = interpreter.deleted_values
+    tick = lifetime_expiry.tick
+    stack: list = []
+    push = stack.append
+    pop = stack.pop
+    result = None
+    pc = 0
+    kind = ROOT_FRAME
+    # the scopes a running function was called in, for tail calls
+    base_namespaces = namespaces
+    base_watchers = when_statement_watchers
+    frames: list[tuple] = []
+
+    while True:
+        while pc < end:
+            op, arg = instructions[pc]
+            pc += 1
+
+            # roughly by how often they run
+            if op is SELECT_STATEMENT:
+                candidates, offsets, statement_end = arg
+                statement = determine_statement_type(candidates, namespaces)
+                if statement is None:
+                    pc = statement_end
+                else:
+                    pc = offsets[id(statement)]
+                    tick()
+
+            elif op is SET_LINE:
+                interpreter.current_line = arg
+
+            elif op is LOAD_NAME:
+                value = get_value_from_namespaces(arg, namespaces)
+                if deleted_values.bits and value in deleted_values:
+                    raise_deleted(value)
+                push(value)
+
+            elif op is LOAD_NUMBER:
+                token = arg.name_or_value
+                if namespaces.is_bound(token.value):
+                    value = get_value_from_namespaces(token, namespaces)
+                else:
+                    value = db_number(arg.number)
+                if deleted_values.bits and value in deleted_values:
+                    raise_deleted(value)
+                push(value)
+
+            elif op is BINARY_OP:
+                right = pop()
+                value = perform_two_value_operation(pop(), right, arg[0], arg[1])
+                if deleted_values.bits and value in deleted_values:
+                    raise_deleted(value)
+                push(value)
+
+            elif op is LOAD_FUNCTION:
+                expr, skip = arg
+                func = namespaces.lookup(expr.name.value)
+                if func is None:
+                    raise_error_at_token(
+                        interpreter.filename,
+                        interpreter.code,
+                        "Cannot find token in namespace.",
+                        expr.name,
+                    )
+                if isinstance(func.value, GulfOfMexicoKeyword):
+                    # await, previous and next look at their arguments unevaluated
+                    value = evaluate_expression_for_real(
+                        expr,
+                        namespaces,
+                        async_statements,
+                        when_statement_watchers,
+                        False,
+                    )
+                    if deleted_values.bits and value in deleted_values:
+                        raise_deleted(value)
+                    push(value)
+                    pc = skip
+                    continue
+                if not isinstance(func.value, (BuiltinFunction, GulfOfMexicoFunction)):
+                    raise_error_at_token(
+                        interpreter.filename,
+                        interpreter.code,
+                        "Attempted function call on non-function value.",
+                        expr.name,
+                    )
+                push(func.value)
+
+            elif op is CALL:
+                call_expr, caller, arg_count, tail = arg
+                args = stack[len(stack) - arg_count :]
+                del stack[len(stack) - arg_count :]
+                func = pop()
+                if type(func) is not GulfOfMexicoFunction or func.is_async:
+                    value = call_function(
+                        call_expr,
+                        func,
+                        caller,
+                        args,
+                        False,
+                        namespaces,
+                        async_statements,
+                        when_statement_watchers,
+                    )
+                    if deleted_values.bits and value in deleted_values:
+                        raise_deleted(value)
+                    push(value)
+                    continue
+
+                # what call_function ends up doing for a normal function, with
+                # the body run in a new frame of this loop
+                if isinstance(args[0], GulfOfMexicoSpecialBlankValue):
+                    args = args[1:]
+                function_namespace = bind_function_arguments(call_expr, func, args)
+
+                # a tail call ends the innermost function frame, unless an if
+                # body or pending async statements still have to see its value
+                target = len(frames)
+                target_kind = NO_FRAME
+                if tail == TAIL_RETURN or (tail and not async_statements):
+                    target_kind = kind
+                    while target_kind is TAIL_IF_FRAME:
+                        target -= 1
+                        if frames[target][ASYNC_STATEMENTS]:
+                            break
+                        target_kind = frames[target][KIND]
+
+                if target_kind is CALL_FRAME:
+                    if target < len(frames):
+                        ended = frames[target]
+                        ended_namespaces = ended[BASE_NAMESPACES]
+                        ended_watchers = ended[BASE_WATCHERS]
+                        del frames[target:]
+                    else:
+                        ended_namespaces = base_namespaces
+                        ended_watchers = base_watchers
+                    if scopes_are_shadowed(
+                        namespaces, ended_namespaces, func.args
+                    ) and scopes_are_shadowed(
+                        when_statement_watchers, ended_watchers, ()
+                    ):
+                        base_namespaces = ended_namespaces
+                        base_watchers = ended_watchers
+                    else:
+                        base_namespaces = namespaces
+                        base_watchers = when_statement_watchers
+                else:
+                    frames.append(
+                        (
+                            instructions,
+                            pc,
+                            stack,
+                            namespaces,
+                            async_statements,
+                            when_statement_watchers,
+                            importable_names,
+                            exported_names,
+                            result,
+                            kind,
+                            base_namespaces,
+                            base_watchers,
+                        )
+                    )
+                    base_namespaces = namespaces
+                    base_watchers = when_statement_watchers
+
+                instructions = get_code_object(func.code).instructions
+                end = len(instructions)
+                pc = 0
+                stack = []
+                push = stack.append
+                pop = stack.pop
+                namespaces = base_namespaces.push(function_namespace)
+                async_statements = []
+                when_statement_watchers = base_watchers.push()
+                importable_names = {}
+                exported_names = []
+                result = None
+                kind = CALL_FRAME
+
+            elif op is LOAD_STRING:
+                value = render_string_template(
+                    arg.template,
+                    arg.name_or_value,
+                    namespaces,
+                    async_statements,
+                    when_statement_watchers,
+                )
+                if deleted_values.bits and value in deleted_values:
+                    raise_deleted(value)
+                push(value)
+
+            elif op is LOAD_TEXT:
+                value = GulfOfMexicoString(arg[0])  # strings are mutable, so a new one
+                if deleted_values.bits and value in deleted_values:
+                    raise_deleted(value)
+                push(value)
+
+            elif op is JUMP_IF_TRUE_OR_KEEP:
+                if db_to_boolean(stack[-1]).value == True:
+                    pc = arg
+
+            elif op is JUMP_IF_FALSE_OR_KEEP:
+                if db_to_boolean(stack[-1]).value == False:
+                    pc = arg
+
+            elif op is INDEX:
+                index = pop()
+                value = pop()
+                if not isinstance(value, GulfOfMexicoIndexable):
+                    raise_error_at_line(
+                        interpreter.filename,
+                        interpreter.code,
+                        interpreter.current_line,
+                        "Attempting to index a value that is not indexable.",
+                    )
+                value = value.access_index(index)
+                if deleted_values.bits and value in deleted_values:
+                    raise_deleted(value)
+                push(value)
+
+            elif op is CONDITIONAL:
+                statement, last = arg
+                if not is_condition_met(pop()):
+                    result = None
+                    continue
+                # the body runs in a new frame, like execute_conditional
+                frames.append(
+                    (
+                        instructions,
+                        pc,
+                        stack,
+                        namespaces,
+                        async_statements,
+                        when_statement_watchers,
+                        importable_names,
+                        exported_names,
+                        result,
+                        kind,
+                        base_namespaces,
+                        base_watchers,
+                    )
+                )
+                instructions = get_code_object(statement.code).instructions
+                end = len(instructions)
+                pc = 0
+                stack = []
+                push = stack.append
+                pop = stack.pop
+                namespaces = namespaces.push()
+                async_statements = []
+                when_statement_watchers = when_statement_watchers.push()
+                result = None
+                kind = TAIL_IF_FRAME if last else IF_FRAME
+
+            elif op is UNARY_OP:
+                value = perform_single_value_operation(pop(), arg)
+                if deleted_values.bits and value in deleted_values:
+                    raise_deleted(value)
+                push(value)
+
+            elif op is BUILD_LIST:
+                values = stack[len(stack) - arg :]
+                del stack[len(stack) - arg :]
+                push(GulfOfMexicoList(values))
+
+            elif op is EVAL_TREE:
+                value = evaluate_expression_for_real(
+                    arg, namespaces, async_statements, when_statement_watchers, False
+                )
+                if deleted_values.bits and value in deleted_values:
+                    raise_deleted(value)
+                push(value)
+
+            elif op is JUMP:
+                pc = arg
+
+            elif op is SET_RESULT:
+                result = pop()
+                print_expression_debug(arg[0], arg[1], result, namespaces)
+
+            elif op is RETURN_VALUE:
+                result = pop()
+                print_expression_debug(arg[0], arg[1], result, namespaces)
+                break  # returning skips the async statements
+
+            elif op is DECLARE:
+                declare_new_variable(
+                    arg, pop(), namespaces, async_statements, when_statement_watchers
+                )
+
+            elif op is ASSIGN:
+                statement, index_count = arg
+                new_value = pop()
+                indexes = stack[len(stack) - index_count :]
+                del stack[len(stack) - index_count :]
+                assign_variable(
+                    statement,
+                    indexes,
+                    new_value,
+                    namespaces,
+                    async_statements,
+                    when_statement_watchers,
+                )
+
+            elif op is BATCH:
+                result = execute_batch_statement(
+                    arg.code,
+                    namespaces,
+                    async_statements,
+                    when_statement_watchers,
+                    importable_names,
+                    exported_names,
+                )
+
+            elif op is REGISTER_WHEN:
+                register_when_statement(
+                    arg.expression,
+                    arg.code,
+                    namespaces,
+                    async_statements,
+                    when_statement_watchers,
+                    importable_names,
+                    exported_names,
+                )
+
+            elif op is AFTER:
+                execute_after_statement(
+                    pop(),
+                    arg.code,
+                    namespaces,
+                    when_statement_watchers,
+                    importable_names,
+                    exported_names,
+                )
+
+            elif op is DEFINE_FUNCTION:
+                declare_function(arg, namespaces)
+
+            elif op is DEFINE_CLASS:
+                declare_class(
+                    arg,
+                    namespaces,
+                    async_statements,
+                    when_statement_watchers,
+                    importable_names,
+                    exported_names,
+                )
+
+            elif op is DELETE:
+                execute_delete_statement(arg, namespaces)
+
+            elif op is REVERSE:
+                execute_reverse_statement(arg, namespaces)
+
+            elif op is IMPORT:
+                execute_import_statement(arg, namespaces, importable_names)
+
+            elif op is EXPORT:
+                execute_export_statement(arg, namespaces, exported_names)
+
+            else:  # pragma: no cover
+                raise ValueError(f"Unknown opcode {op!r}")
+
+        else:
+            result = run_async_statements(
+                async_statements,
+                when_statement_watchers,
+                importable_names,
+                exported_names,
+                result,
+            )
+
+        # the block is done and result is its value: back to the frame below
+        if kind is ROOT_FRAME:
+            return result
+        value = result
+        finished_kind = kind
+        (
+            instructions,
+            pc,
+            stack,
+            namespaces,
+            async_statements,
+            when_statement_watchers,
+            importable_names,
+            exported_names,
+            result,
+            kind,
+            base_namespaces,
+            base_watchers,
+        ) = frames.pop()
+        end = len(instructions)
+        push = stack.append
+        pop = stack.pop
+        if finished_kind is CALL_FRAME:
+            value = value or UNDEFINED
+            if deleted_values.bits and value in deleted_values:
+                raise_deleted(value)
+            push(value)
+        else:
+            result = value
+
+
+def interpret_code_statements_vm(
+    statements: list[tuple[CodeStatement, ...]],
+    namespaces: Namespaces,
+    async_statements: AsyncStatements,
+    when_statement_watchers: WhenStatementWatchers,
+    importable_names: dict[str, dict[str, GulfOfMexicoValue]],
+    exported_names: list[tuple[str, str, GulfOfMexicoValue]],
+    *,
+    in_tail_position: bool = False,
+) -> Optional[GulfOfMexicoValue]:
+    """Interpret a list of code statements on the VM; installed by set_engine.
+
+    The VM makes its own tail calls, so it never returns a TailCall and
+    in_tail_position is not needed.
+    """
+    return run_code_object(
+        get_code_object(statements),
+        namespaces,
+        async_statements,
+        when_statement_watchers,
+        importable_names,
+        exported_names,
+    )
@@ -0,0 +1,80 @@
+"""
+Opcodes of the Gulf of Mexico bytecode.
+
+An instruction is a pair (Op, argument). Expressions are compiled to stack
+code: operands are pushed on the evaluation stack and operations pop them
+and push their result. Statements consume the stack and act on the
+namespaces through the same helpers as the tree-walking interpreter.
+
+Every instruction that produces the value of a whole expression node
+checks it against the deleted values, like evaluate_expression does.
+"""
+
+from __future__ import annotations
+
+from enum import IntEnum
+from typing import Any
+
+__all__ = [
+    "Instruction",
+    "Op",
+    "JUMP_OPS",
+    "NO_TAIL",
+    "TAIL_RETURN",
+    "TAIL_RESULT",
+]
+
+
+class Op(IntEnum):
+    # statements
+    SELECT_STATEMENT = 0  # (candidates, {id(candidate): offset}, end): pick one
+    SET_LINE = 1  # line: the line errors are reported at
+    JUMP = 2  # offset
+    SET_RESULT = 3  # (debug, expression): pop the result of the block
+    RETURN_VALUE = 4  # (debug, expression): pop and return it from the block
+    DECLARE = 5  # VariableDeclaration: pop, declare with confidence and lifetime
+    ASSIGN = 6  # (VariableAssignment, index count): pop value and indexes, assign
+    CONDITIONAL = 7  # (Conditional, last statement of the block): pop the
+    # condition, run its body
+    REGISTER_WHEN = 8  # WhenStatement: watch its condition
+    AFTER = 9  # AfterStatement: pop the event, register its body
+    DEFINE_FUNCTION = 10  # FunctionDefinition
+    DEFINE_CLASS = 11  # ClassDeclaration
+    DELETE = 12  # DeleteStatement
+    REVERSE = 13  # ReverseStatement
+    IMPORT = 14  # ImportStatement
+    EXPORT = 15  # ExportStatement
+
+    # expressions
+    LOAD_NAME = 16  # token: value of a name, or the literal it spells
+    LOAD_STRING = 17  # ValueNode: string literal, rendered from its template
+    BUILD_LIST = 18  # count: pop count values into a list
+    INDEX = 19  # pop index and value, push value[index]
+    BINARY_OP = 20  # (operator, token): pop right and left, push the result
+    UNARY_OP = 21  # operator: pop a value, push the result
+    JUMP_IF_TRUE_OR_KEEP = 22  # offset: short circuit of |, keeps the left value
+    JUMP_IF_FALSE_OR_KEEP = 23  # offset: short circuit of &, keeps the left value
+    LOAD_FUNCTION = 24  # (FunctionNode, offset): push the function being called,
+    # or evaluate a keyword call (await, next, previous) and jump to offset
+    CALL = 25  # (FunctionNode, caller, argument count, tail): pop args and
+    # function
+    EVAL_TREE = 26  # expression: evaluate with the tree-walking evaluator
+    LOAD_NUMBER = 27  # ValueNode: the number its name spells, unless it is bound
+
+    # statements added later
+    BATCH = 28  # BatchStatement: run its body, then the whens it set off
+
+    # expressions added later
+    LOAD_TEXT = 29  # (text, token): a string literal without ${}, as a new string
+
+
+JUMP_OPS = frozenset(
+    {Op.JUMP, Op.JUMP_IF_TRUE_OR_KEEP, Op.JUMP_IF_FALSE_OR_KEEP}
+)
+
+Instruction = tuple[Op, Any]
+
+# whether what a CALL returns is also what its block results in
+NO_TAIL = 0
+TAIL_RETURN = 1  # return f(x)!
+TAIL_RESULT = 2  # f(x)! as the last statement, once no async statement is left
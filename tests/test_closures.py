@@ -0,0 +1,126 @@
+"""Tests for the closure compiler engine (gulfofmexico/closures.py).
+
+Every program is run with both engines, which must print the same thing.
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from typing import Union
+
+import gulfofmexico.interpreter as interpreter
+from gulfofmexico.builtin import KEYWORDS, GulfOfMexicoValue, Name, Variable
+from gulfofmexico.base import InterpretationError
+from gulfofmexico.closures import compile_statement, compiled_statements
+from gulfofmexico.differential import compare_engines, default_programs
+from gulfofmexico.processor.lexer import tokenize
+from gulfofmexico.processor.syntax_tree import generate_syntax_tree
+
+TEST_FILENAME = "__test__"
+
+
+def run_code(code: str, engine: str) -> str:
+    """Run a program with an engine and return everything it printed."""
+    interpreter.set_engine(engine)
+    interpreter.filename = TEST_FILENAME
+    interpreter.code = code
+    statements = generate_syntax_tree(
+        TEST_FILENAME, tokenize(TEST_FILENAME, code), code
+    )
+    namespaces: list[dict[str, Union[Variable, Name]]] = [KEYWORDS.copy()]  # type: ignore
+    exported_names: list[tuple[str, str, GulfOfMexicoValue]] = []
+    interpreter.load_global_gulfofmexico_variables(namespaces)
+    out = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(out):
+            interpreter.interpret_code_statements_main_wrapper(
+                statements, namespaces, [], [{}], {}, exported_names
+            )
+    except InterpretationError as e:
+        out.write(f"error: {e}\n")
+    finally:
+        interpreter.set_engine("interpreter")
+    return out.getvalue()
+
+
+class TestClosureEngine(unittest.TestCase):
+    """The closure engine behaves exactly like the tree-walking interpreter."""
+
+    def assertSameOutput(self, code: str, expected: str):
+        self.assertEqual(run_code(code, "interpreter"), expected)
+        self.assertEqual(run_code(code, "closures"), expected)
+
+    def test_functions_and_conditionals(self):
+        code = (
+            "function add(a, b) => a + b!\n"
+            "var total = 0!\n"
+            "function loop(n) => {\n"
+            "   if n > 0 {\n"
+            "      total = add(total, n)!\n"
+            "      return loop(n-1)!\n"
+            "   }\n"
+            "}\n"
+            "loop(5)!\n"
+            "print(total)!\n"
+        )
+        self.assertSameOutput(code, "15\n")
+
+    def test_lists_strings_and_operators(self):
+        code = (
+            "const const xs = [1, 2, 3]!\n"
+            "print(xs[0])!\n"
+            'const const name = "gulf"!\n'
+            'print("hi ${name}")!\n'
+            "const const big = 2 > 1!\n"
+            "print(big)!\n"
+            "print(true | false)!\n"
+        )
+        self.assertSameOutput(code, "1\nhi gulf\ntrue\ntrue\n")
+
+    def test_errors_are_the_same(self):
+        code = "const x = 1!\nprint(y z)!\n"
+        self.assertEqual(run_code(code, "closures"), run_code(code, "interpreter"))
+        self.assertIn("error:", run_code(code, "closures"))
+
+    def test_statements_are_compiled_once(self):
+        statements = generate_syntax_tree(
+            TEST_FILENAME, tokenize(TEST_FILENAME, "print(1)!\n"), "print(1)!\n"
+        )
+        compiled = compile_statement(statements[0])
+        self.assertIs(compile_statement(statements[0]), compiled)
+
+    def test_compiled_statements_are_not_kept_for_the_next_program(self):
+        statements = generate_syntax_tree(
+            TEST_FILENAME, tokenize(TEST_FILENAME, "print(1)!\n"), "print(1)!\n"
+        )
+        compile_statement(statements[0])
+        interpreter.start_program()
+        self.assertNotIn(id(statements[0]), compiled_statements)
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            interpreter.set_engine("jit")
+
+
+class TestDifferential(unittest.TestCase):
+    """programs/engines/*.gom run to completion and print the same under every
+    engine."""
+
+    def test_engine_programs(self):
+        self.assertTrue(default_programs())
+        self.assertEqual(compare_engines(default_programs()), {})
+
+    def test_errors_are_reported(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "error.gom")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("print(1)!\nprint(y z)!\n")
+            runs = compare_engines([path])[path]
+        self.assertTrue(all(run.failed for run in runs.values()))
+        self.assertEqual(len({run.output for run in runs.values()}), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+"""Tests for the registry of deleted values (gulfofmexico/deletion.py)."""
+
+import unittest
+
+from gulfofmexico.builtin import GulfOfMexicoList, GulfOfMexicoString, db_number
+from gulfofmexico.deletion import DeletedValues, bloom_mask
+
+
+class TestDeletedValues(unittest.TestCase):
+    """Deleted numbers and strings are found by value, others are ignored."""
+
+    def setUp(self):
+        self.deleted = DeletedValues()
+
+    def test_empty(self):
+        self.assertEqual(self.deleted.bits, 0)
+        self.assertNotIn(db_number(5), self.deleted)
+
+    def test_by_value(self):
+        self.deleted.add(db_number(5))
+        self.deleted.add(GulfOfMexicoString("hi"))
+        self.assertIn(db_number(5), self.deleted)
+        self.assertIn(db_number(5.0), self.deleted)
+        self.assertIn(GulfOfMexicoString("hi"), self.deleted)
+        self.assertNotIn(db_number(6), self.deleted)
+        self.assertNotIn(GulfOfMexicoString("5"), self.deleted)
+
+    def test_filter_hit_without_tombstone(self):
+        self.deleted.add(db_number(1))
+        # the same two filter bits, but not deleted
+        self.assertEqual(bloom_mask(1 + 64 * 64), bloom_mask(1))
+        self.assertNotIn(db_number(1 + 64 * 64), self.deleted)
+
+    def test_other_values_are_not_kept(self):
+        self.deleted.add(GulfOfMexicoList([db_number(1)]))
+        self.assertEqual(len(self.deleted), 0)
+        self.assertEqual(self.deleted.bits, 0)
+
+    def test_clear(self):
+        self.deleted.add(db_number(5))
+        self.deleted.clear()
+        self.assertEqual(self.deleted.bits, 0)
+        self.assertNotIn(db_number(5), self.deleted)
+
+
+if __name__ == "__main__":
+    unittest.main()
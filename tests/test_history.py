@@ -0,0 +1,80 @@
+"""Tests for the previous values of variables (gulfofmexico/history.py)."""
+
+import unittest
+
+from gulfofmexico.history import ValueHistory
+
+
+class TestValueHistory(unittest.TestCase):
+    """Only the last values are kept, but every value is counted."""
+
+    def setUp(self):
+        self.default_depth = ValueHistory.default_depth
+        self.addCleanup(setattr, ValueHistory, "default_depth", self.default_depth)
+
+    def test_depth(self):
+        history = ValueHistory(depth=2)
+        for value in range(5):
+            history.append(value)
+        self.assertEqual(list(history), [3, 4])
+        self.assertEqual(len(history), 5)
+        self.assertEqual(history[-1], 4)
+        self.assertEqual(history[3], 3)
+        with self.assertRaises(IndexError):
+            history[2]
+
+    def test_default_depth(self):
+        history = ValueHistory([1, 2, 3])
+        self.assertEqual(list(history), [3])
+        ValueHistory.default_depth = 0  # keeps all
+        history = ValueHistory([1, 2, 3])
+        self.assertEqual(list(history), [1, 2, 3])
+
+    def test_pinned_values_are_kept(self):
+        history = ValueHistory(depth=1)
+        history.append(0)
+        history.pin(1)
+        for value in range(1, 5):
+            history.append(value)
+        self.assertEqual(history[1], 1)
+        self.assertEqual(list(history), [1, 2, 3, 4])
+        history.unpin(1)
+        self.assertEqual(list(history), [4])
+
+    def test_pinned_twice(self):
+        history = ValueHistory([0], depth=1)
+        history.pin(0)
+        history.pin(0)
+        history.append(1)
+        history.unpin(0)
+        self.assertEqual(history[0], 0)
+        history.unpin(0)
+        self.assertEqual(list(history), [1])
+
+    def test_copy(self):
+        history = ValueHistory(range(4), depth=2)
+        history.pin(2)
+        history.append(4)
+        copied = history.copy(lambda value: value * 10)
+        self.assertEqual(list(copied), [20, 30, 40])
+        self.assertEqual(len(copied), len(history))
+        self.assertEqual(copied[2], 20)
+        self.assertEqual(copied.depth, 2)
+        history.unpin(2)
+        copied.append(50)
+        self.assertEqual(copied[2], 20)  # still pinned in the copy
+
+    def test_oldest_since(self):
+        history = ValueHistory(range(4), depth=2)
+        self.assertEqual(history.oldest_since(0), 2)
+        self.assertEqual(history.oldest_since(3), 3)
+
+    def test_empty(self):
+        history = ValueHistory()
+        self.assertFalse(history)
+        with self.assertRaises(IndexError):
+            history[-1]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+"""Tests for the index maps of lists and strings (gulfofmexico/indexing.py)."""
+
+import random
+import unittest
+
+from gulfofmexico.builtin import (
+    LIST_METHODS,
+    GulfOfMexicoList,
+    GulfOfMexicoNumber,
+    GulfOfMexicoString,
+    db_list_push,
+    db_str_push,
+)
+from gulfofmexico.indexing import IndexMap, StringIndexMap
+
+
+def numbers(*values):
+    return [GulfOfMexicoNumber(value) for value in values]
+
+
+class TestIndexMap(unittest.TestCase):
+    """An IndexMap behaves like the dict of indexes it replaces."""
+
+    def test_identity(self):
+        index_map = IndexMap.identity(-1, 4)
+        self.assertEqual(index_map, {-1: -1, 0: 0, 1: 1, 2: 2, 3: 3})
+        self.assertEqual(list(index_map), [-1, 0, 1, 2, 3])
+        self.assertEqual(index_map.max_key(), 3)
+        self.assertEqual(len(IndexMap.identity(-1, -1)), 0)
+        with self.assertRaises(ValueError):
+            IndexMap().max_key()
+
+    def test_identity_is_implicit_until_an_index_moves(self):
+        index_map = IndexMap.identity(-1, 3)
+        index_map[3] = 3  # a push
+        index_map[0] = 0
+        index_map.shift_after(3, 1)
+        self.assertIsNone(index_map.root)
+        self.assertEqual(index_map.get(1.0), 1)
+        self.assertNotIn(0.5, index_map)
+        index_map.shift_after(0, 1)
+        self.assertIsNotNone(index_map.root)
+        self.assertEqual(index_map, {-1: -1, 0: 0, 1: 2, 2: 3, 3: 4})
+
+    def test_shift_after(self):
+        index_map = IndexMap.identity(-1, 3)
+        index_map[0.5] = 1
+        index_map.shift_after(0.5, 1)
+        self.assertEqual(index_map, {-1: -1, 0: 0, 0.5: 1, 1: 2, 2: 3})
+        self.assertEqual(list(index_map.items())[2:], [(0.5, 1), (1, 2), (2, 3)])
+
+    def test_same_as_a_dict(self):
+        rng = random.Random(0)
+        expected = {i: i for i in range(-1, 20)}
+        index_map = IndexMap.identity(-1, 20)
+        for _ in range(2000):
+            key = rng.randint(-4, 60) / 2
+            action = rng.random()
+            if action < 0.4:
+                expected[key] = index_map[key] = rng.randint(0, 50)
+            elif action < 0.8:
+                for k in expected:
+                    if k > key:
+                        expected[k] += 1
+                index_map.shift_after(key, 1)
+            elif key in expected:
+                del expected[key]
+                del index_map[key]
+            self.assertEqual(index_map.get(key), expected.get(key))
+        self.assertEqual(dict(index_map.items()), expected)
+        self.assertEqual(list(index_map), sorted(expected))
+
+
+class TestStringIndexMap(unittest.TestCase):
+    """A string's indexes keep the characters assigned after the first."""
+
+    def test_extra_characters(self):
+        index_map = StringIndexMap.identity(-1, 2)
+        index_map[2] = (2, "yz")
+        self.assertEqual(
+            index_map, {-1: (-1, ""), 0: (0, ""), 1: (1, ""), 2: (2, "yz")}
+        )
+        self.assertIsNone(index_map.root)
+        index_map[2] = (2, "")
+        self.assertEqual(index_map.extras, {})
+
+    def test_string_push_and_insert(self):
+        value = GulfOfMexicoString("ac")
+        value.assign_index(GulfOfMexicoNumber(-0.5), GulfOfMexicoString("b"))
+        self.assertEqual(value.value, "abc")
+        self.assertEqual(value.indexer, {-1: (-1, ""), -0.5: (0, ""), 0: (1, "")})
+        db_str_push(value, GulfOfMexicoString("de"))
+        self.assertEqual(value.indexer[1], (2, "e"))
+        self.assertEqual(value.namespace["length"].value, GulfOfMexicoNumber(5))
+
+
+class TestFractionalIndexing(unittest.TestCase):
+    """Lists keep their -1 based and fractional indexing."""
+
+    def test_insert_between(self):
+        values = GulfOfMexicoList(numbers(1, 2, 3))
+        values.assign_index(GulfOfMexicoNumber(0.5), GulfOfMexicoNumber(9))
+        self.assertEqual([v.value for v in values.values], [1, 2, 9, 3])
+        self.assertEqual(values.indexer, {-1: -1, 0: 0, 0.5: 1, 1: 2})
+        values.assign_index(GulfOfMexicoNumber(-0.5), GulfOfMexicoNumber(7))
+        self.assertEqual([v.value for v in values.values], [1, 7, 2, 9, 3])
+        self.assertEqual(values.indexer, {-1: -1, -0.5: 0, 0: 1, 0.5: 2, 1: 3})
+        self.assertEqual(values.namespace["length"].value, GulfOfMexicoNumber(5))
+
+    def test_methods_are_shared(self):
+        first, second = GulfOfMexicoList([]), GulfOfMexicoList(numbers(1))
+        self.assertIs(first.namespace["push"], LIST_METHODS["push"])
+        self.assertIs(first.namespace["pop"], second.namespace["pop"])
+        self.assertEqual(second.namespace["length"].value, GulfOfMexicoNumber(1))
+
+    def test_push_after_the_last_index(self):
+        values = GulfOfMexicoList(numbers(1, 2))
+        db_list_push(values, GulfOfMexicoNumber(3))
+        self.assertEqual(values.indexer, {-1: -1, 0: 0, 1: 1})
+
+    def test_many_inserts(self):
+        values = GulfOfMexicoList(numbers(0, 1))
+        count = 5000
+        for i in range(1, count):
+            values.assign_index(GulfOfMexicoNumber(i / count), GulfOfMexicoNumber(i))
+        self.assertEqual(len(values.values), count + 1)
+        self.assertEqual(values.indexer[(count - 1) / count], 1)
+        self.assertEqual(values.indexer[0], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,643 @@
+"""Tests for the production interpreter (gulfofmexico/interpreter.py).
+
+Programs are run through the same pipeline as run_file(): tokenize,
+generate_syntax_tree and interpret_code_statements_main_wrapper. Public
+globals are not loaded, so the tests never touch the network.
+"""
+
+import contextlib
+import gc
+import io
+import threading
+import unittest
+from typing import Union
+
+import gulfofmexico.interpreter as interpreter
+from gulfofmexico.builtin import (
+    KEYWORDS,
+    MAYBE,
+    GulfOfMexicoList,
+    GulfOfMexicoNumber,
+    GulfOfMexicoString,
+    GulfOfMexicoValue,
+    Name,
+    Variable,
+    copy_binding,
+    copy_value,
+    db_boolean,
+    db_list_push,
+    db_number,
+    db_str_push,
+)
+from gulfofmexico.base import InterpretationError, OperatorType
+from gulfofmexico.lifetimes import lifetime_expiry
+from gulfofmexico.processor.expression_tree import (
+    ExpressionNode,
+    ExpressionTreeNode,
+    FunctionNode,
+    ListNode,
+    ValueNode,
+    build_expression_tree,
+    compile_string_template,
+)
+from gulfofmexico.processor.lexer import tokenize
+from gulfofmexico.processor.syntax_tree import (
+    ExpressionStatement,
+    VariableDeclaration,
+    generate_syntax_tree,
+)
+from gulfofmexico.scope import ScopeChain
+
+TEST_FILENAME = "__test__"
+
+
+def parse_code(code: str):
+    interpreter.filename = TEST_FILENAME
+    interpreter.code = code
+    return generate_syntax_tree(TEST_FILENAME, tokenize(TEST_FILENAME, code), code)
+
+
+def run_code(code: str) -> str:
+    """Run a program and return everything it printed."""
+    statements = parse_code(code)
+    namespaces: list[dict[str, Union[Variable, Name]]] = [KEYWORDS.copy()]  # type: ignore
+    exported_names: list[tuple[str, str, GulfOfMexicoValue]] = []
+    interpreter.load_globals(TEST_FILENAME, code, {}, set(), exported_names, {})
+    interpreter.load_global_gulfofmexico_variables(namespaces)
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        interpreter.interpret_code_statements_main_wrapper(
+            statements, namespaces, [], [{}], {}, exported_names
+        )
+    return out.getvalue()
+
+
+class TestExpressionCompilation(unittest.TestCase):
+    """Expressions are built into trees once, at parse time."""
+
+    def test_statements_hold_built_trees(self):
+        statements = parse_code("const x = 1 + 2!\nprint(x)!\n")
+        for candidates in statements:
+            for st in candidates:
+                if isinstance(st, (VariableDeclaration, ExpressionStatement)):
+                    self.assertIsInstance(st.expression, ExpressionTreeNode)
+
+    def test_nodes_are_immutable(self):
+        statements = parse_code("print(1, 2)!\n")
+        expr = next(
+            st.expression
+            for st in statements[0]
+            if isinstance(st, ExpressionStatement)
+        )
+        self.assertIsInstance(expr, FunctionNode)
+        self.assertIsInstance(expr.args, tuple)
+        with self.assertRaises(AttributeError):
+            expr.args = ()
+        with self.assertRaises(AttributeError):
+            expr.args[0].name_or_value = None  # type: ignore[misc]
+        self.assertIsInstance(expr.args[0], ValueNode)
+
+    def test_shared_tree_survives_repeated_calls(self):
+        code = (
+            "function add(a, b) => a + b!\n"
+            "var total = 0!\n"
+            "function loop(n) => {\n"
+            "   if n > 0 {\n"
+            "      total = add(total, n)!\n"
+            "      return loop(n-1)!\n"
+            "   }\n"
+            "}\n"
+            "loop(5)!\n"
+            "print(total)!\n"
+        )
+        self.assertEqual(run_code(code), "15\n")
+
+    def test_method_calls_are_built_once(self):
+        expr = build_expression_tree(
+            TEST_FILENAME, tokenize(TEST_FILENAME, "l.push(1)")[:-1], "l.push(1)"
+        )
+        self.assertIsInstance(expr, FunctionNode)
+        self.assertEqual(expr.caller, "l")
+        self.assertEqual(len(expr.args), 1)
+        call = expr.method_call
+        self.assertIs(call.method_call, call)
+        self.assertEqual(
+            [arg.name_or_value.value for arg in call.args], ["l", "1"]
+        )
+
+
+
+class TestStringTemplates(unittest.TestCase):
+    """String literals are split into templates when their node is built."""
+
+    def test_template_is_split_once(self):
+        template = compile_string_template("a\\t${x}b")
+        self.assertEqual(template.literals, ("a\\t", "b"))
+        self.assertEqual(template.escaped, ("a\t", "b"))
+        self.assertIsInstance(template.expressions[0], ValueNode)
+        self.assertFalse(template.unclosed)
+        node = ValueNode(tokenize(TEST_FILENAME, '"hi ${x}"')[0])
+        self.assertEqual(node.template.literals, ("hi ", ""))
+
+    def test_interpolation_and_escapes(self):
+        code = (
+            'const const name = "gulf"!\n'
+            'const const slash = "a\\\\"!\n'
+            'print("hi ${name}\\tthere")!\n'
+            'print("${slash}n")!\n'
+            'print("${slash}${name}")!\n'
+        )
+        # escapes apply to the joined string, so a value can end one
+        self.assertEqual(run_code(code), "hi gulf\tthere\na\n\na\\gulf\n")
+
+    def test_unclosed_expression(self):
+        with self.assertRaises(InterpretationError) as cm:
+            run_code('const const name = "gulf"!\nprint("${name} ${name")!\n')
+        self.assertIn("Unclosed ${} expression in string", str(cm.exception))
+
+
+class TestNumberLiterals(unittest.TestCase):
+    """Numbers are decoded at parse time but a binding of the same name wins."""
+
+    def test_numbers_are_decoded_once(self):
+        self.assertEqual(ValueNode(tokenize(TEST_FILENAME, "42")[0]).number, 42)
+        self.assertEqual(ValueNode(tokenize(TEST_FILENAME, "2.5")[0]).number, 2.5)
+        self.assertIsNone(ValueNode(tokenize(TEST_FILENAME, "x")[0]).number)
+
+    def test_bound_numbers_are_looked_up(self):
+        code = (
+            "const x = 5!\n"
+            "print(x)!\n"
+            "const const 5 = 4!\n"
+            "const y = 5!\n"
+            "print(y)!\n"
+            "function show(n) => {\n"
+            "   print(7)!\n"
+            "}\n"
+            "function outer(n) => {\n"
+            "   const 7 = 100!\n"
+            "   show(n)!\n"
+            "}\n"
+            "outer(1)!\n"
+            "print(7)!\n"
+        )
+        self.assertEqual(run_code(code), "5\n4\n100\n7\n")
+
+
+class TestSharedValues(unittest.TestCase):
+    """Small numbers and booleans are shared, but never as stored values."""
+
+    def test_results_are_shared(self):
+        self.assertIs(db_number(5), db_number(5))
+        self.assertIsNot(db_number(5.0), db_number(5.0))
+        self.assertIs(db_boolean(None), MAYBE)
+        self.assertIsNot(Name("x", db_number(5)).value, db_number(5))
+        self.assertFalse(hasattr(db_number(5), "__dict__"))
+
+    def test_identity_and_digit_assignment(self):
+        code = (
+            "var a = 5!\n"
+            "var b = 5!\n"
+            "const r1 = a ==== b!\n"
+            "const r2 = a ==== a!\n"
+            "const r3 = 1 ==== 1!\n"
+            "const r4 = true ==== true!\n"
+            "print(r1, r2, r3, r4)!\n"
+            "var l = [5, 5]!\n"
+            "const r5 = l[-1] ==== l[0]!\n"
+            "const r6 = l[0] ==== l[0]!\n"
+            "print(r5, r6)!\n"
+            "var y = 3!\n"
+            "y[0] = 7!\n"
+            "print(y, 3)!\n"
+        )
+        self.assertEqual(
+            run_code(code), "false true false true\nfalse true\n37.0 3\n"
+        )
+
+
+class TestCopyOnWrite(unittest.TestCase):
+    """copy_value shares storage until one side changes, then acts like a deepcopy."""
+
+    def nested(self):
+        inner = GulfOfMexicoList([GulfOfMexicoNumber(1)])
+        return inner, GulfOfMexicoList([inner, GulfOfMexicoString("ab")])
+
+    def test_copy_shares_storage(self):
+        _, outer = self.nested()
+        copied = copy_value(outer)
+        self.assertIs(copied.values, outer.values)
+        self.assertEqual(copied, outer)
+
+    def test_changing_the_copy(self):
+        inner, outer = self.nested()
+        copied = copy_value(outer)
+        copied.access_index(GulfOfMexicoNumber(0)).assign_index(
+            GulfOfMexicoNumber(-1), GulfOfMexicoNumber(9)
+        )
+        text = copied.access_index(GulfOfMexicoNumber(-1))
+        db_str_push(text, GulfOfMexicoString("c"))
+        self.assertEqual(inner.values, [GulfOfMexicoNumber(1)])
+        self.assertEqual(outer.values[1].value, "ab")
+        self.assertEqual(copied.values[0].values, [GulfOfMexicoNumber(9)])
+        self.assertEqual(copied.values[1].value, "abc")
+
+    def test_changing_the_original(self):
+        inner, outer = self.nested()
+        copied = copy_value(outer)
+        db_list_push(outer, GulfOfMexicoNumber(5))
+        outer.access_index(GulfOfMexicoNumber(0)).assign_index(
+            GulfOfMexicoNumber(-1), GulfOfMexicoNumber(9)
+        )
+        self.assertIs(outer.values[0], inner)  # names bound to inner see it
+        self.assertEqual(inner.values, [GulfOfMexicoNumber(9)])
+        self.assertEqual(len(copied.values), 2)
+        self.assertEqual(copied.values[0].values, [GulfOfMexicoNumber(1)])
+
+    def test_copied_variable_keeps_its_history(self):
+        var = Variable("x", [], [])
+        for value in range(4):
+            var.add_lifetime(db_number(value), 0, 100, True, True)
+        copied = copy_binding(var)
+        self.assertEqual(len(copied.prev_values), len(var.prev_values))
+        self.assertEqual(copied.prev_values[2], var.prev_values[2])
+
+
+class TestNameLookup(unittest.TestCase):
+    """Names resolve innermost first, including the variables of the caller."""
+
+    def test_callee_sees_caller_variables(self):
+        code = (
+            "const x = 1!\n"
+            "function show(y) => {\n"
+            "   print(x)!\n"
+            "}\n"
+            "function shadow(x) => {\n"
+            "   show(x)!\n"
+            "}\n"
+            "show(0)!\n"
+            "shadow(2)!\n"
+            "show(0)!\n"
+        )
+        self.assertEqual(run_code(code), "1\n2\n1\n")
+
+
+class TestWhenCapture(unittest.TestCase):
+    """A when statement keeps references to the scopes its code uses."""
+
+    def test_watcher_sees_later_assignments(self):
+        code = (
+            "function f(n) => {\n"
+            "   var local = 0!\n"
+            "   when local > n {\n"
+            '      print("over", local)!\n'
+            "   }\n"
+            "   local = 3!\n"
+            "   local = 1!\n"
+            "   local = 4!\n"
+            "}\n"
+            "f(2)!\n"
+        )
+        self.assertEqual(run_code(code), "over 3\nover 4\n")
+
+    def test_only_the_scopes_that_are_used(self):
+        statements = parse_code('print("${a} and {b}", c.length)!\n')
+        names = interpreter.gather_free_names(statements)
+        self.assertTrue({"print", "a", "c"} <= names)
+        self.assertNotIn("b", names)
+
+        root = {"c": Name("c", db_number(1))}
+        used, unused = {"a": Name("a", db_number(2))}, {"d": Name("d", db_number(3))}
+        namespaces = ScopeChain(root).push(used).push(unused)
+        captured = interpreter.capture_when_scope(
+            ValueNode(tokenize(TEST_FILENAME, "a")[0]), [], namespaces
+        )
+        self.assertEqual(captured.to_list(), [root, used])
+        self.assertIs(captured.namespace, used)
+        self.assertIs(captured.bound_names, namespaces.bound_names)
+
+    def test_templates_that_are_not_code(self):
+        statements = parse_code('print("${a ????? b} and ${c}")!\n')
+        self.assertEqual(interpreter.gather_free_names(statements), {"print", "c"})
+
+    def test_names_are_not_kept_for_the_next_program(self):
+        statements = parse_code("x = y!\n")
+        interpreter.gather_free_names(statements)
+        interpreter.gather_written_names(statements)
+        interpreter.start_program()
+        self.assertNotIn(id(statements), interpreter.free_names_cache)
+        self.assertNotIn(id(statements), interpreter.written_names_cache)
+
+
+class TestWhenPropagation(unittest.TestCase):
+    """When statements set off together run once, after what they read."""
+
+    def test_no_glitches(self):
+        code = (
+            "var var a = 0!\n"
+            "var var b = 0!\n"
+            "when a + b > 0 {\n"
+            '   print("sum", a, b)!\n'
+            "}\n"
+            "when a > 0 {\n"
+            "   b = a * 2!\n"
+            "}\n"
+            "a = 1!\n"
+        )
+        self.assertEqual(run_code(code), "sum 1 2\n")
+
+    def test_self_triggering_when_loops(self):
+        code = "var var n = 0!\nwhen n < 500 {\n   n = n + 1!\n}\nprint(n)!\n"
+        self.assertEqual(run_code(code), "500\n")
+
+    def test_batch(self):
+        code = (
+            "var var a = 0!\n"
+            "var var b = 0!\n"
+            "when a + b > 0 {\n"
+            '   print("sum", a, b)!\n'
+            "}\n"
+            "batch {\n"
+            "   a = 1!\n"
+            "   b = 2!\n"
+            '   print("in batch")!\n'
+            "}\n"
+        )
+        self.assertEqual(run_code(code), "in batch\nsum 1 2\n")
+
+
+class TestWaitingForNext(unittest.TestCase):
+    """A wait for the next value of a variable sleeps until it is given."""
+
+    def setUp(self):
+        self.var = Variable("x", [], [])
+        self.var.add_lifetime(db_number(1), 0, 100, True, True)
+        self.namespaces = ScopeChain({"x": self.var})  # type: ignore[arg-type]
+        self.listeners = interpreter.after_listeners[:]
+
+    def tearDown(self):
+        interpreter.after_listeners[:] = self.listeners
+
+    def test_wakes_when_another_thread_assigns(self):
+        interpreter.after_listeners[:] = [object()]
+        waiting = threading.Event()
+
+        def assign():
+            while not Variable.waiting:
+                waiting.wait(0.01)
+            self.var.add_lifetime(db_number(2), 0, 100, True, True)
+
+        thread = threading.Thread(target=assign)
+        thread.start()
+        interpreter.wait_for_new_values(["x"], [0], self.namespaces)
+        thread.join()
+        self.assertEqual(self.var.value, db_number(2))
+        self.assertEqual(Variable.waiting, 0)
+
+    def test_no_wait_once_changed(self):
+        interpreter.after_listeners[:] = []
+        self.var.add_lifetime(db_number(2), 0, 100, True, True)
+        interpreter.wait_for_new_values(["x"], [0], self.namespaces)
+
+    def test_exits_without_listeners(self):
+        interpreter.after_listeners[:] = []
+        with self.assertRaises(SystemExit):
+            interpreter.wait_for_new_values(["x"], [0], self.namespaces)
+
+
+class TestAsyncFunctions(unittest.TestCase):
+    """Async function bodies take turns once the calling block is done."""
+
+    def test_round_robin(self):
+        code = (
+            "async funct a(x) => {\n"
+            '   print("a1")!\n'
+            '   print("a2")!\n'
+            "}\n"
+            "async funct b(x) => {\n"
+            '   print("b1")!\n'
+            '   print("b2")!\n'
+            "}\n"
+            "a(1)!\n"
+            "b(1)!\n"
+            'print("main")!\n'
+        )
+        self.assertEqual(run_code(code), "main\na1\nb1\na2\nb2\n")
+
+
+class TestLineLifetimes(unittest.TestCase):
+    """A variable declared for some lines is undefined after them."""
+
+    def test_expiry(self):
+        code = (
+            "const const x<2> = 5!\n"
+            "print(x)!\n"
+            "print(x)!\n"
+            "print(x)!\n"
+        )
+        self.assertEqual(run_code(code), "5\n5\nundefined\n")
+
+    def test_cannot_set_an_expired_variable(self):
+        code = "var var x<0> = 5!\nx = 6!\n"
+        with self.assertRaises(InterpretationError):
+            run_code(code)
+
+
+class TestTemporalLifetimes(unittest.TestCase):
+    """A variable declared for some seconds is undefined after them."""
+
+    def test_expiry(self):
+        code = (
+            'const const brief<0.05> = "Poof"!\n'
+            'const const later<10s> = "Still here"!\n'
+            "print(brief)!\n"
+            "sleep(0.1)!\n"
+            "print(brief)!\n"
+            "print(later)!\n"
+        )
+        self.assertEqual(run_code(code), "Poof\nundefined\nStill here\n")
+
+    def test_infinity(self):
+        self.assertEqual(run_code("const const x<Infinity> = 5!\nprint(x)!\n"), "5\n")
+
+    def test_variable_of_an_ended_scope_is_collected(self):
+        interpreter.start_program()
+        self.addCleanup(lifetime_expiry.clear)
+        code = "function f(a) => {\n   const const x<100s> = a!\n}\nf(1)!\n"
+        run_code(code)
+        gc.collect()
+        ((_, _, variable, lifetime),) = lifetime_expiry.timers
+        self.assertIsNone(variable())
+        self.assertIsNone(lifetime())
+
+
+class TestPreviousValues(unittest.TestCase):
+    """Variables keep their last previous values, not all of them."""
+
+    def test_previous_after_many_assignments(self):
+        code = "var var x = 0!\n"
+        code += "".join(f"x = {i}!\n" for i in range(1, 50))
+        code += "print(previous x)!\nprint(x)!\n"
+        self.assertEqual(run_code(code), "48\n49\n")
+
+    def test_next(self):
+        code = "var var x = 1!\nconst const y = next x!\nx = 2!\nx = 3!\nprint(y)!\n"
+        self.assertEqual(run_code(code), "2\n")
+
+    def test_next_of_a_name_declared_meanwhile(self):
+        # x is declared and assigned twice while the statement waits for y
+        y = Variable("y", [], [])
+        y.add_lifetime(db_number(0), 0, 100, True, True)
+        namespaces = ScopeChain({"y": y})  # type: ignore[arg-type]
+        normal_nexts = {("x", id(namespaces.namespace))}
+        listeners = interpreter.after_listeners[:]
+        self.addCleanup(interpreter.after_listeners.__setitem__, slice(None), listeners)
+        interpreter.after_listeners[:] = [object()]
+        waiting = threading.Event()
+
+        def assign():
+            while not Variable.waiting:
+                waiting.wait(0.01)
+            x = Variable("x", [], [])
+            x.add_lifetime(db_number(1), 0, 100, True, True)
+            namespaces.declare("x", x)
+            for value in (2, 3):
+                x.add_lifetime(db_number(value), 0, 100, True, True)
+            y.add_lifetime(db_number(1), 0, 100, True, True)
+
+        thread = threading.Thread(target=assign)
+        thread.start()
+        interpreter.adjust_for_normal_nexts(
+            None, {"y"}, normal_nexts, None, namespaces, {}  # type: ignore[arg-type]
+        )
+        thread.join()
+        self.assertEqual(normal_nexts, set())
+
+
+class TestDelete(unittest.TestCase):
+    """A deleted value cannot be the result of an expression any more."""
+
+    def setUp(self):
+        self.addCleanup(interpreter.deleted_values.clear)
+
+    def test_deleted_value(self):
+        code = (
+            "const const n = 5!\n"
+            'const const s = "hi"!\n'
+            "delete n!\n"
+            "print(s)!\n"
+            "print(5)!\n"
+        )
+        with self.assertRaisesRegex(InterpretationError, "5 has been deleted"):
+            run_code(code)
+
+    def test_delete_list(self):
+        code = "const const l = [1]!\ndelete l!\nprint(1)!\n"
+        self.assertEqual(run_code(code), "1\n")
+        self.assertEqual(len(interpreter.deleted_values), 0)
+
+    def test_not_deleted_in_the_next_program(self):
+        with self.assertRaisesRegex(InterpretationError, "5 has been deleted"):
+            run_code("const const n = 5!\ndelete n!\nprint(5)!\n")
+        interpreter.start_program()
+        self.assertEqual(interpreter.deleted_values.bits, 0)
+        self.assertEqual(run_code("print(5)!\n"), "5\n")
+
+
+class TestNameWatchers(unittest.TestCase):
+    """A next waiting only to resolve a promise is dropped with the promise."""
+
+    def test_abandoned_promise(self):
+        code = (
+            "var var x = 1!\n"
+            "function f(a) => {\n"
+            "   const var p = [next(x)]!\n"
+            "}\n"
+            "f(1)!\n"
+        )
+        run_code(code)
+        self.assertEqual(len(interpreter.name_watchers), 0)
+
+    def test_kept_promise(self):
+        code = "var var x = 1!\nvar var p = [next(x)]!\nx = 2!\nprint(p)!\n"
+        self.assertIn("value=2", run_code(code))
+        self.assertEqual(len(interpreter.name_watchers), 0)
+
+
+class TestStatementTypeCache(unittest.TestCase):
+    """Statements remember their candidate until a keyword name is rebound."""
+
+    def test_choice_is_cached(self):
+        (candidates,) = parse_code("const x = 5!\n")
+        namespaces = ScopeChain(KEYWORDS.copy())  # type: ignore[arg-type]
+        statement = interpreter.determine_statement_type(candidates, namespaces)
+        self.assertIsInstance(statement, VariableDeclaration)
+        cached = interpreter.statement_type_cache[id(candidates)]
+        self.assertIs(cached[3], statement)
+        self.assertIn("const", ScopeChain.watched_names)
+        self.assertIs(
+            interpreter.determine_statement_type(candidates, namespaces), statement
+        )
+
+    def test_cleared_for_the_next_program(self):
+        (candidates,) = parse_code("const x = 5!\n")
+        namespaces = ScopeChain(KEYWORDS.copy())  # type: ignore[arg-type]
+        interpreter.determine_statement_type(candidates, namespaces)
+        interpreter.start_program()
+        self.assertNotIn(id(candidates), interpreter.statement_type_cache)
+
+    def test_rebinding_a_keyword_invalidates(self):
+        (candidates,) = parse_code("const x = 5!\n")
+        namespaces = ScopeChain(KEYWORDS.copy())  # type: ignore[arg-type]
+        interpreter.determine_statement_type(candidates, namespaces)
+        version = ScopeChain.version
+        namespaces.push({"const": Name("const", KEYWORDS["print"].value)})
+        self.assertGreater(ScopeChain.version, version)
+
+    def test_program_that_rebinds_a_keyword(self):
+        code = (
+            "function show(n) => {\n"
+            "   const x = n!\n"
+            "   print(x)!\n"
+            "}\n"
+            "show(1)!\n"
+            "function const(a) => {\n"
+            "   print(a)!\n"
+            "}\n"
+            "show(2)!\n"
+        )
+        # once const is a function, the first line of show no longer declares x
+        with self.assertRaisesRegex(InterpretationError, "Undefined name: x"):
+            run_code(code)
+
+
+def build_expression(expression: str) -> ExpressionTreeNode:
+    tokens = tokenize(TEST_FILENAME, expression + "!")
+    return build_expression_tree(TEST_FILENAME, tokens[:-2], expression)
+
+
+class TestExpressionParsing(unittest.TestCase):
+    """Whitespace decides precedence: the widest-spaced operator splits first."""
+
+    def test_whitespace_precedence(self):
+        expr = build_expression("2 * 1+3")
+        self.assertIsInstance(expr, ExpressionNode)
+        self.assertEqual(expr.operator, OperatorType.MUL)
+        self.assertEqual(expr.right.operator, OperatorType.ADD)
+
+    def test_function_arguments(self):
+        expr = build_expression("func a, b  +  c")
+        self.assertEqual(expr.operator, OperatorType.ADD)
+        self.assertIsInstance(expr.left, FunctionNode)
+        self.assertEqual(len(expr.left.args), 2)
+
+    def test_long_expressions(self):
+        expr = build_expression(" + ".join(f'"s{i}"' for i in range(3000)))
+        self.assertEqual(expr.right.name_or_value.value, "s2999")
+        expr = build_expression("[" + ", ".join(str(i) for i in range(3000)) + "]")
+        self.assertIsInstance(expr, ListNode)
+        self.assertEqual(len(expr.values), 3000)
+
+
+if __name__ == "__main__":
+    unittest.main()
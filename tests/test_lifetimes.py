@@ -0,0 +1,164 @@
+"""Tests for the expiry of variable lifetimes (gulfofmexico/lifetimes.py)."""
+
+import gc
+import time
+import unittest
+import weakref
+
+from gulfofmexico.base import NonFormattedError
+from gulfofmexico.builtin import Variable, db_number
+from gulfofmexico.lifetimes import NEVER, LifetimeExpiry
+
+
+class TestLineLifetimes(unittest.TestCase):
+    """Lifetimes end after their number of statements, lowest first."""
+
+    def setUp(self):
+        self.lifetimes = LifetimeExpiry()
+
+    def declare(self, var, value, lines):
+        lifetime = var.add_lifetime(db_number(value), 0, lines, True, True)
+        self.lifetimes.schedule_lines(var, lifetime, lines)
+
+    def test_expiry(self):
+        var = Variable("x", [], [])
+        var.add_lifetime(db_number(1), 0, 100000000000, True, True)
+        self.declare(var, 2, 2)
+        self.lifetimes.tick()
+        self.lifetimes.tick()
+        self.assertEqual(var.value, db_number(2))
+        self.lifetimes.tick()
+        self.assertEqual(var.value, db_number(1))  # back to the one below
+        self.assertEqual(len(self.lifetimes), 0)
+        self.assertEqual(self.lifetimes.next_line_expiry, NEVER)
+
+    def test_undefined_once_all_have_ended(self):
+        var = Variable("x", [], [])
+        self.declare(var, 1, 0)
+        self.lifetimes.tick()
+        self.assertEqual(var.lifetimes, [])
+
+    def test_only_the_top_of_the_heap_is_looked_at(self):
+        short, long = Variable("short", [], []), Variable("long", [], [])
+        self.declare(long, 1, 5)
+        self.declare(short, 1, 1)
+        self.assertEqual(self.lifetimes.next_line_expiry, 2)
+        self.lifetimes.tick()
+        self.lifetimes.tick()
+        self.assertEqual(short.lifetimes, [])
+        self.assertEqual(len(long.lifetimes), 1)
+        self.assertEqual(self.lifetimes.next_line_expiry, 6)
+
+    def test_lifetime_ended_after_being_replaced(self):
+        var = Variable("x", [], [])
+        self.declare(var, 1, 1)
+        var.add_lifetime(db_number(2), 0, 100000000000, True, True)
+        self.lifetimes.tick()
+        self.lifetimes.tick()
+        self.assertEqual(var.value, db_number(2))
+        self.assertEqual(len(var.lifetimes), 1)
+
+    def test_reassignments_do_not_pile_up(self):
+        var = Variable("x", [], [])
+        self.declare(var, 0, 3)
+        for i in range(5000):
+            var.add_lifetime(db_number(i), 0, 100000000000, True, True)
+        self.assertEqual(len(var.lifetimes), 1)
+        self.assertEqual(var.value, db_number(4999))
+        self.assertEqual(var.prev_values[-1], db_number(4998))
+
+    def test_lower_confidence_is_kept_behind(self):
+        var = Variable("x", [], [])
+        var.add_lifetime(db_number(1), 0, 100000000000, True, True)
+        var.add_lifetime(db_number(2), 5, 100000000000, True, True)
+        self.assertEqual(len(var.lifetimes), 2)
+        self.assertEqual(var.value, db_number(1))
+
+    def test_variables_are_held_weakly(self):
+        var = Variable("x", [], [])
+        self.declare(var, 1, 0)
+        ref = weakref.ref(var)
+        del var
+        gc.collect()
+        self.assertIsNone(ref())
+        self.lifetimes.tick()  # ends nothing
+        self.assertEqual(len(self.lifetimes), 0)
+
+    def test_cleared_for_the_next_program(self):
+        var = Variable("x", [], [])
+        self.declare(var, 1, 0)
+        self.lifetimes.clear()
+        self.lifetimes.tick()
+        self.assertEqual(var.value, db_number(1))
+        self.assertEqual(self.lifetimes.next_line_expiry, NEVER)
+
+
+class TestTemporalLifetimes(unittest.TestCase):
+    """Lifetimes end after their number of seconds, on a tick or a read."""
+
+    def setUp(self):
+        self.lifetimes = LifetimeExpiry()
+
+    def declare(self, var, value, seconds, age=0.0):
+        lifetime = var.add_lifetime(
+            db_number(value), 0, 100000000000, True, True, True, seconds
+        )
+        lifetime.creation_time -= age  # declared age seconds ago
+        var.expire_at(lifetime.creation_time + seconds)
+        self.lifetimes.schedule_time(var, lifetime)
+        return lifetime
+
+    def test_expiry_on_tick(self):
+        var = Variable("x", [], [])
+        var.add_lifetime(db_number(1), 0, 100000000000, True, True)
+        self.declare(var, 2, 5.0, age=10.0)
+        self.assertEqual(len(var.lifetimes), 2)
+        self.lifetimes.tick()
+        self.assertEqual(len(var.lifetimes), 1)
+        self.assertEqual(len(self.lifetimes), 0)
+        self.assertIsNone(var.expires_at)  # read without the clock
+        self.assertEqual(var.value, db_number(1))
+
+    def test_expiry_on_read(self):
+        var = Variable("x", [], [])
+        self.declare(var, 1, 0.05)
+        self.assertEqual(var.value, db_number(1))
+        time.sleep(0.06)
+        with self.assertRaises(NonFormattedError):
+            var.value  # ended before any statement ran
+        self.lifetimes.tick()  # the heap entry is let go of
+        self.assertEqual(len(self.lifetimes), 0)
+
+    def test_only_the_earliest_is_kept(self):
+        var = Variable("x", [], [])
+        first = self.declare(var, 1, 100.0)
+        second = self.declare(var, 2, 200.0)
+        self.assertEqual(var.expires_at, first.creation_time + 100.0)
+        var.lifetimes.remove(first)
+        var.clear_outdated_lifetimes()
+        self.assertEqual(var.expires_at, second.creation_time + 200.0)
+        self.lifetimes.tick()
+        self.assertEqual(var.value, db_number(2))
+
+    def test_entries_of_collected_variables_are_let_go_of(self):
+        variables = [Variable("x", [], []) for _ in range(3)]
+        for var in variables:
+            self.declare(var, 1, 100.0)
+        del var
+        variables.clear()
+        gc.collect()
+        self.assertEqual(self.lifetimes.dead, 3)
+        kept = Variable("kept", [], [])
+        self.declare(kept, 1, 100.0)
+        self.assertEqual(len(self.lifetimes), 1)
+        self.assertIs(self.lifetimes.timers[0][2](), kept)
+
+    def test_copies_keep_the_expiry(self):
+        var = Variable("x", [], [])
+        self.declare(var, 1, 100.0)
+        copy = Variable(var.name, list(var.lifetimes), [])
+        self.assertEqual(copy.expires_at, var.expires_at)
+
+
+if __name__ == "__main__":
+    unittest.main()
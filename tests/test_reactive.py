@@ -0,0 +1,174 @@
+"""Tests for the dependency graph of when statements (gulfofmexico/reactive.py)."""
+
+import gc
+import unittest
+
+from gulfofmexico.builtin import GulfOfMexicoList, Variable
+from gulfofmexico.reactive import WatcherGraph, WhenWatcher
+from gulfofmexico.scope import ScopeChain
+
+
+def watcher():
+    return WhenWatcher(None, [], None)  # type: ignore[arg-type]
+
+
+class TestWatcherGraph(unittest.TestCase):
+    """Watchers are found by key, stored once, and end with their scope."""
+
+    def setUp(self):
+        self.graph = WatcherGraph()
+        self.scope = ScopeChain({})
+
+    def test_lookup_and_deduplication(self):
+        first, second = watcher(), watcher()
+        self.graph.declare(self.scope, first, [1, "x", 1])
+        self.graph.declare(self.scope, second, [1])
+        self.graph.add(1, first)
+        self.assertEqual(
+            [id(w) for w in self.graph.watchers_of(1)], [id(first), id(second)]
+        )
+        self.assertEqual(self.graph.watchers_of(2), [])
+
+    def test_discard(self):
+        first = watcher()
+        self.graph.declare(self.scope, first, [1, 2])
+        self.graph.discard(1, first)
+        self.graph.discard(3, first)
+        self.assertEqual(self.graph.watchers_of(1), [])
+        self.assertEqual(len(self.graph.watchers_of(2)), 1)
+        self.assertNotIn(id(1), self.graph.watchers)  # keyed by id
+
+    def test_watchers_end_with_their_scope(self):
+        outer = watcher()
+        self.graph.declare(self.scope, outer, [1])
+        inner_scope = self.scope.push()
+        inner = watcher()
+        self.graph.declare(inner_scope, inner, [1, 2])
+        self.assertEqual(len(self.graph), 2)
+        del inner_scope
+        gc.collect()
+        self.assertEqual(len(self.graph), 1)
+        self.assertEqual(self.graph.watchers_of(2), [])
+        self.graph.add(2, inner)  # its scope has ended, so nothing is added
+        self.assertEqual(self.graph.watchers_of(2), [])
+        self.assertEqual(len(self.graph.watchers_of(1)), 1)
+
+    def test_dependencies_end_with_their_object(self):
+        first = watcher()
+        var = Variable("x", [], [])
+        values = GulfOfMexicoList([])
+        self.graph.declare(self.scope, first, [var, values, "x"])
+        key = id(var)
+        del var
+        gc.collect()
+        # a new object with the same id must not find the old watchers
+        self.assertNotIn(key, self.graph.watchers)
+        self.assertEqual(self.graph.keys[id(first)], {id(values), "x"})
+        self.assertEqual(self.graph.watchers_of(values), [first])
+        self.graph.discard(values, first)
+        self.assertEqual(self.graph.refs, {})
+
+    def test_objects_without_weak_references_are_kept(self):
+        first = watcher()
+        big = 10**30
+        self.graph.declare(self.scope, first, [big])
+        self.assertIs(self.graph.refs[id(big)], big)
+
+
+class TestPropagation(unittest.TestCase):
+    """Dirty watchers run once per round, writers before their readers."""
+
+    def setUp(self):
+        self.graph = WatcherGraph()
+        self.scope = ScopeChain({})
+        self.ran = []
+
+    def run_watcher(self, writes):
+        def run(watcher):
+            self.ran.append(watcher)
+            for key in writes.get(id(watcher), ()):
+                for reader in self.graph.watchers_of(key):
+                    self.graph.mark(reader)
+
+        return run
+
+    def test_writers_run_before_readers(self):
+        reader, writer = watcher(), watcher()
+        self.graph.declare(self.scope, reader, [1, 2])
+        self.graph.declare(self.scope, writer, [1])
+        writes = {id(writer): [2]}
+        for w in self.graph.watchers_of(1):
+            self.graph.mark(w)
+        self.graph.mark(reader)
+        self.graph.flush(self.run_watcher(writes), lambda w: writes.get(id(w), []))
+        self.assertEqual(self.ran, [writer, reader])
+        self.assertFalse(self.graph.dirty)
+
+    def test_marked_again_runs_next_round(self):
+        looping = watcher()
+        self.graph.declare(self.scope, looping, [1])
+        count = 0
+
+        def run(w):
+            nonlocal count
+            count += 1
+            if count < 3:
+                self.graph.mark(w)
+
+        self.graph.mark(looping)
+        self.graph.flush(run, lambda w: [1])
+        self.assertEqual(count, 3)
+
+    def test_cycles_run_in_marked_order(self):
+        first, second = watcher(), watcher()
+        self.graph.declare(self.scope, first, [1])
+        self.graph.declare(self.scope, second, [2])
+        writes = {id(first): [2], id(second): [1]}
+        self.graph.mark(second)
+        self.graph.mark(first)
+        self.assertEqual(
+            self.graph.order(self.graph.dirty, lambda w: writes[id(w)]),
+            [second, first],
+        )
+
+    def test_chains_run_writers_first(self):
+        first, second, third = watcher(), watcher(), watcher()
+        self.graph.declare(self.scope, first, [1])
+        self.graph.declare(self.scope, second, [2])
+        self.graph.declare(self.scope, third, [3])
+        writes = {id(first): [2], id(second): [3], id(third): []}
+        for w in (third, second, first):
+            self.graph.mark(w)
+        self.assertEqual(
+            self.graph.order(self.graph.dirty, lambda w: writes[id(w)]),
+            [first, second, third],
+        )
+
+    def test_readers_of_a_cycle_run_after_it(self):
+        first, second, reader = watcher(), watcher(), watcher()
+        self.graph.declare(self.scope, first, [1])
+        self.graph.declare(self.scope, second, [2])
+        self.graph.declare(self.scope, reader, [2])
+        writes = {id(first): [2], id(second): [1], id(reader): []}
+        for w in (second, reader, first):
+            self.graph.mark(w)
+        self.assertEqual(
+            self.graph.order(self.graph.dirty, lambda w: writes[id(w)]),
+            [second, first, reader],
+        )
+
+    def test_batch_holds_watchers_back(self):
+        held = watcher()
+        self.graph.declare(self.scope, held, [1])
+        with self.graph.batch():
+            with self.graph.batch():
+                self.graph.mark(held)
+                self.graph.flush(self.ran.append, lambda w: [])
+            self.graph.flush(self.ran.append, lambda w: [])
+            self.assertEqual(self.ran, [])
+        self.graph.flush(self.ran.append, lambda w: [])
+        self.assertEqual(self.ran, [held])
+
+
+if __name__ == "__main__":
+    unittest.main()
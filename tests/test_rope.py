@@ -0,0 +1,77 @@
+"""Tests for the rope behind GulfOfMexicoString (gulfofmexico/rope.py)."""
+
+import copy
+import random
+import unittest
+
+from gulfofmexico.builtin import (
+    GulfOfMexicoNumber,
+    GulfOfMexicoSpecialBlankValue,
+    GulfOfMexicoString,
+    db_str_pop,
+    db_str_push,
+)
+from gulfofmexico.rope import CHUNK_SIZE, Rope
+
+
+class TestRope(unittest.TestCase):
+    """A Rope edits like the str it replaces."""
+
+    def test_append_and_index(self):
+        rope = Rope("ab")
+        for char in "cdefgh" * CHUNK_SIZE:
+            rope.append(char)
+        text = "ab" + "cdefgh" * CHUNK_SIZE
+        self.assertIsNone(rope.flat)
+        self.assertEqual(len(rope), len(text))
+        for index in (0, 1, CHUNK_SIZE, len(text) - 1, -1, -len(text)):
+            self.assertEqual(rope[index], text[index])
+        with self.assertRaises(IndexError):
+            rope[len(text)]
+        self.assertEqual(rope.flatten(), text)
+        self.assertIs(rope.flatten(), rope.flatten())
+
+    def test_same_as_slicing(self):
+        rng = random.Random(0)
+        text = "x" * (3 * CHUNK_SIZE)
+        rope = Rope(text)
+        for _ in range(500):
+            start = rng.randint(-len(text) - 2, len(text) + 2)
+            stop = rng.randint(-len(text) - 2, len(text) + 2)
+            new = rng.choice(["", "a", "bc", "d" * CHUNK_SIZE])
+            rope.replace(start, stop, new)
+            text = text[:start] + new + text[stop:]
+            self.assertEqual(len(rope), len(text))
+        self.assertEqual(rope.flatten(), text)
+
+
+class TestRopeString(unittest.TestCase):
+    """Strings read and compare as str while their text is a rope."""
+
+    def test_push_pop_and_insert(self):
+        value = GulfOfMexicoString("ab")
+        for _ in range(3 * CHUNK_SIZE):
+            db_str_push(value, GulfOfMexicoString("c"))
+        self.assertEqual(len(value.value), 2 + 3 * CHUNK_SIZE)
+        blank = GulfOfMexicoSpecialBlankValue()
+        self.assertEqual(db_str_pop(value, blank), GulfOfMexicoString("c"))
+        self.assertEqual(db_str_pop(value, GulfOfMexicoNumber(-1)).value, "a")
+        value.assign_index(GulfOfMexicoNumber(-0.5), GulfOfMexicoString("z"))
+        self.assertEqual(value.value[:3], "bzc")
+
+    def test_value_field(self):
+        value = GulfOfMexicoString("abc")
+        db_str_push(value, GulfOfMexicoString("d"))
+        self.assertEqual(hash(value), hash(GulfOfMexicoString("abcd")))
+        self.assertIn("value='abcd'", repr(value))
+        copied = copy.deepcopy(value)
+        db_str_push(copied, GulfOfMexicoString("e"))
+        self.assertEqual((value.value, copied.value), ("abcd", "abcde"))
+        value.value = "new"
+        self.assertEqual(len(value.rope), 3)
+        with self.assertRaises(TypeError):
+            GulfOfMexicoString()  # type: ignore[call-arg]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+"""Tests for the scheduler of async functions (gulfofmexico/scheduler.py)."""
+
+import contextlib
+import io
+import unittest
+
+from gulfofmexico import interpreter, scheduler
+from gulfofmexico.__main__ import _main
+from gulfofmexico.scheduler import AsyncScheduler, AsyncTask
+
+
+def task(name, length):
+    return AsyncTask([(f"{name}{i}",) for i in range(length)], None)  # type: ignore
+
+
+class TestAsyncScheduler(unittest.TestCase):
+    """Tasks take turns, new tasks run next, and nested runs return."""
+
+    def setUp(self):
+        self.inbox = []
+        self.ran = []
+
+    def run_statement(self, spawn=None):
+        def run(running):
+            (statement,) = running.statements[running.index]
+            self.ran.append(statement)
+            if spawn and statement in spawn:
+                self.inbox.append(spawn[statement])
+            # a block run by a task runs the same list, which returns at once
+            self.assertEqual(AsyncScheduler(self.inbox).run(run, "inner"), "inner")
+            return statement
+
+        return run
+
+    def test_round_robin(self):
+        self.inbox.extend([task("a", 3), task("b", 2)])
+        scheduler = AsyncScheduler(self.inbox)
+        self.assertEqual(scheduler.run(self.run_statement(), None), "a2")
+        self.assertEqual(self.ran, ["a0", "b0", "a1", "b1", "a2"])
+        stats = scheduler.get_stats()
+        self.assertEqual(stats["switches"], 5)
+        self.assertEqual(stats["finished_tasks"], 2)
+        self.assertEqual(stats["max_queue_length"], 2)
+        self.assertEqual(len(scheduler), 0)
+
+    def test_new_tasks_go_before_the_one_that_started_them(self):
+        self.inbox.extend([task("a", 2), task("b", 2)])
+        AsyncScheduler(self.inbox).run(self.run_statement({"a0": task("c", 1)}), None)
+        self.assertEqual(self.ran, ["a0", "b0", "c0", "a1", "b1"])
+
+    def test_slice_size(self):
+        self.inbox.extend([task("a", 3), task("b", 3)])
+        scheduler = AsyncScheduler(self.inbox, slice_size=2)
+        scheduler.run(self.run_statement(), None)
+        self.assertEqual(self.ran, ["a0", "a1", "b0", "b1", "a2", "b2"])
+        self.assertEqual(scheduler.switches, 4)
+
+    def test_nothing_to_run(self):
+        self.inbox.append(task("a", 0))
+        self.assertEqual(AsyncScheduler(self.inbox).run(self.run_statement(), 1), 1)
+        self.assertEqual(self.ran, [])
+        self.assertNotIn(id(self.inbox), AsyncScheduler.running)
+
+
+class TestProgramStats(unittest.TestCase):
+    """The statistics are per program, and the command line can show them."""
+
+    PROGRAM = """
+async function worker(n) => {
+   print(n)!
+   print(n)!
+}
+worker(1)!
+worker(2)!
+"""
+
+    def setUp(self):
+        self.addCleanup(setattr, scheduler, "SLICE_SIZE", scheduler.SLICE_SIZE)
+
+    def run_main(self, *args):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            self.assertEqual(_main([*args, "-c", self.PROGRAM]), 0)
+        return stderr.getvalue()
+
+    def test_reset_when_a_program_starts(self):
+        self.run_main()
+        self.assertGreater(scheduler.stats.switches, 0)
+        interpreter.start_program()
+        self.assertEqual(scheduler.stats.switches, 0)
+        self.assertEqual(scheduler.stats.finished, 0)
+
+    def test_slice_size_and_stats_flags(self):
+        printed = self.run_main("--scheduler-stats")
+        self.assertIn("switches: 4", printed)
+        self.assertIn("finished_tasks: 2", printed)
+        printed = self.run_main("--slice-size", "2", "--scheduler-stats")
+        self.assertEqual(scheduler.SLICE_SIZE, 2)
+        self.assertIn("switches: 2", printed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+"""Tests for the persistent scope chain (gulfofmexico/scope.py)."""
+
+import unittest
+
+from gulfofmexico.scope import ScopeChain
+
+
+class TestScopeChain(unittest.TestCase):
+    """Entering a scope shares the outer namespaces instead of copying them."""
+
+    def setUp(self):
+        self.globals = {"a": 1, "b": 2}
+        self.scope = ScopeChain.from_list([self.globals, {"b": 3}])
+
+    def test_lookup_innermost_first(self):
+        inner = self.scope.push({"c": 4})
+        self.assertEqual(inner.lookup("b"), 3)
+        self.assertEqual(inner.lookup("a"), 1)
+        self.assertEqual(inner.lookup("c"), 4)
+        self.assertIsNone(inner.lookup("d"))
+        self.assertEqual(inner.lookup_with_namespace("a"), (1, self.globals))
+        self.assertEqual(inner.lookup_with_namespace("d"), (None, None))
+
+    def test_push_does_not_change_parent(self):
+        inner = self.scope.push()
+        inner[-1]["x"] = 5
+        self.assertIsNone(self.scope.lookup("x"))
+        self.assertIs(inner.parent, self.scope)
+        self.assertIs(inner[0], self.globals)
+
+    def test_unshadowed_names_are_read_from_the_root(self):
+        inner = self.scope.push({"c": 4})
+        self.assertNotIn("a", inner.bound_names)
+        self.assertEqual(inner.lookup("a"), 1)
+        self.assertEqual(inner.lookup_with_namespace("a"), (1, self.globals))
+
+        # binding a name above the root makes lookups walk the chain for it
+        inner.declare("a", 5)
+        self.assertIn("a", inner.bound_names)
+        self.assertEqual(inner.lookup("a"), 5)
+        self.assertEqual(self.scope.lookup("a"), 1)
+
+    def test_version_counts_rebinding_of_watched_names(self):
+        ScopeChain.watched_names.add("watched")
+        version = ScopeChain.version
+        self.scope.push({"other": 1}).declare("other2", 2)
+        self.assertEqual(ScopeChain.version, version)
+
+        # in the root every binding counts, above it only the first one
+        self.scope.parent.declare("watched", 1)
+        self.assertEqual(ScopeChain.version, version + 1)
+        self.scope.push({"watched": 2})
+        self.assertEqual(ScopeChain.version, version + 2)
+        self.scope.push().declare("watched", 3)
+        self.assertEqual(ScopeChain.version, version + 2)
+        ScopeChain.binding_changed("watched")
+        self.assertEqual(ScopeChain.version, version + 3)
+
+    def test_list_compatibility(self):
+        inner = self.scope + [{"c": 4}]
+        self.assertEqual(len(inner), 3)
+        self.assertEqual(list(inner), [self.globals, {"b": 3}, {"c": 4}])
+        self.assertEqual(list(reversed(inner)), [{"c": 4}, {"b": 3}, self.globals])
+        self.assertEqual(inner[1], {"b": 3})
+        self.assertEqual(inner.to_list(), list(inner))
+        self.assertIs(ScopeChain.from_list(inner), inner)
+
+
+if __name__ == "__main__":
+    unittest.main()
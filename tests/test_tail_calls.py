@@ -0,0 +1,153 @@
+"""Tests for tail calls and deep recursion in every engine.
+
+The programs recurse deeper than the Python recursion limit they run under,
+which only works if the calls do not use up the Python stack.
+"""
+
+import contextlib
+import io
+import sys
+import unittest
+from typing import Union
+
+import gulfofmexico.interpreter as interpreter
+from gulfofmexico.base import InterpretationError
+from gulfofmexico.builtin import KEYWORDS, GulfOfMexicoValue, Name, Variable
+from gulfofmexico.interpreter import scopes_are_shadowed
+from gulfofmexico.processor.lexer import tokenize
+from gulfofmexico.processor.syntax_tree import generate_syntax_tree
+from gulfofmexico.scope import ScopeChain
+
+TEST_FILENAME = "__test__"
+RECURSION_LIMIT = 1000
+DEPTH = 3000
+
+TAIL_RECURSION = (
+    "var total = 0!\n"
+    "function loop(n) => {\n"
+    "   if n > 0 {\n"
+    "      total = total + 1!\n"
+    "      return loop(n-1)!\n"
+    "   }\n"
+    "}\n"
+    f"loop({DEPTH})!\n"
+    "print(total)!\n"
+)
+
+
+def run_code(code: str, engine: str) -> str:
+    """Run a program with an engine under a low recursion limit."""
+    interpreter.set_engine(engine)
+    interpreter.filename = TEST_FILENAME
+    interpreter.code = code
+    statements = generate_syntax_tree(
+        TEST_FILENAME, tokenize(TEST_FILENAME, code), code
+    )
+    namespaces: list[dict[str, Union[Variable, Name]]] = [KEYWORDS.copy()]  # type: ignore
+    exported_names: list[tuple[str, str, GulfOfMexicoValue]] = []
+    interpreter.load_global_gulfofmexico_variables(namespaces)
+    out = io.StringIO()
+    recursion_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(RECURSION_LIMIT)
+    try:
+        with contextlib.redirect_stdout(out):
+            interpreter.interpret_code_statements_main_wrapper(
+                statements, namespaces, [], [{}], {}, exported_names
+            )
+    except InterpretationError as e:
+        out.write(f"error: {e}\n")
+    finally:
+        sys.setrecursionlimit(recursion_limit)
+        interpreter.set_engine("interpreter")
+    return out.getvalue()
+
+
+class TestTailCalls(unittest.TestCase):
+    """return f(...)! and a call that ends a function body do not nest."""
+
+    def test_tail_recursion_in_every_engine(self):
+        for engine in interpreter.ENGINES:
+            with self.subTest(engine=engine):
+                self.assertEqual(run_code(TAIL_RECURSION, engine), f"{DEPTH}\n")
+
+    def test_last_expression_and_if_are_tail_positions(self):
+        code = (
+            "var total = 0!\n"
+            "function loop(n) => {\n"
+            "   total = total + 1!\n"
+            "   if n > 0 {\n"
+            "      loop(n-1)!\n"
+            "   }\n"
+            "}\n"
+            f"loop({DEPTH})!\n"
+            "print(total)!\n"
+        )
+        for engine in interpreter.ENGINES:
+            with self.subTest(engine=engine):
+                self.assertEqual(run_code(code, engine), f"{DEPTH + 1}\n")
+
+    def test_return_inside_if_still_falls_through(self):
+        # a return only leaves the if body, so the function goes on after it
+        code = (
+            "function down(n, acc) => {\n"
+            "   if n > 0 {\n"
+            "      return down(n-1, acc+n)!\n"
+            "   }\n"
+            "   return acc+0!\n"
+            "}\n"
+            "const r = down(10, 0)!\n"
+            "print(r)!\n"
+        )
+        for engine in interpreter.ENGINES:
+            with self.subTest(engine=engine):
+                self.assertEqual(run_code(code, engine), "0\n")
+
+    def test_tail_call_sees_the_callers_variables(self):
+        code = (
+            "function show(n) => {\n"
+            "   print(secret)!\n"
+            "}\n"
+            "function outer(n) => {\n"
+            "   const secret = 7!\n"
+            "   return show(n)!\n"
+            "}\n"
+            "outer(1)!\n"
+        )
+        for engine in interpreter.ENGINES:
+            with self.subTest(engine=engine):
+                self.assertEqual(run_code(code, engine), "7\n")
+
+    def test_deep_recursion_on_the_vm(self):
+        # not a tail call: the if is not the last statement of the function
+        code = (
+            "function count(n) => {\n"
+            "   if n > 0 {\n"
+            "      return count(n-1)!\n"
+            "   }\n"
+            "   return n+0!\n"
+            "}\n"
+            f"const c = count({DEPTH})!\n"
+            "print(c)!\n"
+        )
+        self.assertEqual(run_code(code, "vm"), f"{DEPTH}\n")
+
+
+class TestScopesAreShadowed(unittest.TestCase):
+    """A finished call's scopes are only left out if nothing in them shows."""
+
+    def test_shadowed_scopes(self):
+        base = ScopeChain({"x": 1})
+        scope = base.push({"n": 1}).push({})
+        self.assertTrue(scopes_are_shadowed(scope, base, ["n"]))
+        self.assertFalse(scopes_are_shadowed(scope, base, ["m"]))
+        self.assertFalse(scopes_are_shadowed(scope, base, ()))
+        self.assertTrue(scopes_are_shadowed(base.push({}), base, ()))
+
+    def test_unrelated_chain(self):
+        self.assertFalse(
+            scopes_are_shadowed(ScopeChain({}).push({}), ScopeChain({}), ())
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
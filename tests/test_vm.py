@@ -0,0 +1,143 @@
+"""Tests for the bytecode VM engine (gulfofmexico/vm/)."""
+
+import contextlib
+import io
+import unittest
+from typing import Union
+
+import gulfofmexico.interpreter as interpreter
+from gulfofmexico.base import InterpretationError
+from gulfofmexico.builtin import KEYWORDS, GulfOfMexicoValue, Name, Variable
+from gulfofmexico.processor.lexer import tokenize
+from gulfofmexico.processor.syntax_tree import (
+    ExpressionStatement,
+    generate_syntax_tree,
+)
+from gulfofmexico.vm import Op, compile_block, disassemble, get_code_object
+from gulfofmexico.vm.compiler import Compiler
+
+TEST_FILENAME = "__test__"
+
+
+def parse_code(code: str):
+    interpreter.filename = TEST_FILENAME
+    interpreter.code = code
+    return generate_syntax_tree(TEST_FILENAME, tokenize(TEST_FILENAME, code), code)
+
+
+def run_code(code: str, engine: str = "vm") -> str:
+    """Run a program with an engine and return everything it printed."""
+    interpreter.set_engine(engine)
+    statements = parse_code(code)
+    namespaces: list[dict[str, Union[Variable, Name]]] = [KEYWORDS.copy()]  # type: ignore
+    exported_names: list[tuple[str, str, GulfOfMexicoValue]] = []
+    interpreter.load_global_gulfofmexico_variables(namespaces)
+    out = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(out):
+            interpreter.interpret_code_statements_main_wrapper(
+                statements, namespaces, [], [{}], {}, exported_names
+            )
+    except InterpretationError as e:
+        out.write(f"error: {e}\n")
+    finally:
+        interpreter.set_engine("interpreter")
+    return out.getvalue()
+
+
+class TestCompiler(unittest.TestCase):
+    """Statements compile to stack code that selects a candidate at runtime."""
+
+    def test_expression_is_stack_code(self):
+        statement = next(
+            st
+            for st in parse_code("print(1+2)!\n")[0]
+            if isinstance(st, ExpressionStatement)
+        )
+        compiler = Compiler()
+        compiler.compile_expression(statement.expression)
+        self.assertEqual(
+            [op for op, _ in compiler.instructions],
+            [Op.LOAD_FUNCTION, Op.LOAD_NUMBER, Op.LOAD_NUMBER, Op.BINARY_OP, Op.CALL],
+        )
+
+    def test_only_templates_are_rendered(self):
+        statement = next(
+            st
+            for st in parse_code('print("a", "b${c}")!\n')[0]
+            if isinstance(st, ExpressionStatement)
+        )
+        compiler = Compiler()
+        compiler.compile_expression(statement.expression)
+        ops = [op for op, _ in compiler.instructions]
+        self.assertEqual(ops[1:3], [Op.LOAD_TEXT, Op.LOAD_STRING])
+        self.assertEqual(compiler.instructions[1][1][0], "a")
+
+    def test_select_statement_targets_every_candidate(self):
+        statements = parse_code("const x = 5!\n")
+        code_object = compile_block(statements)
+        op, (candidates, offsets, end) = code_object.instructions[0]
+        self.assertIs(candidates, statements[0])
+        self.assertEqual(set(offsets), {id(st) for st in statements[0]})
+        self.assertEqual(end, len(code_object.instructions))
+
+    def test_code_objects_are_cached(self):
+        statements = parse_code("print(1)!\nprint(2)!\n")
+        self.assertIs(get_code_object(statements), get_code_object(statements))
+        single = [statements[0]]
+        self.assertIs(get_code_object(single), get_code_object([statements[0]]))
+
+    def test_code_objects_are_not_kept_for_the_next_program(self):
+        statements = parse_code("print(1)!\nprint(2)!\n")
+        code_object = get_code_object(statements)
+        interpreter.start_program()
+        self.assertIsNot(get_code_object(statements), code_object)
+
+    def test_disassemble(self):
+        listing = disassemble(compile_block(parse_code("const x = 5!\n")))
+        self.assertIn("SELECT_STATEMENT", listing)
+        self.assertIn("DECLARE", listing)
+        self.assertIn("const x, confidence 1", listing)
+
+
+class TestMachine(unittest.TestCase):
+    """The VM prints the same as the tree-walking interpreter."""
+
+    def assertSameOutput(self, code: str, expected: str):
+        self.assertEqual(run_code(code, "interpreter"), expected)
+        self.assertEqual(run_code(code, "vm"), expected)
+
+    def test_recursion(self):
+        code = (
+            "function add(a, b) => a + b!\n"
+            "var total = 0!\n"
+            "function loop(n) => {\n"
+            "   if n > 0 {\n"
+            "      total = add(total, n)!\n"
+            "      return loop(n-1)!\n"
+            "   }\n"
+            "}\n"
+            "loop(5)!\n"
+            "print(total)!\n"
+        )
+        self.assertSameOutput(code, "15\n")
+
+    def test_values_and_short_circuit(self):
+        code = (
+            "const const xs = [1, 2, 3]!\n"
+            "print(xs[0])!\n"
+            'const const name = "gulf"!\n'
+            'print("hi ${name}")!\n'
+            "print(true | false)!\n"
+            "print(false & true)!\n"
+        )
+        self.assertSameOutput(code, "1\nhi gulf\ntrue\nfalse\n")
+
+    def test_errors_are_the_same(self):
+        code = "const x = 1!\nprint(y z)!\n"
+        self.assertEqual(run_code(code, "vm"), run_code(code, "interpreter"))
+        self.assertIn("error:", run_code(code, "vm"))
+
+
+if __name__ == "__main__":
+    unittest.main()